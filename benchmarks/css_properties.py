@@ -0,0 +1,57 @@
+"""Measure the throughput of getting and setting CSS properties.
+
+For a selection of properties, reports the time to read the property
+when it hasn't been set (and the initial value is used), the time to
+read it once it has been set, and the time to set it.
+
+Run with::
+
+    $ python -m benchmarks.css_properties
+"""
+import argparse
+import time
+
+from colosseum.declaration import CSS
+
+PROPERTIES = [
+    ('width', '10px'),
+    ('margin_top', '1em'),
+    ('display', 'block'),
+    ('border_top_color', 'red'),
+    ('text_align', 'right'),
+    ('margin', '5px'),
+]
+
+
+def per_op(func, iterations):
+    start = time.perf_counter()
+    for i in range(iterations):
+        func()
+    return (time.perf_counter() - start) / iterations * 1000000
+
+
+def run(iterations):
+    print('{:>18} {:>14} {:>14} {:>14}'.format('property', 'get initial', 'get set', 'set'))
+    print('{:>18} {:>14} {:>14} {:>14}'.format('', '(us)', '(us)', '(us)'))
+    for name, value in PROPERTIES:
+        style = CSS()
+        get_initial = per_op(lambda: getattr(style, name), iterations)
+
+        setattr(style, name, value)
+        get_set = per_op(lambda: getattr(style, name), iterations)
+
+        set_value = per_op(lambda: setattr(style, name, value), iterations)
+
+        print('{:>18} {:>14.3f} {:>14.3f} {:>14.3f}'.format(name, get_initial, get_set, set_value))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=100000)
+    args = parser.parse_args()
+
+    run(args.iterations)
+
+
+if __name__ == '__main__':
+    main()
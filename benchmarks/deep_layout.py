@@ -0,0 +1,61 @@
+"""Measure the cost of laying out deeply nested documents.
+
+Each document is a single chain of nested blocks. Every block offsets its
+content, so the absolute position of every descendant depends on every
+ancestor. Layout time per node should not grow with the depth of nesting;
+documents are walked without recursion, so they can be nested arbitrarily deep.
+
+Run with::
+
+    $ python -m benchmarks.deep_layout
+"""
+import argparse
+
+from colosseum.constants import BLOCK
+from colosseum.declaration import CSS
+from colosseum.engine import layout
+
+from .utils import Display, Node, timed
+
+
+def build_document(depth):
+    node = Node(style=CSS(display=BLOCK, height=10))
+    for i in range(depth - 1):
+        node = Node(style=CSS(display=BLOCK, margin=1, padding=1), children=[node])
+    return node
+
+
+def read_positions(root):
+    "Read the absolute position of every box in the document."
+    node = root
+    while node is not None:
+        node.layout.absolute_content_top
+        node.layout.absolute_content_left
+        node = node.children[0] if node.children else None
+
+
+def run(depths, repeat):
+    display = Display()
+    print('{:>10} {:>14} {:>16}'.format('depth', 'layout (ms)', 'per node (us)'))
+    for depth in depths:
+        root = build_document(depth)
+
+        def full():
+            layout(display, root)
+            read_positions(root)
+
+        duration = timed(full, repeat)
+        print('{:>10} {:>14.2f} {:>16.2f}'.format(depth, duration * 1000, duration / depth * 1000000))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--depths', type=int, nargs='+', default=[100, 1000, 10000, 100000])
+    parser.add_argument('--repeat', type=int, default=1)
+    args = parser.parse_args()
+
+    run(args.depths, args.repeat)
+
+
+if __name__ == '__main__':
+    main()
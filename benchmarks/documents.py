@@ -0,0 +1,142 @@
+"""Generators of synthetic documents, for use by benchmarks.
+
+Each generator takes a size, and returns the root node of a document
+whose number of nodes grows linearly with that size.
+"""
+from colosseum.constants import BLOCK, FLEX, INLINE, NOWRAP, RELATIVE, WRAP
+from colosseum.declaration import CSS
+
+from .utils import Node
+
+
+def inline(width=40, height=16):
+    "An inline node with an intrinsic size (e.g., a word of text)."
+    node = Node(name='span', style=CSS(display=INLINE))
+    node.intrinsic.width = width
+    node.intrinsic.height = height
+    return node
+
+
+def wide(size):
+    "A root with `size` block children."
+    return Node(
+        style=CSS(display=BLOCK),
+        children=[Node(style=CSS(display=BLOCK, height=10, margin=5)) for i in range(size)],
+    )
+
+
+def deep(size):
+    "A chain of `size` nested blocks."
+    node = Node(style=CSS(display=BLOCK, height=10))
+    for i in range(size - 1):
+        node = Node(style=CSS(display=BLOCK, padding_left=1), children=[node])
+    return node
+
+
+def mixed(size, run_length=4):
+    """`size` sections, each mixing runs of inline children with blocks,
+    so each run is wrapped in an anonymous block box.
+    """
+    sections = []
+    for i in range(size):
+        children = []
+        for j in range(3):
+            children.extend(inline() for k in range(run_length))
+            children.append(Node(style=CSS(display=BLOCK, height=10, margin=2)))
+        sections.append(Node(style=CSS(display=BLOCK, padding=4), children=children))
+    return Node(style=CSS(display=BLOCK), children=sections)
+
+
+def styled(size):
+    """`size` blocks, each with a distinct style using a mix of units,
+    so no margins, borders or padding are shared between boxes.
+    """
+    units = ['px', 'em', '%', 'pt', 'vw']
+    blocks = []
+    for i in range(size):
+        unit = units[i % len(units)]
+        blocks.append(Node(style=CSS(
+            display=BLOCK,
+            width='{}%'.format(50 + i % 50),
+            margin='{}{}'.format(1 + i % 7, unit),
+            padding='{}px'.format(i % 11),
+            border_width='{}px'.format(i % 3),
+            border_style='solid',
+            border_color='#{:06x}'.format(i * 2654435761 % 0xffffff),
+            color='rgb({}, 0, 0)'.format(i % 256),
+            height='{}em'.format(1 + i % 5),
+        )))
+    return Node(style=CSS(display=BLOCK), children=blocks)
+
+
+def relative(size, blocks_per_box=3):
+    "`size` relatively positioned boxes, each containing a few blocks."
+    boxes = []
+    for i in range(size):
+        blocks = [
+            Node(style=CSS(display=BLOCK, height=10, margin=5))
+            for j in range(blocks_per_box)
+        ]
+        boxes.append(Node(
+            style=CSS(display=BLOCK, position=RELATIVE, left=i % 50, top=i % 20, padding=2),
+            children=blocks,
+        ))
+    return Node(style=CSS(display=BLOCK), children=boxes)
+
+
+def paragraph(size):
+    "A block of `size` words of varying widths, broken into many lines."
+    return Node(
+        style=CSS(display=BLOCK, width=600),
+        children=[inline(width=20 + i * 7 % 50) for i in range(size)],
+    )
+
+
+def flex_items(size):
+    """`size` flex items of varying widths and flexibility; some are
+    clamped by a min or max width, so they are frozen while the flexible
+    lengths of their line are resolved.
+    """
+    items = []
+    for i in range(size):
+        style = CSS(display=BLOCK, width=20 + i * 13 % 60, height=10, flex_grow=i % 3, flex_shrink=1 + i % 2)
+        if i % 7 == 0:
+            style.min_width = 30
+        elif i % 11 == 0:
+            style.max_width = 40
+        items.append(Node(style=style))
+    return items
+
+
+def flex_row(size):
+    "A flex container with a single row of `size` items, which must shrink."
+    return Node(style=CSS(display=FLEX, flex_wrap=NOWRAP, width=1000), children=flex_items(size))
+
+
+def flex_wrap(size):
+    "A flex container whose `size` items wrap onto many lines, and grow."
+    return Node(style=CSS(display=FLEX, flex_wrap=WRAP, width=1000), children=flex_items(size))
+
+
+# The document generators, keyed on name.
+GENERATORS = {
+    'wide': wide,
+    'deep': deep,
+    'mixed': mixed,
+    'styled': styled,
+    'relative': relative,
+    'paragraph': paragraph,
+    'flex_row': flex_row,
+    'flex_wrap': flex_wrap,
+}
+
+
+def count_nodes(root):
+    "The number of nodes in the document rooted at `root`."
+    count = 0
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        count += 1
+        stack.extend(node.children)
+    return count
@@ -0,0 +1,58 @@
+"""Compare reading geometry through Box properties with a geometry export.
+
+Run with::
+
+    $ python -m benchmarks.export_geometry
+"""
+import argparse
+
+from colosseum.engine import export_geometry, layout
+
+from .incremental_layout import build_document
+from .utils import Display, timed
+
+
+def read_properties(node):
+    "Read the geometry of every box through the Box properties."
+    result = []
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        box = node.layout
+        result.append((
+            box.absolute_content_left, box.absolute_content_top, box.content_width, box.content_height,
+            box.absolute_padding_box_left, box.absolute_padding_box_top,
+            box.padding_box_width, box.padding_box_height,
+            box.absolute_border_box_left, box.absolute_border_box_top,
+            box.border_box_width, box.border_box_height,
+            box.margin_top, box.margin_right, box.margin_bottom, box.margin_left,
+        ))
+        stack.extend(reversed(node.children))
+    return result
+
+
+def run(sizes, repeat):
+    display = Display()
+    print('{:>10} {:>16} {:>16}'.format('nodes', 'properties (ms)', 'export (ms)'))
+    for n_sections in sizes:
+        root = build_document(n_sections)
+        layout(display, root)
+
+        print('{:>10} {:>16.2f} {:>16.2f}'.format(
+            n_sections * 11 + 1,
+            timed(lambda: read_properties(root), repeat) * 1000,
+            timed(lambda: export_geometry(root), repeat) * 1000,
+        ))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000, 5000])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    run(args.sizes, args.repeat)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+"""Compare the cost of a full layout with an incremental relayout.
+
+A document of N sections, each containing 10 blocks, is laid out; then a
+number of blocks are modified and the document is laid out again. The cost
+of a full relayout grows with the size of the document; the cost of an
+incremental relayout grows with the number of modified blocks.
+
+Run with::
+
+    $ python -m benchmarks.incremental_layout
+"""
+import argparse
+
+from colosseum.constants import BLOCK
+from colosseum.declaration import CSS
+from colosseum.engine import layout
+
+from .utils import Display, Node, timed
+
+
+def build_document(n_sections, blocks_per_section=10):
+    sections = []
+    for i in range(n_sections):
+        blocks = [
+            Node(style=CSS(display=BLOCK, height=10, margin=5))
+            for j in range(blocks_per_section)
+        ]
+        sections.append(Node(style=CSS(display=BLOCK, padding=2), children=blocks))
+    return Node(style=CSS(display=BLOCK), children=sections)
+
+
+def modify(root, n_changes, width):
+    "Change the width of `n_changes` blocks, spread across the document."
+    step = max(1, len(root.children) // n_changes)
+    for section in root.children[::step][:n_changes]:
+        section.children[0].style.width = width
+
+
+def run(sizes, changes, repeat):
+    display = Display()
+    print('{:>10} {:>10} {:>14} {:>14}'.format('sections', 'changes', 'full (ms)', 'incremental (ms)'))
+    for n_sections in sizes:
+        root = build_document(n_sections)
+        layout(display, root)
+
+        for n_changes in changes:
+            if n_changes > n_sections:
+                continue
+            state = {'width': 100}
+
+            def full():
+                state['width'] = 300 - state['width']
+                modify(root, n_changes, state['width'])
+                layout(display, root)
+
+            def incremental():
+                state['width'] = 300 - state['width']
+                modify(root, n_changes, state['width'])
+                layout(display, root, incremental=True)
+
+            print('{:>10} {:>10} {:>14.2f} {:>14.2f}'.format(
+                n_sections,
+                n_changes,
+                timed(full, repeat) * 1000,
+                timed(incremental, repeat) * 1000,
+            ))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000, 5000])
+    parser.add_argument('--changes', type=int, nargs='+', default=[1, 10, 100])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    run(args.sizes, args.changes, args.repeat)
+
+
+if __name__ == '__main__':
+    main()
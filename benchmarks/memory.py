@@ -0,0 +1,68 @@
+"""Measure the memory used by each node of a laid out document.
+
+Reports the bytes allocated per node for the layout box, the intrinsic
+size, the style declaration, and for a complete laid out document.
+
+Run with::
+
+    $ python -m benchmarks.memory
+"""
+import argparse
+import gc
+import tracemalloc
+
+from colosseum.constants import BLOCK
+from colosseum.declaration import CSS
+from colosseum.dimensions import Box, Size
+from colosseum.engine import layout
+
+from .incremental_layout import build_document
+from .utils import Display, Node
+
+
+def allocated(func):
+    "Return the number of bytes allocated (and retained) by func()."
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        result = func()
+        gc.collect()
+        after = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    # Keep the result alive until the measurement is complete.
+    del result
+    return after - before
+
+
+def run(n_nodes):
+    node = Node()
+    display = Display()
+    n_sections = max(1, n_nodes // 11)
+
+    def document():
+        root = build_document(n_sections)
+        layout(display, root)
+        return root
+
+    print('{:>20} {:>16}'.format('', 'bytes per node'))
+    for name, func, count in [
+        ('Box', lambda: [Box(node) for i in range(n_nodes)], n_nodes),
+        ('Size', lambda: [Size(node) for i in range(n_nodes)], n_nodes),
+        ('CSS', lambda: [CSS(display=BLOCK, height=10) for i in range(n_nodes)], n_nodes),
+        ('laid out document', document, n_sections * 11 + 1),
+    ]:
+        print('{:>20} {:>16.1f}'.format(name, allocated(func) / count))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--nodes', type=int, default=100000)
+    args = parser.parse_args()
+
+    run(args.nodes)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+"""Measure the cost of repeatedly parsing unit values.
+
+Parses the same set of values over and over, reporting the time per
+parse and the memory retained after each round. Both should stay flat
+for as long as the parser runs.
+
+Run with::
+
+    $ python -m benchmarks.parse_units
+"""
+import argparse
+import time
+import tracemalloc
+
+from colosseum import parser
+
+VALUES = [
+    '10px', '50%', '1.5em', '2ex', '3ch', '12pt', '1pc', '1in', '2.5cm',
+    '10mm', '50vh', '50vw', '10vmin', '10vmax', '42', 42, 3.5,
+]
+
+
+def run(rounds, iterations):
+    tracemalloc.start()
+    print('{:>10} {:>16} {:>16}'.format('parses', 'us per parse', 'retained (kB)'))
+    total = 0
+    for i in range(rounds):
+        start = time.perf_counter()
+        for j in range(iterations):
+            for value in VALUES:
+                parser.units(value)
+        duration = time.perf_counter() - start
+        total += iterations * len(VALUES)
+
+        print('{:>10} {:>16.3f} {:>16.1f}'.format(
+            total,
+            duration / (iterations * len(VALUES)) * 1000000,
+            tracemalloc.get_traced_memory()[0] / 1024,
+        ))
+    tracemalloc.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rounds', type=int, default=5)
+    parser.add_argument('--iterations', type=int, default=5000)
+    args = parser.parse_args()
+
+    run(args.rounds, args.iterations)
+
+
+if __name__ == '__main__':
+    main()
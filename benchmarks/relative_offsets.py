@@ -0,0 +1,70 @@
+"""Measure the cost of animating the offsets of relatively positioned boxes.
+
+A document of N relatively positioned boxes, each containing a few
+blocks, is laid out; then, on every frame, the left and top offsets of
+every box are changed and the document is laid out again. A change to a
+relative offset doesn't affect the layout of any other box, so an
+incremental relayout translates the boxes instead of laying them out again.
+
+Run with::
+
+    $ python -m benchmarks.relative_offsets
+"""
+import argparse
+
+from colosseum.constants import BLOCK, RELATIVE
+from colosseum.declaration import CSS
+from colosseum.engine import layout
+
+from .utils import Display, Node, timed
+
+
+def build_document(n_boxes, blocks_per_box=3):
+    boxes = []
+    for i in range(n_boxes):
+        blocks = [
+            Node(style=CSS(display=BLOCK, height=10, margin=5))
+            for j in range(blocks_per_box)
+        ]
+        boxes.append(Node(style=CSS(display=BLOCK, position=RELATIVE, padding=2), children=blocks))
+    return Node(style=CSS(display=BLOCK), children=boxes)
+
+
+def animate(root, frame):
+    "Move every box to its position in the given frame."
+    for i, box in enumerate(root.children):
+        box.style.update(left=(frame + i) % 50, top=(frame * 2 + i) % 20)
+
+
+def run(sizes, frames):
+    display = Display()
+    print('{:>10} {:>16} {:>16}'.format('boxes', 'full (ms/frame)', 'offset (ms/frame)'))
+    for n_boxes in sizes:
+        root = build_document(n_boxes)
+        layout(display, root)
+
+        state = {'frame': 0}
+
+        def frame(incremental):
+            state['frame'] += 1
+            animate(root, state['frame'])
+            layout(display, root, incremental=incremental)
+
+        print('{:>10} {:>16.2f} {:>16.2f}'.format(
+            n_boxes,
+            timed(lambda: frame(False), frames) * 1000,
+            timed(lambda: frame(True), frames) * 1000,
+        ))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000])
+    parser.add_argument('--frames', type=int, default=10)
+    args = parser.parse_args()
+
+    run(args.sizes, args.frames)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+"""Measure the cost of resolving unit values to pixels during layout.
+
+Lays out a document of N sections, each containing 10 blocks styled with
+a mix of absolute, font-relative and percentage values, and reports the
+time for a full layout along with the hit rate of the resolution cache.
+
+Run with::
+
+    $ python -m benchmarks.resolve_units
+"""
+import argparse
+
+from colosseum import engine
+from colosseum.constants import BLOCK
+from colosseum.declaration import CSS
+from colosseum.engine import layout
+
+from .utils import Display, Node, timed
+
+
+def build_document(n_sections, blocks_per_section=10):
+    sections = []
+    for i in range(n_sections):
+        blocks = [
+            Node(style=CSS(
+                display=BLOCK,
+                height='2em',
+                width='50%',
+                margin='1em',
+                padding='2%',
+                border_width='1pt',
+                border_style='solid',
+            ))
+            for j in range(blocks_per_section)
+        ]
+        sections.append(Node(style=CSS(display=BLOCK, padding='5px', margin='1%'), children=blocks))
+    return Node(style=CSS(display=BLOCK), children=sections)
+
+
+def run(sizes, repeat):
+    display = Display()
+    print('{:>10} {:>14} {:>10} {:>10}'.format('sections', 'full (ms)', 'hits', 'misses'))
+    for n_sections in sizes:
+        root = build_document(n_sections)
+        engine.resolution_cache.clear()
+
+        duration = timed(lambda: layout(display, root), repeat=repeat)
+
+        print('{:>10} {:>14.1f} {:>10} {:>10}'.format(
+            n_sections,
+            duration * 1000,
+            engine.resolution_cache.hits,
+            engine.resolution_cache.misses,
+        ))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 100, 1000])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    run(args.sizes, args.repeat)
+
+
+if __name__ == '__main__':
+    main()
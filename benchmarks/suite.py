@@ -0,0 +1,290 @@
+"""Run the benchmark suite, reporting results in a machine-readable form.
+
+Lays out each synthetic document (see benchmarks.documents), reporting
+nodes laid out per second; times the incremental layout of a paragraph
+after an edit; and runs micro-benchmarks of the parser,
+property validation and style declarations, reporting microseconds per
+operation. The peak memory allocated by each benchmark is also reported.
+
+Results can be written as JSON, and compared with the results of an
+earlier run (e.g., of a different commit)::
+
+    $ python -m benchmarks.suite --output before.json
+    $ git checkout my-branch
+    $ python -m benchmarks.suite --compare before.json
+"""
+import argparse
+import json
+import platform
+import subprocess
+import time
+import tracemalloc
+
+import colosseum
+from colosseum import constants, parser
+from colosseum.declaration import CSS
+from colosseum.engine import layout
+
+from . import documents
+from .utils import Display, timed
+
+# The sizes of the documents laid out by each layout benchmark.
+LAYOUT_SIZES = {
+    'wide': [100, 1000],
+    'deep': [100, 1000],
+    'mixed': [10, 100],
+    'styled': [100, 1000],
+    'relative': [100, 1000],
+    'paragraph': [1000, 10000],
+    'flex_row': [1000, 10000],
+    'flex_wrap': [1000, 10000],
+}
+
+# The sizes of the paragraphs edited by the incremental layout benchmark.
+EDIT_SIZES = [1000, 10000]
+
+
+def peak_memory(func):
+    "Return the peak number of bytes allocated while running func()."
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+######################################################################
+# Layout benchmarks
+######################################################################
+
+def layout_benchmark(name, size, repeat):
+    build = documents.GENERATORS[name]
+    display = Display()
+    root = build(size)
+    nodes = documents.count_nodes(root)
+
+    duration = timed(lambda: layout(display, root), repeat)
+
+    # The memory used to lay out a document for the first time.
+    fresh = build(size)
+    peak = peak_memory(lambda: layout(display, fresh))
+
+    return {
+        'benchmark': 'layout.{}'.format(name),
+        'size': size,
+        'nodes': nodes,
+        'seconds': duration,
+        'nodes_per_sec': nodes / duration,
+        'us_per_op': duration / nodes * 1000000,
+        'peak_kb': peak / 1024,
+    }
+
+
+def edit_benchmark(size, repeat):
+    """Incrementally lay out a paragraph after one word in the middle of
+    it has changed, as when a user types.
+    """
+    display = Display()
+    root = documents.paragraph(size)
+    layout(display, root)
+    word = root.children[size // 2]
+    # Each edit toggles the width of the word.
+    widths = [word.intrinsic.width + 5, word.intrinsic.width]
+    state = {'index': 1}
+
+    def edit():
+        state['index'] = 1 - state['index']
+        word.intrinsic.width = widths[state['index']]
+        layout(display, root, incremental=True)
+
+    duration = timed(edit, repeat)
+    return {
+        'benchmark': 'layout.paragraph.edit',
+        'size': size,
+        'nodes': size + 1,
+        'seconds': duration,
+        'nodes_per_sec': (size + 1) / duration,
+        'us_per_op': duration * 1000000,
+        'peak_kb': peak_memory(edit) / 1024,
+    }
+
+
+######################################################################
+# Micro-benchmarks
+######################################################################
+
+def parse_units():
+    for value in ['10px', '50%', '1.5em', '12pt', '2.5cm', '50vw', '42', 3.5]:
+        yield lambda value=value: parser.units(value)
+
+
+def parse_color():
+    for value in ['red', '#336699', '#fff', 'rgb(10, 20, 30)', 'rgba(10, 20, 30, 0.5)', 'hsl(120, 50%, 50%)']:
+        yield lambda value=value: parser.color(value)
+
+
+def validate_choices():
+    for choices, value in [
+        (constants.DISPLAY_CHOICES, 'block'),
+        (constants.MARGIN_CHOICES, 'auto'),
+        (constants.MARGIN_CHOICES, '10px'),
+        (constants.SIZE_CHOICES, '50%'),
+        (constants.COLOR_CHOICES, '#336699'),
+        (constants.BORDER_WIDTH_CHOICES, 'thin'),
+    ]:
+        yield lambda choices=choices, value=value: choices.validate(value)
+
+
+def css_get():
+    style = CSS(width='10px', margin_top='1em')
+    for name in ['width', 'margin_top', 'display', 'color']:
+        yield lambda name=name: getattr(style, name)
+
+
+def css_set():
+    style = CSS()
+    for name, values in [
+        ('width', ['10px', '20px']),
+        ('margin', ['1em', '2em']),
+        ('display', ['block', 'inline']),
+        ('color', ['red', 'blue']),
+    ]:
+        state = {'index': 0}
+
+        def set_value(name=name, values=values, state=state):
+            state['index'] = 1 - state['index']
+            setattr(style, name, values[state['index']])
+
+        yield set_value
+
+
+def css_copy():
+    style = CSS(display='block', width='10px', margin='1em', padding=5, color='red')
+    yield style.copy
+
+
+# Each micro-benchmark generates the operations it times.
+MICRO_BENCHMARKS = {
+    'parser.units': parse_units,
+    'parser.color': parse_color,
+    'Choices.validate': validate_choices,
+    'CSS.get': css_get,
+    'CSS.set': css_set,
+    'CSS.copy': css_copy,
+}
+
+
+def micro_benchmark(name, iterations, repeat):
+    operations = list(MICRO_BENCHMARKS[name]())
+
+    def run():
+        for operation in operations:
+            for i in range(iterations):
+                operation()
+
+    duration = timed(run, repeat)
+    ops = iterations * len(operations)
+    return {
+        'benchmark': name,
+        'ops': ops,
+        'seconds': duration,
+        'us_per_op': duration / ops * 1000000,
+        'peak_kb': peak_memory(run) / 1024,
+    }
+
+
+######################################################################
+# Reporting
+######################################################################
+
+def metadata():
+    "Describe the environment of a benchmark run."
+    try:
+        commit = subprocess.check_output(
+            ['git', 'rev-parse', 'HEAD'], stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+
+    return {
+        'colosseum': colosseum.__version__,
+        'commit': commit,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+    }
+
+
+def key(result):
+    "The key identifying the benchmark that produced a result."
+    return (result['benchmark'], result.get('size'))
+
+
+def report(results, baseline=None):
+    "Print a table of results, with the change since the baseline results."
+    baseline = {key(result): result for result in baseline} if baseline else {}
+    print('{:>24} {:>8} {:>14} {:>12} {:>12} {:>10}'.format(
+        'benchmark', 'size', 'nodes/sec', 'us per op', 'peak (kB)', 'change'
+    ))
+    for result in results:
+        previous = baseline.get(key(result))
+        if previous:
+            change = '{:+.1%}'.format(result['us_per_op'] / previous['us_per_op'] - 1)
+        else:
+            change = ''
+        print('{:>24} {:>8} {:>14} {:>12.3f} {:>12.1f} {:>10}'.format(
+            result['benchmark'],
+            result.get('size', ''),
+            '{:.0f}'.format(result['nodes_per_sec']) if 'nodes_per_sec' in result else '',
+            result['us_per_op'],
+            result['peak_kb'],
+            change,
+        ))
+
+
+def run(benchmarks, scale, iterations, repeat):
+    results = []
+    for name in sorted(LAYOUT_SIZES):
+        if benchmarks and 'layout.{}'.format(name) not in benchmarks:
+            continue
+        for size in LAYOUT_SIZES[name]:
+            results.append(layout_benchmark(name, size * scale, repeat))
+
+    if not benchmarks or 'layout.paragraph.edit' in benchmarks:
+        for size in EDIT_SIZES:
+            results.append(edit_benchmark(size * scale, repeat))
+
+    for name in sorted(MICRO_BENCHMARKS):
+        if benchmarks and name not in benchmarks:
+            continue
+        results.append(micro_benchmark(name, iterations, repeat))
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('benchmarks', nargs='*', help='The benchmarks to run (default: all)')
+    parser.add_argument('--scale', type=int, default=1, help='Multiply the size of every document')
+    parser.add_argument('--iterations', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--output', help='Write the results to a JSON file')
+    parser.add_argument('--compare', help='Compare the results with a JSON file written by --output')
+    args = parser.parse_args()
+
+    results = run(args.benchmarks, args.scale, args.iterations, args.repeat)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)['results']
+    report(results, baseline)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'metadata': metadata(), 'results': results}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,48 @@
+import time
+
+from colosseum.constants import MEDIUM, THICK, THIN
+from colosseum.declaration import CSS
+from colosseum.dimensions import Box, Size
+
+
+class Display:
+    def __init__(self, dpi=96, width=1024, height=768):
+        self.dpi = dpi
+        self.content_width = width
+        self.content_height = height
+
+    def fixed_size(self, value):
+        return {
+            THIN: 1,
+            MEDIUM: 5,
+            THICK: 10,
+        }[value]
+
+
+class Node:
+    def __init__(self, name=None, style=None, children=None):
+        self.name = name if name else 'div'
+        self.parent = None
+        self.children = []
+        if children:
+            for child in children:
+                self.children.append(child)
+                child.parent = self
+        self.intrinsic = Size(self)
+        self.layout = Box(self)
+        self.style = style.copy(self) if style else CSS()
+
+    def __repr__(self):
+        return '<{}:{}>'.format(self.name, id(self))
+
+
+def timed(func, repeat=5):
+    "Run func `repeat` times, returning the best time, in seconds."
+    best = None
+    for i in range(repeat):
+        start = time.perf_counter()
+        func()
+        duration = time.perf_counter() - start
+        if best is None or duration < best:
+            best = duration
+    return best
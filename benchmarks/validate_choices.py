@@ -0,0 +1,55 @@
+"""Measure the throughput of validating CSS property values.
+
+For a selection of properties and values, reports the time taken by
+the `Choices` instance of the property to validate the value.
+
+Run with::
+
+    $ python -m benchmarks.validate_choices
+"""
+import argparse
+import time
+
+from colosseum import constants
+from colosseum.units import px
+
+CASES = [
+    ('display', constants.DISPLAY_CHOICES, 'block'),
+    ('margin_top', constants.MARGIN_CHOICES, 'auto'),
+    ('margin_top', constants.MARGIN_CHOICES, '10px'),
+    ('margin_top', constants.MARGIN_CHOICES, 10),
+    ('width', constants.SIZE_CHOICES, 10 * px),
+    ('width', constants.SIZE_CHOICES, '50%'),
+    ('max_width', constants.MAX_SIZE_CHOICES, 'none'),
+    ('border_top_width', constants.BORDER_WIDTH_CHOICES, 'thin'),
+    ('color', constants.COLOR_CHOICES, 'red'),
+    ('color', constants.COLOR_CHOICES, '#336699'),
+    ('background_color', constants.BACKGROUND_COLOR_CHOICES, 'transparent'),
+    ('text_align', constants.TEXT_ALIGN_CHOICES, 'inherit'),
+    ('orphans', constants.ORPHANS_CHOICES, '2'),
+    ('clip', constants.CLIP_CHOICES, 'auto'),
+]
+
+
+def run(iterations):
+    print('{:>18} {:>14} {:>14}'.format('property', 'value', 'us per op'))
+    for name, choices, value in CASES:
+        validate = choices.validate
+        start = time.perf_counter()
+        for i in range(iterations):
+            validate(value)
+        duration = time.perf_counter() - start
+
+        print('{:>18} {:>14} {:>14.3f}'.format(name, str(value), duration / iterations * 1000000))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=100000)
+    args = parser.parse_args()
+
+    run(args.iterations)
+
+
+if __name__ == '__main__':
+    main()
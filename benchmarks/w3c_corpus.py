@@ -0,0 +1,208 @@
+"""Measure the layout throughput of the web platform test corpus.
+
+Every input document in tests/web_platform is built and laid out (as the
+W3C tests do), and the time taken by `layout()` is recorded for each case.
+The cases are divided between a pool of processes; each case is loaded
+once, by the process that lays it out. Reports the aggregate time, the
+slowest cases, and the total for each test module. Cases that can't be
+laid out (e.g., because they use features that aren't implemented yet)
+are counted, but not timed.
+
+The results can be saved, and later runs compared with them; any case
+whose layout has become slower by more than the threshold is flagged,
+and the exit status is 1::
+
+    $ python -m benchmarks.w3c_corpus --output baseline.json
+    $ python -m benchmarks.w3c_corpus --baseline baseline.json
+
+Run with::
+
+    $ python -m benchmarks.w3c_corpus
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from colosseum.constants import HTML4
+from colosseum.engine import layout
+
+from tests.utils import Display, build_document
+
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'tests', 'web_platform')
+
+
+def find_cases(corpus_dir=CORPUS_DIR):
+    """Find every case in the corpus.
+
+    Returns a list of (module, name, path) tuples; e.g.,
+    ('CSS2/normal_flow', 'block-formatting-contexts-001', '.../data/block-formatting-contexts-001.json').
+    """
+    cases = []
+    for dirpath, dirnames, filenames in os.walk(corpus_dir):
+        dirnames.sort()
+        if os.path.basename(dirpath) != 'data':
+            continue
+        module = os.path.relpath(os.path.dirname(dirpath), corpus_dir).replace(os.sep, '/')
+        for filename in sorted(filenames):
+            if filename.endswith('.json'):
+                cases.append((module, os.path.splitext(filename)[0], os.path.join(dirpath, filename)))
+    return cases
+
+
+def time_case(path, display, repeat):
+    "Lay out the document of a case, returning the best time in seconds."
+    with open(path) as f:
+        data = json.load(f)
+    root = build_document(data['test_case'])
+
+    best = None
+    for i in range(repeat):
+        start = time.perf_counter()
+        layout(display, root, standard=HTML4)
+        duration = time.perf_counter() - start
+        if best is None or duration < best:
+            best = duration
+    return best
+
+
+def time_cases(cases, repeat):
+    """Time the layout of each case in a list of (module, name, path).
+
+    Returns a result dictionary for each case. This is the work done
+    by each process in the pool.
+    """
+    display = Display(dpi=96, width=1024, height=768)
+    results = []
+    for module, name, path in cases:
+        result = {'module': module, 'name': name}
+        try:
+            result['seconds'] = time_case(path, display, repeat)
+        except Exception as e:
+            result['error'] = type(e).__name__
+        results.append(result)
+    return results
+
+
+def run(cases, jobs, repeat, chunk_size=50):
+    "Time every case, dividing the cases between `jobs` processes."
+    chunks = [cases[i:i + chunk_size] for i in range(0, len(cases), chunk_size)]
+    results = []
+    if jobs == 1:
+        for chunk in chunks:
+            results.extend(time_cases(chunk, repeat))
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            for chunk_results in executor.map(time_cases, chunks, [repeat] * len(chunks)):
+                results.extend(chunk_results)
+    return results
+
+
+def case_id(result):
+    return '{}/{}'.format(result['module'], result['name'])
+
+
+def find_regressions(results, baseline, threshold, minimum):
+    """Compare results with the results of an earlier run.
+
+    A case has regressed if it takes more than `threshold` (a proportion)
+    longer than in the baseline, and at least `minimum` seconds longer.
+    Returns a list of (case id, baseline seconds, seconds).
+    """
+    previous = {case_id(result): result.get('seconds') for result in baseline}
+    regressions = []
+    for result in results:
+        before = previous.get(case_id(result))
+        after = result.get('seconds')
+        if before is None or after is None:
+            continue
+        if after > before * (1 + threshold) and after - before >= minimum:
+            regressions.append((case_id(result), before, after))
+    return sorted(regressions, key=lambda regression: regression[2] / regression[1], reverse=True)
+
+
+def report(results, slowest, duration):
+    timed = [result for result in results if 'seconds' in result]
+    total = sum(result['seconds'] for result in timed)
+    errors = {}
+    for result in results:
+        if 'error' in result:
+            errors[result['error']] = errors.get(result['error'], 0) + 1
+
+    print('{} cases in {:.1f}s: {} laid out in {:.1f}ms ({:.3f}ms per case); {} failed'.format(
+        len(results), duration, len(timed), total * 1000,
+        total * 1000 / len(timed) if timed else 0,
+        len(results) - len(timed),
+    ))
+    for error, count in sorted(errors.items()):
+        print('    {:>6} {}'.format(count, error))
+
+    print()
+    print('Slowest cases:')
+    print('{:>10}  {}'.format('ms', 'case'))
+    for result in sorted(timed, key=lambda result: result['seconds'], reverse=True)[:slowest]:
+        print('{:>10.3f}  {}'.format(result['seconds'] * 1000, case_id(result)))
+
+    modules = {}
+    for result in results:
+        count, failed, seconds = modules.get(result['module'], (0, 0, 0))
+        if 'seconds' in result:
+            modules[result['module']] = (count + 1, failed, seconds + result['seconds'])
+        else:
+            modules[result['module']] = (count + 1, failed + 1, seconds)
+
+    print()
+    print('Modules:')
+    print('{:>8} {:>8} {:>10}  {}'.format('cases', 'failed', 'total ms', 'module'))
+    for module, (count, failed, seconds) in sorted(modules.items(), key=lambda item: item[1][2], reverse=True):
+        print('{:>8} {:>8} {:>10.2f}  {}'.format(count, failed, seconds * 1000, module))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('modules', nargs='*', help='Only lay out the cases in these modules (e.g., CSS2/box)')
+    parser.add_argument('--jobs', type=int, default=os.cpu_count(), help='The number of processes to use')
+    parser.add_argument('--repeat', type=int, default=3, help='Lay out each case this many times, keeping the best')
+    parser.add_argument('--slowest', type=int, default=20, help='The number of slowest cases to report')
+    parser.add_argument('--output', help='Write the results to a JSON file')
+    parser.add_argument('--baseline', help='Flag regressions against the results in a JSON file written by --output')
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help='The proportional slowdown of a case that is a regression')
+    parser.add_argument('--minimum', type=float, default=0.0001,
+                        help='The minimum slowdown of a case (in seconds) that is a regression')
+    args = parser.parse_args()
+
+    cases = find_cases()
+    if args.modules:
+        cases = [case for case in cases if case[0] in args.modules]
+
+    start = time.perf_counter()
+    results = run(cases, args.jobs, args.repeat)
+    report(results, args.slowest, time.perf_counter() - start)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'results': results}, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)['results']
+        regressions = find_regressions(results, baseline, args.threshold, args.minimum)
+
+        print()
+        if regressions:
+            print('{} cases regressed:'.format(len(regressions)))
+            print('{:>10} {:>10} {:>8}  {}'.format('before ms', 'after ms', 'change', 'case'))
+            for case, before, after in regressions:
+                print('{:>10.3f} {:>10.3f} {:>+8.0%}  {}'.format(
+                    before * 1000, after * 1000, after / before - 1, case
+                ))
+            sys.exit(1)
+        else:
+            print('No regressions.')
+
+
+if __name__ == '__main__':
+    main()
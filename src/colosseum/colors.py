@@ -14,6 +14,12 @@ class rgb(Color):
     def __repr__(self):
         return "rgba({}, {}, {}, {})".format(self.r, self.g, self.b, self.a)
 
+    def __eq__(self, other):
+        return isinstance(other, rgb) and (self.r, self.g, self.b, self.a) == (other.r, other.g, other.b, other.a)
+
+    def __hash__(self):
+        return hash(('rgb', self.r, self.g, self.b, self.a))
+
     @property
     def rgb(self):
         return self
@@ -30,6 +36,12 @@ class hsl(Color):
     def __repr__(self):
         return "hsla({}, {}, {}, {})".format(self.h, self.s, self.l, self.a)
 
+    def __eq__(self, other):
+        return isinstance(other, hsl) and (self.h, self.s, self.l, self.a) == (other.h, other.s, other.l, other.a)
+
+    def __hash__(self):
+        return hash(('hsl', self.h, self.s, self.l, self.a))
+
     @property
     def rgb(self):
         c = (1.0 - abs(2.0 * self.l - 1.0)) * self.s
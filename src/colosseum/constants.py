@@ -15,14 +15,80 @@ from .validators import (
 class Choices:
     "A class to define allowable data types for a property."
 
+    # The maximum number of validated values remembered by each instance.
+    MEMO_SIZE = 1024
+
     def __init__(self, *constants, validators=None,
                  explicit_defaulting_constants=None):
         self.constants = set(constants)
         self.explicit_defaulting_constants = explicit_defaulting_constants or []
         self.validators = validators or []
 
-    def validate(self, value):
+        # Keywords that are always valid, mapped to the constant they
+        # validate as. Keywords that a validator would accept are left out,
+        # as validators take precedence over constants.
+        self._keywords = {}
+        for const in list(self.explicit_defaulting_constants) + list(self.constants):
+            for keyword in ([const, 'none'] if const is None else [const]):
+                if not self._validated(keyword):
+                    self._keywords[keyword] = const
+
+        # The validators that may accept a value of a given type.
+        self._routes = {}
+        self._memo = {}
+
+    def _validated(self, value):
+        "Determine if any validator could accept the given value."
         for validator in self.validators:
+            try:
+                validator(value)
+                return True
+            except ValidationError:
+                pass
+            except Exception:
+                return True
+        return False
+
+    def _route(self, value_type):
+        """Return the validators that may accept a value of the given type.
+
+        A validator can declare the `types` of value it accepts;
+        validators that don't are tried for values of any type.
+        """
+        try:
+            return self._routes[value_type]
+        except KeyError:
+            pass
+
+        validators = [
+            validator for validator in self.validators
+            if not hasattr(validator, 'types') or issubclass(value_type, validator.types)
+        ]
+        self._routes[value_type] = validators
+        return validators
+
+    def validate(self, value):
+        try:
+            key = (value.__class__, value)
+            return self._memo[key]
+        except KeyError:
+            pass
+        except TypeError:
+            # The value can't be hashed, so it can't be memoized.
+            return self._validate(value)
+
+        try:
+            result = self._keywords[value]
+        except KeyError:
+            result = self._validate(value)
+
+        if len(self._memo) >= self.MEMO_SIZE:
+            self._memo.clear()
+        self._memo[key] = result
+        return result
+
+    def _validate(self, value):
+        for validator in self._route(value.__class__):
             try:
                 value = validator(value)
                 return value
@@ -79,6 +145,19 @@ class OtherProperty:
 HTML4 = 'html4'
 HTML5 = 'html5'
 
+######################################################################
+# Style invalidation
+#
+# The work invalidated by a change to the value of a property,
+# in increasing order of cost.
+######################################################################
+
+INVALIDATES_NOTHING = 0  # The property doesn't affect rendering.
+INVALIDATES_PAINT = 1  # The box must be repainted, but its layout is unchanged.
+INVALIDATES_OFFSET = 2  # The box is moved, but its size is unchanged.
+INVALIDATES_LAYOUT = 3  # The layout of the box must be re-evaluated.
+INVALIDATES_SUBTREE = 4  # The layout of the box and all its descendants must be re-evaluated.
+
 ######################################################################
 # Common constants
 ######################################################################
@@ -590,7 +669,7 @@ COLUMN_REVERSE = 'column-reverse'
 
 FLEX_DIRECTION_CHOICES = Choices(ROW, ROW_REVERSE, COLUMN, COLUMN_REVERSE)
 
-NOWRAP = 'no-wrap'
+# NOWRAP is defined with the values of white-space.
 WRAP = 'wrap'
 WRAP_REVERSE = 'wrap-reverse'
 
@@ -1,3 +1,5 @@
+from weakref import WeakValueDictionary
+
 from . import engine as css_engine, parser
 from .constants import (  # noqa
     ALIGN_CONTENT_CHOICES,
@@ -32,8 +34,14 @@ from .constants import (  # noqa
     GRID_PLACEMENT_CHOICES,
     GRID_TEMPLATE_AREA_CHOICES,
     GRID_TEMPLATE_CHOICES,
+    INHERIT,
     INITIAL,
     INLINE,
+    INVALIDATES_LAYOUT,
+    INVALIDATES_NOTHING,
+    INVALIDATES_OFFSET,
+    INVALIDATES_PAINT,
+    INVALIDATES_SUBTREE,
     INVERT,
     JUSTIFY_CONTENT_CHOICES,
     LETTER_SPACING_CHOICES,
@@ -92,78 +100,201 @@ from .wrappers import (
 
 _CSS_PROPERTIES = set()
 
+# The initial value of each longhand property, the longhand properties
+# that are inherited, and the work invalidated by a change to the value
+# of each longhand property.
+_CSS_INITIAL_VALUES = {}
+_CSS_INHERITED_PROPERTIES = set()
+_CSS_INVALIDATIONS = {}
 
-def validated_shorthand_property(name, parser, wrapper):
-    """Define the shorthand CSS font property."""
 
-    def getter(self):
+# A marker for a property that hasn't been set.
+_UNSET = object()
+
+
+class ShorthandProperty:
+    "A CSS shorthand property, stored as the longhand properties it represents."
+    def __init__(self, name, parser, wrapper):
+        self.name = name
+        self.parser = parser
+        self.wrapper = wrapper
+        self.longhands = [
+            (property_name, '_%s' % property_name)
+            for property_name in wrapper.VALID_KEYS
+        ]
+
+    def __get__(self, obj, objtype=None):
+        if obj is None:
+            return self
+
         properties = {}
-        for property_name in wrapper.VALID_KEYS:
-            try:
-                properties[property_name] = getattr(self, '_%s' % property_name)
-            except AttributeError:
-                pass
+        values = obj.__dict__
+        for property_name, attr in self.longhands:
+            value = values.get(attr, _UNSET)
+            if value is not _UNSET:
+                properties[property_name] = value
 
         # This is the only place we use the wrapper as a convenience for the user
-        return wrapper(**properties) if properties else ''
+        return self.wrapper(**properties) if properties else ''
 
-    def setter(self, value):
+    def __set__(self, obj, value):
         try:
             # A shorthand parser must return a dictionary
-            shorthand_dict = parser(value)
+            shorthand_dict = self.parser(value)
         except ValidationError:
-            raise ValueError("Invalid value '%s' for CSS property '%s'!" % (value, name))
+            raise ValueError("Invalid value '%s' for CSS property '%s'!" % (value, self.name))
 
         # Reset non declared properties to initial values
-        used_properties = shorthand_dict.keys()
-        for property_name in wrapper.VALID_KEYS:
-            if property_name in used_properties:
-                setattr(self, property_name, shorthand_dict[property_name])
+        for property_name, attr in self.longhands:
+            if property_name in shorthand_dict:
+                setattr(obj, property_name, shorthand_dict[property_name])
             else:
-                delattr(self, property_name)
+                delattr(obj, property_name)
 
         # We do not explicitely set the shorthand property as it is stored in the
-        # individual properties it represents
-        self.dirty = True
+        # individual properties it represents; they record their own changes.
 
-    def deleter(self):
-        for property_name in wrapper.VALID_KEYS:
+    def __delete__(self, obj):
+        for property_name, attr in self.longhands:
             try:
-                delattr(self, property_name)
-                self.dirty = True
+                delattr(obj, property_name)
             except AttributeError:
                 # Attribute doesn't exist
                 pass
 
-    _CSS_PROPERTIES.add(name)
-    return property(getter, setter, deleter)
 
+class UnvalidatedProperty:
+    """A simple CSS property attribute, stored without validation.
+
+    `invalidates` is the work invalidated by a change to the value of the
+    property; see INVALIDATES_*. A change that invalidates the layout of the
+    box and its descendants marks the owner dirty; any other change is
+    reported to the owner's `invalidate()` method.
+    """
+    def __init__(self, name, initial, invalidates=INVALIDATES_SUBTREE):
+        self.name = name
+        self.attr = '_%s' % name
+        self.initial = initial
+        self.invalidates = invalidates
+
+    def __get__(self, obj, objtype=None):
+        if obj is None:
+            return self
+        return obj.__dict__.get(self.attr, self.initial)
+
+    def __set__(self, obj, value):
+        if value != obj.__dict__.get(self.attr, self.initial):
+            obj.__dict__[self.attr] = value
+            self.changed(obj)
+
+    def __delete__(self, obj):
+        if obj.__dict__.pop(self.attr, _UNSET) is not _UNSET:
+            self.changed(obj)
+
+    def changed(self, obj):
+        if self.invalidates == INVALIDATES_SUBTREE:
+            obj.dirty = True
+        else:
+            obj.invalidate(self.invalidates)
 
-def unvalidated_property(name, choices, initial):
-    "Define a simple CSS property attribute."
-    initial = choices.validate(initial)
 
-    def getter(self):
-        return getattr(self, '_%s' % name, initial)
+class ValidatedProperty(UnvalidatedProperty):
+    """A simple CSS property attribute.
+
+    Values are validated against the choices for the property. The initial
+    value can be computed from other properties; see OtherProperty.
+    """
+    def __init__(self, name, choices, initial, invalidates=INVALIDATES_SUBTREE):
+        super().__init__(name, initial, invalidates)
+        self.choices = choices
+        self.deferred = hasattr(initial, 'value')
 
-    def setter(self, value):
-        if value != getattr(self, '_%s' % name, initial):
-            setattr(self, '_%s' % name, value)
-            self.dirty = True
+    def __get__(self, obj, objtype=None):
+        if obj is None:
+            return self
 
-    def deleter(self):
+        value = obj.__dict__.get(self.attr, _UNSET)
+        if value is _UNSET:
+            if self.deferred:
+                # Get initial value from other property value. See OtherProperty.
+                return self.initial.value(obj)
+            return self.initial
+        return value
+
+    def __set__(self, obj, value):
         try:
-            delattr(self, '_%s' % name)
-            self.dirty = True
-        except AttributeError:
-            # Attribute doesn't exist
-            pass
+            value = self.choices.validate(value)
+        except ValueError:
+            raise ValueError("Invalid value '%s' for CSS property '%s'; Valid values are: %s" % (
+                value, self.name, self.choices
+            ))
+
+        super().__set__(obj, value)
+
+
+class DirectionalProperty:
+    "A property attribute that proxies for top/right/bottom/left alternatives."
+    def __init__(self, name, initial):
+        self.name = name % ''
+        self.initial = initial
+        self.top = name % '_top'
+        self.right = name % '_right'
+        self.bottom = name % '_bottom'
+        self.left = name % '_left'
 
+    def __get__(self, obj, objtype=None):
+        if obj is None:
+            return self
+
+        return (
+            getattr(obj, self.top, self.initial),
+            getattr(obj, self.right, self.initial),
+            getattr(obj, self.bottom, self.initial),
+            getattr(obj, self.left, self.initial),
+        )
+
+    def __set__(self, obj, value):
+        if isinstance(value, tuple):
+            if len(value) == 4:
+                top, right, bottom, left = value
+            elif len(value) == 3:
+                top, right, bottom = value
+                left = right
+            elif len(value) == 2:
+                top, right = value
+                bottom, left = top, right
+            elif len(value) == 1:
+                top = right = bottom = left = value[0]
+            else:
+                raise ValueError("Invalid value for '%s'; value must be an number, or a 1-4 tuple." % self.name)
+        else:
+            top = right = bottom = left = value
+
+        setattr(obj, self.top, top)
+        setattr(obj, self.right, right)
+        setattr(obj, self.bottom, bottom)
+        setattr(obj, self.left, left)
+
+    def __delete__(self, obj):
+        delattr(obj, self.top)
+        delattr(obj, self.right)
+        delattr(obj, self.bottom)
+        delattr(obj, self.left)
+
+
+def validated_shorthand_property(name, parser, wrapper):
+    """Define the shorthand CSS font property."""
     _CSS_PROPERTIES.add(name)
-    return property(getter, setter, deleter)
+    return ShorthandProperty(name, parser, wrapper)
 
 
-def validated_property(name, choices, initial):
+def unvalidated_property(name, choices, initial):
+    "Define a simple CSS property attribute."
+    _CSS_PROPERTIES.add(name)
+    return UnvalidatedProperty(name, choices.validate(initial))
+
+
+def validated_property(name, choices, initial, inherited=False, invalidates=INVALIDATES_SUBTREE):
     "Define a simple CSS property attribute."
     try:
         initial = choices.validate(initial)
@@ -180,96 +311,35 @@ def validated_property(name, choices, initial):
         except AttributeError:
             raise ValueError('Initial value "%s" does not have a value attribute!' % initial)
 
-    def getter(self):
-        try:
-            # Get initial value from other property value. See OtherProperty.
-            initial_value = initial.value(self)
-        except AttributeError:
-            initial_value = initial
-
-        return getattr(self, '_%s' % name, initial_value)
-
-    def setter(self, value):
-        try:
-            value = choices.validate(value)
-        except ValueError:
-            raise ValueError("Invalid value '%s' for CSS property '%s'; Valid values are: %s" % (
-                value, name, choices
-            ))
-
-        if value != getattr(self, '_%s' % name, initial):
-            setattr(self, '_%s' % name, value)
-            self.dirty = True
-
-    def deleter(self):
-        try:
-            delattr(self, '_%s' % name)
-            self.dirty = True
-        except AttributeError:
-            # Attribute doesn't exist
-            pass
+    _CSS_INITIAL_VALUES[name] = initial
+    if inherited:
+        _CSS_INHERITED_PROPERTIES.add(name)
+    _CSS_INVALIDATIONS[name] = invalidates
 
     _CSS_PROPERTIES.add(name)
-    return property(getter, setter, deleter)
+    return ValidatedProperty(name, choices, initial, invalidates)
 
 
 def directional_property(name, initial):
     "Define a property attribute that proxies for top/right/bottom/left alternatives."
-    def getter(self):
-        return (
-            getattr(self, name % '_top', initial),
-            getattr(self, name % '_right', initial),
-            getattr(self, name % '_bottom', initial),
-            getattr(self, name % '_left', initial),
-        )
-
-    def setter(self, value):
-        if isinstance(value, tuple):
-            if len(value) == 4:
-                setattr(self, name % '_top', value[0])
-                setattr(self, name % '_right', value[1])
-                setattr(self, name % '_bottom', value[2])
-                setattr(self, name % '_left', value[3])
-            elif len(value) == 3:
-                setattr(self, name % '_top', value[0])
-                setattr(self, name % '_right', value[1])
-                setattr(self, name % '_bottom', value[2])
-                setattr(self, name % '_left', value[1])
-            elif len(value) == 2:
-                setattr(self, name % '_top', value[0])
-                setattr(self, name % '_right', value[1])
-                setattr(self, name % '_bottom', value[0])
-                setattr(self, name % '_left', value[1])
-            elif len(value) == 1:
-                setattr(self, name % '_top', value[0])
-                setattr(self, name % '_right', value[0])
-                setattr(self, name % '_bottom', value[0])
-                setattr(self, name % '_left', value[0])
-            else:
-                raise ValueError("Invalid value for '%s'; value must be an number, or a 1-4 tuple." % (name % ''))
-        else:
-            setattr(self, name % '_top', value)
-            setattr(self, name % '_right', value)
-            setattr(self, name % '_bottom', value)
-            setattr(self, name % '_left', value)
-
-    def deleter(self):
-        delattr(self, name % '_top')
-        delattr(self, name % '_right')
-        delattr(self, name % '_bottom')
-        delattr(self, name % '_left')
-
     _CSS_PROPERTIES.add(name % '')
     _CSS_PROPERTIES.add(name % '_top')
     _CSS_PROPERTIES.add(name % '_right')
     _CSS_PROPERTIES.add(name % '_bottom')
     _CSS_PROPERTIES.add(name % '_left')
-    return property(getter, setter, deleter)
+    return DirectionalProperty(name, initial)
 
 
 class CSS:
     def __init__(self, **style):
         self._node = None
+        # The computed style of the declaration; see compute().
+        self.computed = None
+        self._computed_parent = None
+        self._previous_computed = None
+        self._fingerprint = None
+        # True if the style of a descendant of the node has changed.
+        self.changed_descendants = False
         self.update(**style)
 
     ######################################################################
@@ -278,43 +348,59 @@ class CSS:
 
     # 8. Box model #######################################################
     # 8.3 Margin properties
-    margin_top = validated_property('margin_top', choices=MARGIN_CHOICES, initial=0)
-    margin_right = validated_property('margin_right', choices=MARGIN_CHOICES, initial=0)
-    margin_bottom = validated_property('margin_bottom', choices=MARGIN_CHOICES, initial=0)
-    margin_left = validated_property('margin_left', choices=MARGIN_CHOICES, initial=0)
+    margin_top = validated_property('margin_top', choices=MARGIN_CHOICES, initial=0,
+                                    invalidates=INVALIDATES_LAYOUT)
+    margin_right = validated_property('margin_right', choices=MARGIN_CHOICES, initial=0,
+                                      invalidates=INVALIDATES_LAYOUT)
+    margin_bottom = validated_property('margin_bottom', choices=MARGIN_CHOICES, initial=0,
+                                       invalidates=INVALIDATES_LAYOUT)
+    margin_left = validated_property('margin_left', choices=MARGIN_CHOICES, initial=0,
+                                     invalidates=INVALIDATES_LAYOUT)
     margin = directional_property('margin%s', initial=0)
 
     # 8.4 Padding properties
-    padding_top = validated_property('padding_top', choices=PADDING_CHOICES, initial=0)
-    padding_right = validated_property('padding_right', choices=PADDING_CHOICES, initial=0)
-    padding_bottom = validated_property('padding_bottom', choices=PADDING_CHOICES, initial=0)
-    padding_left = validated_property('padding_left', choices=PADDING_CHOICES, initial=0)
+    padding_top = validated_property('padding_top', choices=PADDING_CHOICES, initial=0,
+                                     invalidates=INVALIDATES_LAYOUT)
+    padding_right = validated_property('padding_right', choices=PADDING_CHOICES, initial=0,
+                                       invalidates=INVALIDATES_LAYOUT)
+    padding_bottom = validated_property('padding_bottom', choices=PADDING_CHOICES, initial=0,
+                                        invalidates=INVALIDATES_LAYOUT)
+    padding_left = validated_property('padding_left', choices=PADDING_CHOICES, initial=0,
+                                      invalidates=INVALIDATES_LAYOUT)
     padding = directional_property('padding%s', initial=0)
 
     # 8.5 Border properties
     # 8.5.1 Border width
-    border_top_width = validated_property('border_top_width', choices=BORDER_WIDTH_CHOICES, initial=0)
-    border_right_width = validated_property('border_right_width', choices=BORDER_WIDTH_CHOICES, initial=0)
-    border_bottom_width = validated_property('border_bottom_width', choices=BORDER_WIDTH_CHOICES, initial=0)
-    border_left_width = validated_property('border_left_width', choices=BORDER_WIDTH_CHOICES, initial=0)
+    border_top_width = validated_property('border_top_width', choices=BORDER_WIDTH_CHOICES, initial=0,
+                                          invalidates=INVALIDATES_LAYOUT)
+    border_right_width = validated_property('border_right_width', choices=BORDER_WIDTH_CHOICES, initial=0,
+                                            invalidates=INVALIDATES_LAYOUT)
+    border_bottom_width = validated_property('border_bottom_width', choices=BORDER_WIDTH_CHOICES, initial=0,
+                                             invalidates=INVALIDATES_LAYOUT)
+    border_left_width = validated_property('border_left_width', choices=BORDER_WIDTH_CHOICES, initial=0,
+                                           invalidates=INVALIDATES_LAYOUT)
     border_width = directional_property('border%s_width', initial=0)
 
     # 8.5.2 Border color
     border_top_color = validated_property('border_top_color', choices=BORDER_COLOR_CHOICES,
-                                          initial=OtherProperty('color'))
+                                          initial=OtherProperty('color'), invalidates=INVALIDATES_PAINT)
     border_right_color = validated_property('border_right_color', choices=BORDER_COLOR_CHOICES,
-                                            initial=OtherProperty('color'))
+                                            initial=OtherProperty('color'), invalidates=INVALIDATES_PAINT)
     border_bottom_color = validated_property('border_bottom_color', choices=BORDER_COLOR_CHOICES,
-                                             initial=OtherProperty('color'))
+                                             initial=OtherProperty('color'), invalidates=INVALIDATES_PAINT)
     border_left_color = validated_property('border_left_color', choices=BORDER_COLOR_CHOICES,
-                                           initial=OtherProperty('color'))
+                                           initial=OtherProperty('color'), invalidates=INVALIDATES_PAINT)
     border_color = directional_property('border%s_color', initial=0)
 
     # 8.5.3 Border style
-    border_top_style = validated_property('border_top_style', choices=BORDER_STYLE_CHOICES, initial=None)
-    border_right_style = validated_property('border_right_style', choices=BORDER_STYLE_CHOICES, initial=None)
-    border_bottom_style = validated_property('border_bottom_style', choices=BORDER_STYLE_CHOICES, initial=None)
-    border_left_style = validated_property('border_left_style', choices=BORDER_STYLE_CHOICES, initial=None)
+    border_top_style = validated_property('border_top_style', choices=BORDER_STYLE_CHOICES, initial=None,
+                                          invalidates=INVALIDATES_LAYOUT)
+    border_right_style = validated_property('border_right_style', choices=BORDER_STYLE_CHOICES, initial=None,
+                                            invalidates=INVALIDATES_LAYOUT)
+    border_bottom_style = validated_property('border_bottom_style', choices=BORDER_STYLE_CHOICES, initial=None,
+                                             invalidates=INVALIDATES_LAYOUT)
+    border_left_style = validated_property('border_left_style', choices=BORDER_STYLE_CHOICES, initial=None,
+                                           invalidates=INVALIDATES_LAYOUT)
     border_style = directional_property('border%s_style', initial=None)
 
     # 8.5.4 Border shorthand properties
@@ -332,40 +418,46 @@ class CSS:
     position = validated_property('position', choices=POSITION_CHOICES, initial=STATIC)
 
     # 9.3.2 Box offsets
-    top = validated_property('top', choices=BOX_OFFSET_CHOICES, initial=AUTO)
-    bottom = validated_property('bottom', choices=BOX_OFFSET_CHOICES, initial=AUTO)
-    left = validated_property('left', choices=BOX_OFFSET_CHOICES, initial=AUTO)
-    right = validated_property('right', choices=BOX_OFFSET_CHOICES, initial=AUTO)
+    top = validated_property('top', choices=BOX_OFFSET_CHOICES, initial=AUTO, invalidates=INVALIDATES_OFFSET)
+    bottom = validated_property('bottom', choices=BOX_OFFSET_CHOICES, initial=AUTO, invalidates=INVALIDATES_OFFSET)
+    left = validated_property('left', choices=BOX_OFFSET_CHOICES, initial=AUTO, invalidates=INVALIDATES_OFFSET)
+    right = validated_property('right', choices=BOX_OFFSET_CHOICES, initial=AUTO, invalidates=INVALIDATES_OFFSET)
 
     # 9.5.1 Positioning the float
     float = validated_property('float', choices=FLOAT_CHOICES, initial=None)
 
     # 9.5.2 Controlling flow next to floats
-    clear = validated_property('clear', choices=CLEAR_CHOICES, initial=None)
+    clear = validated_property('clear', choices=CLEAR_CHOICES, initial=None, invalidates=INVALIDATES_LAYOUT)
 
     # 9.9 Layered Presentation
-    z_index = validated_property('z_index', choices=Z_INDEX_CHOICES, initial=AUTO)
+    z_index = validated_property('z_index', choices=Z_INDEX_CHOICES, initial=AUTO, invalidates=INVALIDATES_PAINT)
 
     # 9.10 Text Direction
-    direction = validated_property('direction', choices=DIRECTION_CHOICES, initial=LTR)
-    unicode_bidi = validated_property('unicode_bidi', choices=UNICODE_BIDI_CHOICES, initial=NORMAL)
+    direction = validated_property('direction', choices=DIRECTION_CHOICES, initial=LTR, inherited=True,
+                                   invalidates=INVALIDATES_LAYOUT)
+    unicode_bidi = validated_property('unicode_bidi', choices=UNICODE_BIDI_CHOICES, initial=NORMAL,
+                                      invalidates=INVALIDATES_LAYOUT)
 
     # 10. Visual formatting model details ################################
     # 10.2 Content width
-    width = validated_property('width', choices=SIZE_CHOICES, initial=AUTO)
+    width = validated_property('width', choices=SIZE_CHOICES, initial=AUTO, invalidates=INVALIDATES_LAYOUT)
 
     # 10.4 Minimum and maximum width
     # Initial value updated by Flexbox 4.5
-    min_width = validated_property('min_width', choices=MIN_SIZE_CHOICES, initial=AUTO)
-    max_width = validated_property('max_width', choices=MAX_SIZE_CHOICES, initial=None)
+    min_width = validated_property('min_width', choices=MIN_SIZE_CHOICES, initial=AUTO,
+                                   invalidates=INVALIDATES_LAYOUT)
+    max_width = validated_property('max_width', choices=MAX_SIZE_CHOICES, initial=None,
+                                   invalidates=INVALIDATES_LAYOUT)
 
     # 10.5 Content height
-    height = validated_property('height', choices=SIZE_CHOICES, initial=AUTO)
+    height = validated_property('height', choices=SIZE_CHOICES, initial=AUTO, invalidates=INVALIDATES_LAYOUT)
 
     # 10.7 Minimum and maximum heights
     # Initial value updated by Flexbox 4.5
-    min_height = validated_property('min_height', choices=MIN_SIZE_CHOICES, initial=AUTO)
-    max_height = validated_property('max_height', choices=MAX_SIZE_CHOICES, initial=None)
+    min_height = validated_property('min_height', choices=MIN_SIZE_CHOICES, initial=AUTO,
+                                    invalidates=INVALIDATES_LAYOUT)
+    max_height = validated_property('max_height', choices=MAX_SIZE_CHOICES, initial=None,
+                                    invalidates=INVALIDATES_LAYOUT)
 
     # 10.8 Leading and half-leading
     # line_height
@@ -373,20 +465,23 @@ class CSS:
 
     # 11. Visual effects #################################################
     # 11.1.1 Overflow
-    overflow = validated_property('overflow', choices=OVERFLOW_CHOICES, initial=VISIBLE)
+    overflow = validated_property('overflow', choices=OVERFLOW_CHOICES, initial=VISIBLE,
+                                  invalidates=INVALIDATES_LAYOUT)
 
     # 11.1.2 Clip
-    clip = validated_property('clip', choices=CLIP_CHOICES, initial=AUTO)
+    clip = validated_property('clip', choices=CLIP_CHOICES, initial=AUTO, invalidates=INVALIDATES_PAINT)
 
     # 11.2 Visibility
-    visibility = validated_property('visibility', choices=VISIBILITY_CHOICES, initial=VISIBLE)
+    visibility = validated_property('visibility', choices=VISIBILITY_CHOICES, initial=VISIBLE, inherited=True,
+                                    invalidates=INVALIDATES_PAINT)
 
     # 12. Visual effects #################################################
     # 12.2 The content property
     # content
 
     # 12.3 Quotation marks
-    quotes = validated_property('quotes', choices=QUOTES_CHOICES, initial=INITIAL)  # TODO: Depends on user agent
+    quotes = validated_property('quotes', choices=QUOTES_CHOICES, initial=INITIAL,  # TODO: Depends on user agent
+                                inherited=True, invalidates=INVALIDATES_LAYOUT)
 
     # 12.4 Automatic counters and numbering
     # counter-reset
@@ -400,20 +495,27 @@ class CSS:
 
     # 13. Paged media ####################################################
     # 13.3.1 Page break properties
-    page_break_before = validated_property('page_break_before', choices=PAGE_BREAK_BEFORE_CHOICES, initial=AUTO)
-    page_break_after = validated_property('page_break_after', choices=PAGE_BREAK_AFTER_CHOICES, initial=AUTO)
-    page_break_inside = validated_property('page_break_inside', choices=PAGE_BREAK_INSIDE_CHOICES, initial=AUTO)
+    page_break_before = validated_property('page_break_before', choices=PAGE_BREAK_BEFORE_CHOICES, initial=AUTO,
+                                           invalidates=INVALIDATES_NOTHING)
+    page_break_after = validated_property('page_break_after', choices=PAGE_BREAK_AFTER_CHOICES, initial=AUTO,
+                                          invalidates=INVALIDATES_NOTHING)
+    page_break_inside = validated_property('page_break_inside', choices=PAGE_BREAK_INSIDE_CHOICES, initial=AUTO,
+                                           invalidates=INVALIDATES_NOTHING)
 
     # 13.3.2 Breaks inside elements
-    orphans = validated_property('orphans', choices=ORPHANS_CHOICES, initial=2)
-    widows = validated_property('widows', choices=WIDOWS_CHOICES, initial=2)
+    orphans = validated_property('orphans', choices=ORPHANS_CHOICES, initial=2, inherited=True,
+                                 invalidates=INVALIDATES_NOTHING)
+    widows = validated_property('widows', choices=WIDOWS_CHOICES, initial=2, inherited=True,
+                                invalidates=INVALIDATES_NOTHING)
 
     # 14. Colors and backgrounds #########################################
     # 14.1 Foreground color
-    color = validated_property('color', choices=COLOR_CHOICES, initial=default)
+    color = validated_property('color', choices=COLOR_CHOICES, initial=default, inherited=True,
+                               invalidates=INVALIDATES_PAINT)
 
     # 14.2.1 Background properties
-    background_color = validated_property('background_color', choices=BACKGROUND_COLOR_CHOICES, initial=default)
+    background_color = validated_property('background_color', choices=BACKGROUND_COLOR_CHOICES, initial=default,
+                                          invalidates=INVALIDATES_PAINT)
     # background_image
     # background_repeat
     # background_attachment
@@ -441,45 +543,60 @@ class CSS:
 
     # 16. Text ###########################################################
     # 16.1 Indentation
-    text_indent = validated_property('text_indent', choices=TEXT_INDENT_CHOICES, initial=0)
+    text_indent = validated_property('text_indent', choices=TEXT_INDENT_CHOICES, initial=0, inherited=True,
+                                     invalidates=INVALIDATES_LAYOUT)
 
     # 16.2 Alignment
     text_align = validated_property('text_align', choices=TEXT_ALIGN_CHOICES,
-                                    initial=TextAlignInitialValue())
+                                    initial=TextAlignInitialValue(), inherited=True, invalidates=INVALIDATES_LAYOUT)
 
     # 16.3 Decoration
-    text_decoration = validated_property('text_decoration', choices=TEXT_DECORATION_CHOICES, initial=None)
+    text_decoration = validated_property('text_decoration', choices=TEXT_DECORATION_CHOICES, initial=None,
+                                         invalidates=INVALIDATES_PAINT)
 
     # 16.4 Letter and word spacing
-    letter_spacing = validated_property('letter_spacing', choices=LETTER_SPACING_CHOICES, initial=NORMAL)
-    word_spacing = validated_property('word_spacing', choices=WORD_SPACING_CHOICES, initial=NORMAL)
+    letter_spacing = validated_property('letter_spacing', choices=LETTER_SPACING_CHOICES, initial=NORMAL,
+                                        inherited=True, invalidates=INVALIDATES_LAYOUT)
+    word_spacing = validated_property('word_spacing', choices=WORD_SPACING_CHOICES, initial=NORMAL, inherited=True,
+                                      invalidates=INVALIDATES_LAYOUT)
 
     # 16.5 Capitalization
-    text_transform = validated_property('text_transform', choices=TEXT_TRANSFORM_CHOICES, initial=None)
+    text_transform = validated_property('text_transform', choices=TEXT_TRANSFORM_CHOICES, initial=None, inherited=True,
+                                        invalidates=INVALIDATES_LAYOUT)
 
     # 16.6 White space
-    white_space = validated_property('white_space', choices=WHITE_SPACE_CHOICES, initial=NORMAL)
+    white_space = validated_property('white_space', choices=WHITE_SPACE_CHOICES, initial=NORMAL, inherited=True,
+                                     invalidates=INVALIDATES_LAYOUT)
 
     # 17. Tables #########################################################
     # 17.4.1 Caption position and alignment
-    caption_side = validated_property('caption_side', choices=CAPTION_SIDE_CHOICES, initial=TOP)
+    caption_side = validated_property('caption_side', choices=CAPTION_SIDE_CHOICES, initial=TOP, inherited=True,
+                                      invalidates=INVALIDATES_LAYOUT)
 
     # 17.5.2 Table width algorithms
-    table_layout = validated_property('table_layout', choices=TABLE_LAYOUT_CHOICES, initial=AUTO)
+    table_layout = validated_property('table_layout', choices=TABLE_LAYOUT_CHOICES, initial=AUTO,
+                                      invalidates=INVALIDATES_LAYOUT)
 
     # 17.6 Borders
-    border_collapse = validated_property('border_collapse', choices=BORDER_COLLAPSE_CHOICES, initial=SEPARATE)
-    border_spacing = validated_property('border_spacing', choices=BORDER_SPACING_CHOICES, initial=0)
-    empty_cells = validated_property('empty_cells', choices=EMPTY_CELLS_CHOICES, initial=SHOW)
+    border_collapse = validated_property('border_collapse', choices=BORDER_COLLAPSE_CHOICES, initial=SEPARATE,
+                                         inherited=True, invalidates=INVALIDATES_LAYOUT)
+    border_spacing = validated_property('border_spacing', choices=BORDER_SPACING_CHOICES, initial=0, inherited=True,
+                                        invalidates=INVALIDATES_LAYOUT)
+    empty_cells = validated_property('empty_cells', choices=EMPTY_CELLS_CHOICES, initial=SHOW, inherited=True,
+                                     invalidates=INVALIDATES_LAYOUT)
 
     # 18. User interface #################################################
     # 18.1 Cursors
-    cursor = validated_property('cursor', CURSOR_CHOICES, initial=AUTO)
+    cursor = validated_property('cursor', CURSOR_CHOICES, initial=AUTO, inherited=True,
+                                invalidates=INVALIDATES_NOTHING)
 
     # 18.4 Dynamic outlines
-    outline_width = validated_property('outline_width', choices=OUTLINE_WIDTH_CHOICES, initial=MEDIUM)
-    outline_style = validated_property('outline_style', choices=OUTLINE_STYLE_CHOICES, initial=None)
-    outline_color = validated_property('outline_color', choices=OUTLINE_COLOR_CHOICES, initial=INVERT)
+    outline_width = validated_property('outline_width', choices=OUTLINE_WIDTH_CHOICES, initial=MEDIUM,
+                                       invalidates=INVALIDATES_PAINT)
+    outline_style = validated_property('outline_style', choices=OUTLINE_STYLE_CHOICES, initial=None,
+                                       invalidates=INVALIDATES_PAINT)
+    outline_color = validated_property('outline_color', choices=OUTLINE_COLOR_CHOICES, initial=INVERT,
+                                       invalidates=INVALIDATES_PAINT)
     outline = validated_shorthand_property('outline', parser=parser.outline, wrapper=Outline)
 
     ######################################################################
@@ -488,36 +605,45 @@ class CSS:
 
     # 5. Ordering and orientation ########################################
     # 5.1 Flex flow direction
-    # flex_direction = validated_property('flex_direction', choices=FLEX_DIRECTION_CHOICES, initial=ROW)
+    flex_direction = validated_property('flex_direction', choices=FLEX_DIRECTION_CHOICES, initial=ROW,
+                                        invalidates=INVALIDATES_LAYOUT)
 
     # 5.2 Flex line wrapping
-    # flex_wrap = validated_property('flex_wrap', choices=FLEX_WRAP_CHOICES, initial=NOWRAP)
+    flex_wrap = validated_property('flex_wrap', choices=FLEX_WRAP_CHOICES, initial=NOWRAP,
+                                   invalidates=INVALIDATES_LAYOUT)
 
     # 5.3 Flex direction and wrap
     # flex_flow =
 
     # 5.4 Display order
-    # order = validated_property('order', choices=ORDER_CHOICES, initial=0)
+    order = validated_property('order', choices=ORDER_CHOICES, initial=0, invalidates=INVALIDATES_LAYOUT)
 
     # 7. Flexibility #####################################################
     # 7.2 Components of flexibility
-    # flex_grow = validated_property('flex_grow', choices=FLEX_GROW_CHOICES, initial=0)
-    # flex_shrink = validated_property('flex_shrink', choices=FLEX_SHRINK_CHOICES, initial=1)
-    # flex_basis = validated_property('flex_basis', choices=FLEX_BASIS_CHOICES, initial=AUTO)
+    flex_grow = validated_property('flex_grow', choices=FLEX_GROW_CHOICES, initial=0,
+                                   invalidates=INVALIDATES_LAYOUT)
+    flex_shrink = validated_property('flex_shrink', choices=FLEX_SHRINK_CHOICES, initial=1,
+                                     invalidates=INVALIDATES_LAYOUT)
+    flex_basis = validated_property('flex_basis', choices=FLEX_BASIS_CHOICES, initial=AUTO,
+                                    invalidates=INVALIDATES_LAYOUT)
 
     # 7.1 The 'flex' shorthand
     # flex =
 
     # 8. Alignment #######################################################
     # 8.2 Axis alignment
-    # justify_content = validated_property('justify_content', choices=JUSTIFY_CONTENT_CHOICES, initial=FLEX_START)
+    justify_content = validated_property('justify_content', choices=JUSTIFY_CONTENT_CHOICES, initial=FLEX_START,
+                                         invalidates=INVALIDATES_LAYOUT)
 
     # 8.3 Cros-axis alignment
-    # align_items = validated_property('align_items', choices=ALIGN_ITEMS_CHOICES, initial=STRETCH)
-    # align_self = validated_property('align_self', choices=ALIGN_SELF_CHOICES, initial=AUTO)
+    align_items = validated_property('align_items', choices=ALIGN_ITEMS_CHOICES, initial=STRETCH,
+                                     invalidates=INVALIDATES_LAYOUT)
+    align_self = validated_property('align_self', choices=ALIGN_SELF_CHOICES, initial=AUTO,
+                                    invalidates=INVALIDATES_LAYOUT)
 
     # 8.4 Packing flex lines
-    # align_content = validated_property('align_content', choices=ALIGN_CONTENT_CHOICES, initial=STRETCH)
+    align_content = validated_property('align_content', choices=ALIGN_CONTENT_CHOICES, initial=STRETCH,
+                                       invalidates=INVALIDATES_LAYOUT)
 
     ######################################################################
     # Grid properties
@@ -571,9 +697,107 @@ class CSS:
 
     @dirty.setter
     def dirty(self, value):
-        if self._node:
+        if value:
+            self.invalidate(INVALIDATES_SUBTREE)
+        elif self._node:
             self._node.layout.dirty = value
 
+    def invalidate(self, change):
+        """Record a change to the value of a property.
+
+        `change` is the work invalidated by the change; see INVALIDATES_*.
+        A change that only requires the node to be repainted doesn't
+        invalidate the layout of the node.
+        """
+        # The computed style must be re-evaluated. The previous computed
+        # style is retained, so the change can be classified; see compute().
+        if self.computed is not None:
+            self._previous_computed = self.computed
+        self.computed = None
+        self._fingerprint = None
+        if self._node:
+            css_engine.invalidate(self._node, change)
+
+            parent = self._node.parent
+            while parent is not None and not parent.style.changed_descendants:
+                parent.style.changed_descendants = True
+                parent = parent.parent
+
+    ######################################################################
+    # Computed style
+    ######################################################################
+    @property
+    def fingerprint(self):
+        """A hashable summary of the values specified by the declaration.
+
+        Declarations that specify the same values have equal fingerprints.
+        """
+        if self._fingerprint is None:
+            self._fingerprint = tuple(sorted(
+                (name[1:], value)
+                for name, value in self.__dict__.items()
+                if name[1:] in _CSS_LONGHAND_PROPERTIES
+            ))
+        return self._fingerprint
+
+    def compute(self, parent=None):
+        """Evaluate the computed style of the declaration.
+
+        `parent` is the computed style of the parent node, or None if
+        the declaration belongs to the root node. Declarations with the
+        same fingerprint and parent share a computed style instance.
+
+        Returns the work invalidated by changes to the computed values
+        since the last evaluation (see INVALIDATES_*); this is
+        INVALIDATES_NOTHING (i.e., False) if no computed value has changed.
+        """
+        if self.computed is not None:
+            if self._computed_parent is parent:
+                return INVALIDATES_NOTHING
+
+            # If the values the parent passes on by inheritance haven't
+            # changed, neither has the computed style (unless a value is
+            # explicitly inherited).
+            if (parent is not None
+                    and self._computed_parent is not None
+                    and parent.inherited == self._computed_parent.inherited
+                    and not self.computed.explicitly_inherited):
+                self._computed_parent = parent
+                return INVALIDATES_NOTHING
+
+        key = (parent, self.fingerprint)
+        try:
+            computed = _COMPUTED_STYLES.get(key)
+        except TypeError:
+            # The declaration contains a value that can't be hashed.
+            key = None
+            computed = None
+
+        if computed is None:
+            computed = ComputedStyle.evaluate(self.fingerprint, parent)
+            if key is not None:
+                _COMPUTED_STYLES[key] = computed
+
+        previous = self.computed if self.computed is not None else self._previous_computed
+        self.computed = computed
+        self._computed_parent = parent
+        self._previous_computed = None
+
+        if previous is None:
+            return INVALIDATES_SUBTREE
+        elif previous is computed:
+            return INVALIDATES_NOTHING
+
+        previous = previous.__dict__
+        return max(
+            (
+                _CSS_INVALIDATIONS[name]
+                for name, value in computed.__dict__.items()
+                if value is not previous[name] and value != previous[name]
+            ),
+            default=INVALIDATES_NOTHING
+        )
+
     ######################################################################
     # Obtain the layout module
     ######################################################################
@@ -584,26 +808,61 @@ class CSS:
     # Provide a dict-like interface
     ######################################################################
     def update(self, **styles):
-        "Set multiple styles on the CSS definition."
+        """Set multiple styles on the CSS definition.
+
+        The styles are applied as a single change; if any style is invalid,
+        none of the styles are applied. The node is invalidated once,
+        if any value has changed.
+        """
+        changes = []
         for name, value in styles.items():
             name = name.replace('-', '_')
             if name not in _CSS_PROPERTIES:
                 raise NameError("Unknown CSS style '%s'" % name)
+            changes.append((name, value))
 
-            if value is None:
-                delattr(self, name)
-            else:
-                setattr(self, name, value)
+        state = dict(self.__dict__)
+        # Detach the declaration from the node while the styles are
+        # applied, so the node isn't marked dirty by each change.
+        self._node = None
+        try:
+            for name, value in changes:
+                if value is None:
+                    delattr(self, name)
+                else:
+                    setattr(self, name, value)
+        except Exception:
+            self.__dict__.clear()
+            self.__dict__.update(state)
+            raise
+
+        self._node = state['_node']
+        changed = [
+            _CSS_INVALIDATIONS[name[1:]]
+            for name in set(self.__dict__).union(state)
+            if name[1:] in _CSS_LONGHAND_PROPERTIES
+            and self.__dict__.get(name, _UNSET) != state.get(name, _UNSET)
+        ]
+        if changed:
+            self.invalidate(max(changed))
+        else:
+            # Nothing has changed, so the computed style is still valid.
+            self.computed = state['computed']
+            self._computed_parent = state['_computed_parent']
+            self._previous_computed = state['_previous_computed']
+            self._fingerprint = state['_fingerprint']
 
     def copy(self, node=None):
         "Create a duplicate of this style declaration."
         dup = CSS()
         dup._node = node
-        for style in _CSS_PROPERTIES:
-            try:
-                setattr(dup, style, getattr(self, '_%s' % style))
-            except AttributeError:
-                pass
+        # The values have already been validated, so they can be copied
+        # directly; the duplicate also shares the computed style.
+        for name, value in self.fingerprint:
+            dup.__dict__['_%s' % name] = value
+        dup._fingerprint = self._fingerprint
+        dup.computed = self.computed
+        dup._computed_parent = self._computed_parent
         return dup
 
     def __getitem__(self, name):
@@ -663,3 +922,91 @@ class CSS:
             "%s: %s" % (name, value)
             for name, value in sorted(non_default)
         )
+
+
+# The longhand properties of a CSS declaration, and their initial values.
+# Shorthand and directional properties are stored as the longhand
+# properties they represent.
+_CSS_LONGHAND_PROPERTIES = dict(_CSS_INITIAL_VALUES)
+
+# Initial values that are computed from the values of other properties.
+_CSS_DEFERRED_INITIAL_VALUES = {
+    name: initial
+    for name, initial in _CSS_LONGHAND_PROPERTIES.items()
+    if hasattr(initial, 'value')
+}
+
+
+# The inherited properties, in a stable order.
+_CSS_INHERITED = tuple(sorted(_CSS_INHERITED_PROPERTIES))
+
+# Computed styles, keyed by the computed style of the parent and the
+# fingerprint of the declaration. A computed style is discarded once
+# no declaration uses it.
+_COMPUTED_STYLES = WeakValueDictionary()
+
+
+class ComputedStyle:
+    """The computed value of every longhand CSS property of a node.
+
+    Inheritance, initial values and references to other properties have
+    all been resolved, so every value is a plain attribute. Computed styles
+    are immutable, so nodes with the same style can share an instance.
+
+    `inherited` holds the values of the inherited properties, in the
+    order of _CSS_INHERITED; two computed styles with equal `inherited`
+    values pass on the same values to their children. `explicitly_inherited`
+    is True if the style was evaluated from a declaration that explicitly
+    inherits a value.
+    """
+    __slots__ = ('__dict__', '__weakref__', 'inherited', 'explicitly_inherited')
+
+    def __init__(self, values):
+        self.__dict__.update(values)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Computed styles can't be modified")
+
+    def __delattr__(self, name):
+        raise AttributeError("Computed styles can't be modified")
+
+    def __repr__(self):
+        return '<ComputedStyle {}>'.format(id(self))
+
+    @classmethod
+    def evaluate(cls, specified, parent=None):
+        """Compute a style from a sequence of specified (name, value) pairs,
+        such as the fingerprint of a declaration.
+
+        `parent` is the computed style of the parent node, or None at the root.
+        """
+        values = dict(_CSS_LONGHAND_PROPERTIES)
+        deferred = dict(_CSS_DEFERRED_INITIAL_VALUES)
+
+        if parent is not None:
+            for name, value in zip(_CSS_INHERITED, parent.inherited):
+                values[name] = value
+                deferred.pop(name, None)
+
+        explicitly_inherited = False
+        for name, value in specified:
+            if value == INHERIT:
+                explicitly_inherited = True
+                if parent is None:
+                    # The root has nothing to inherit from; use the initial value.
+                    continue
+                value = getattr(parent, name)
+            values[name] = value
+            deferred.pop(name, None)
+
+        style = cls(values)
+
+        # Resolve initial values that depend on other properties (e.g.,
+        # border colors default to the color); the values they depend on
+        # have been computed.
+        for name, initial in deferred.items():
+            style.__dict__[name] = initial.value(style)
+
+        object.__setattr__(style, 'inherited', tuple(style.__dict__[name] for name in _CSS_INHERITED))
+        object.__setattr__(style, 'explicitly_inherited', explicitly_inherited)
+        return style
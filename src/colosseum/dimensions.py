@@ -12,7 +12,21 @@ class Size:
     exact_height: If True, the height is exact. If False,
         the height is the minimum allowed width.
     ratio: The height between height and width. width = height * ratio
+    text: The run of text displayed by the node, or None. The width and
+        height of a run of text are measured by the font metrics provider
+        passed to layout().
     """
+    __slots__ = (
+        '_node',
+        '_width',
+        '_height',
+        '_exact_width',
+        '_exact_height',
+        '_ratio',
+        '_is_replaced',
+        '_text',
+    )
+
     def __init__(self, node):
         self._node = node
         self._width = None
@@ -22,6 +36,7 @@ class Size:
 
         self._ratio = None
         self._is_replaced = False
+        self._text = None
 
     @property
     def dirty(self):
@@ -91,6 +106,16 @@ class Size:
             self._is_replaced = value
             self.dirty = True
 
+    @property
+    def text(self):
+        return self._text
+
+    @text.setter
+    def text(self, value):
+        if self._text != value:
+            self._text = value
+            self.dirty = True
+
 
 class Box:
     """Describe the layout of a box displaying a node in the DOM.
@@ -108,6 +133,15 @@ class Box:
     origin_top: The absolute position of the top of the block container
     origin_left: The absolute position of the left of the block container
 
+    The origin of a box is not stored; it is computed when it is required
+    from the position of the box's ancestors, and cached until the position
+    of any box changes. Only the origin of a box without a parent box is
+    stored.
+
+    The parent box of a box is the box of the `parent` of its node. If the
+    node has no `parent`, it is the box of the node that lists the node in
+    its `children` when the position of that box last changed.
+
     margin_top: The top margin of the box
     margin_right: The right margin of the box
     margin_bottom: The bottom margin of the box
@@ -160,9 +194,142 @@ class Box:
     absolute_content_bottom: The bottom position of the box, relative to the block container
     absolute_content_right: The right position of the box, relative to the block container
 
+    Box tree
+    ~~~~~~~~
+    box_children: The children of the box in the box tree, if the box has
+        block-level children: the child nodes, with each run of inline-level
+        children wrapped in an anonymous block box. None if the box tree
+        hasn't been built.
+    box_tree_stale: True if the children of the node (or their display)
+        may have changed, so the box tree must be rebuilt. The anonymous
+        block boxes of the stale tree are reused by the new tree.
+    anonymous_parent: The box of the anonymous block box that contains
+        this box, or None if the box is contained by the box of its parent node.
+    parent_box: The box containing this box, for a node that has no
+        `parent`; None if the node has a `parent`, or is the root.
+    layout_kind: The code describing how the width and height of the box are
+        calculated (see engine.layout_kind()), or None if it must be re-evaluated.
+    formatting_context: The code describing the formatting context the box
+        establishes for its children (see engine.formatting_context()), or
+        None if it must be re-evaluated.
+    lines: The line boxes of a box that establishes an inline formatting
+        context: a list of (first child, last child + 1, top, height) for
+        each line, where children are indices into the children of the node.
+        None if the children must be broken into lines again.
+    line_inputs: The (content width, white-space, text-align) of the box
+        when its children were broken into lines.
+    text_inputs: The ((font, letter spacing, word spacing), text) with
+        which the intrinsic size of the node was last measured.
+    flex_lines: The flex lines of a flex container: a list of (first item,
+        last item + 1, main size, cross start, cross size) for each line,
+        where items are indices into the items in order-modified document
+        order. None if the box hasn't been laid out as a flex container.
+    flex_sizes: The (container main size, flex base size, hypothetical main
+        size, main axis margin, border and padding) of a flex item, retained
+        until the item or the main size of its container changes.
+    flex_main_size: The width of a flex item in a row, resolved by its flex
+        container; None if the item isn't in a row.
+    flex_content_height: The content height of a flex item, before its flex
+        container flexed or stretched it.
+
+    Layout cache
+    ~~~~~~~~~~~~
+    containing_size: The (width, height) of the containing block's content box
+        when this box was last laid out.
+    flow_top: The top position of the content box produced by the box's own
+        layout, before any offset applied by the block container.
+    offset_top: The vertical relative offset applied to the box.
+    offset_left: The horizontal relative offset applied to the box.
+    dirty_descendants: True if the layout of a descendant of this box is dirty.
+    offset_dirty: True if the relative offset of the box must be re-evaluated;
+        the rest of the layout of the box is still valid.
+    update_descendants: True if a descendant of this box must be updated,
+        although the layout of this box is still valid; i.e., the offset of
+        a descendant is dirty, or the layout inside a descendant that is a
+        layout containment boundary is dirty.
+    contains_layout: True if the box is a layout containment boundary; the
+        layout of its descendants can't affect the layout of any box outside
+        it, other than through the margin collapsing through its top.
+    paint_dirty: True if the box must be repainted. The layout of a box that
+        only needs to be repainted is still valid. A renderer clears this
+        flag once the box has been painted.
+
     """
+    # Boxes are created for every node in a document, so
+    # avoid the overhead of a per-instance __dict__.
+    __slots__ = (
+        'node',
+        'box_children',
+        'box_tree_stale',
+        'anonymous_parent',
+        'parent_box',
+        'layout_kind',
+        'formatting_context',
+        'lines',
+        'line_inputs',
+        'text_inputs',
+        'flex_lines',
+        'flex_sizes',
+        'flex_main_size',
+        'flex_content_height',
+        'visible',
+        'content_width',
+        'content_height',
+        '_content_top',
+        '_content_left',
+        '__origin_top',
+        '__origin_left',
+        '_cached_origin_top',
+        '_cached_origin_left',
+        '_cached_generation',
+        '_margin_top',
+        '_margin_right',
+        '_margin_bottom',
+        '_margin_left',
+        '_collapse_top',
+        '_collapse_right',
+        '_collapse_bottom',
+        '_collapse_left',
+        'border_top_width',
+        'border_right_width',
+        'border_bottom_width',
+        'border_left_width',
+        'padding_top',
+        'padding_right',
+        'padding_bottom',
+        'padding_left',
+        '_dirty',
+        'dirty_descendants',
+        'offset_dirty',
+        'update_descendants',
+        'contains_layout',
+        'paint_dirty',
+        'containing_size',
+        'flow_top',
+        'offset_top',
+        'offset_left',
+    )
+
+    # A counter that is incremented whenever the position of any box
+    # changes. Cached origins from an earlier generation are stale.
+    _generation = 0
+
     def __init__(self, node):
         self.node = node
+        # The box tree persists between layouts.
+        self.box_children = None
+        self.box_tree_stale = False
+        self.anonymous_parent = None
+        self.parent_box = None
+        self.layout_kind = None
+        self.formatting_context = None
+        self.lines = None
+        self.line_inputs = None
+        self.text_inputs = None
+        self.flex_lines = None
+        self.flex_sizes = None
+        self.flex_main_size = None
+        self.flex_content_height = None
         self._reset()
 
     def __repr__(self):
@@ -180,6 +347,14 @@ class Box:
     #     ])
 
     def _reset(self):
+        self.reset_box()
+
+        # The origin of the box, used if the box has no parent box.
+        self.__origin_top = 0
+        self.__origin_left = 0
+
+    def reset_box(self):
+        "Reset the layout of this box, but not the layout of its descendants."
         # Some properties describing whether this node exists in
         # layout *at all*.
         self.visible = True
@@ -195,10 +370,12 @@ class Box:
         self._content_top = 0
         self._content_left = 0
 
-        # Set and initial value for the origin that is
-        # guaranteed to be != any actual value
-        self.__origin_top = None
-        self.__origin_left = None
+        # The absolute origin of the box, and the generation
+        # of box positions for which that origin is valid.
+        self._cached_origin_top = 0
+        self._cached_origin_left = 0
+        self._cached_generation = None
+        Box._generation += 1
 
         # Margins of the box
         self._margin_top = 0
@@ -226,44 +403,133 @@ class Box:
 
         # Current state of layout calculations
         self._dirty = True
-
-        # Set the origin via properties; this forces the calculation of
-        # absolute positions.
-        self._origin_top = 0
-        self._origin_left = 0
+        self.dirty_descendants = False
+        self.offset_dirty = False
+        self.update_descendants = False
+        self.contains_layout = False
+        self.paint_dirty = True
+
+        # The inputs and results of the last layout of this box
+        self.containing_size = None
+        self.flow_top = 0
+        self.offset_top = 0
+        self.offset_left = 0
 
     def reset(self):
-        self._reset()
-        for child in self.node.children:
-            if child.layout:
-                child.layout.reset()
+        "Reset the layout of this box, and the layout of its descendants."
+        stack = [self]
+        while stack:
+            box = stack.pop()
+            box._reset()
+            for child in box.node.children:
+                if child.layout:
+                    stack.append(child.layout)
+            if box.box_children is not None:
+                # The anonymous boxes of the box tree aren't children of
+                # the node; their own children are.
+                for child in box.box_children:
+                    if child.layout:
+                        child.layout._reset()
 
     ######################################################################
     # Origin handling
     ######################################################################
+    def _update_origin(self):
+        "Compute the origin of this box, and any ancestor with a stale origin."
+        generation = Box._generation
+
+        # Walk up the box tree, until a box with a known origin is found.
+        stale = []
+        box = self
+        while True:
+            stale.append(box)
+            if box.anonymous_parent is not None:
+                box = box.anonymous_parent
+            else:
+                parent = box.node.parent
+                if parent is not None and parent.layout is not None:
+                    box = parent.layout
+                elif parent is None and box.parent_box is not None:
+                    box = box.parent_box
+                else:
+                    origin_top = box.__origin_top
+                    origin_left = box.__origin_left
+                    break
+
+            if box._cached_generation == generation:
+                origin_top = box._cached_origin_top + box._content_top
+                origin_left = box._cached_origin_left + box._content_left
+                break
+
+        # Then walk back down the tree, computing each origin in turn.
+        for box in reversed(stale):
+            box._cached_origin_top = origin_top
+            box._cached_origin_left = origin_left
+            box._cached_generation = generation
+            origin_top += box._content_top
+            origin_left += box._content_left
+
+    def _link_descendants(self):
+        """Record this box as the parent box of any child that has no `parent`.
+
+        The descendants of those children are linked in the same way, as
+        moving this box moves them all.
+        """
+        stack = [self]
+        while stack:
+            box = stack.pop()
+            for child in box.node.children:
+                if child.parent is None and child.layout:
+                    if child.layout.parent_box is not box:
+                        child.layout.parent_box = box
+                        Box._generation += 1
+                    stack.append(child.layout)
+
     @property
     def _origin_top(self):
-        return self.__origin_top
+        if self._cached_generation != Box._generation:
+            self._update_origin()
+        return self._cached_origin_top
 
     @_origin_top.setter
     def _origin_top(self, value):
         if value != self.__origin_top:
             self.__origin_top = value
-            for child in self.node.children:
-                if child.layout:
-                    child.layout._origin_top = self.absolute_content_top
+            Box._generation += 1
+            children = self.node.children
+            if children and children[0].parent is None:
+                self._link_descendants()
 
     @property
     def _origin_left(self):
-        return self.__origin_left
+        if self._cached_generation != Box._generation:
+            self._update_origin()
+        return self._cached_origin_left
 
     @_origin_left.setter
     def _origin_left(self, value):
         if value != self.__origin_left:
             self.__origin_left = value
-            for child in self.node.children:
-                if child.layout:
-                    child.layout._origin_left = self.absolute_content_left
+            Box._generation += 1
+            children = self.node.children
+            if children and children[0].parent is None:
+                self._link_descendants()
+
+    @property
+    def origin_top(self):
+        return self._origin_top
+
+    @origin_top.setter
+    def origin_top(self, value):
+        self._origin_top = value
+
+    @property
+    def origin_left(self):
+        return self._origin_left
+
+    @origin_left.setter
+    def origin_left(self, value):
+        self._origin_left = value
 
     ######################################################################
     # Core properties
@@ -276,9 +542,10 @@ class Box:
     def content_top(self, value):
         if value != self._content_top:
             self._content_top = value
-            for child in self.node.children:
-                if child.layout:
-                    child.layout._origin_top = self.absolute_content_top
+            Box._generation += 1
+            children = self.node.children
+            if children and children[0].parent is None:
+                self._link_descendants()
 
     @property
     def content_left(self):
@@ -288,9 +555,10 @@ class Box:
     def content_left(self, value):
         if value != self._content_left:
             self._content_left = value
-            for child in self.node.children:
-                if child.layout:
-                    child.layout._origin_left = self.absolute_content_left
+            Box._generation += 1
+            children = self.node.children
+            if children and children[0].parent is None:
+                self._link_descendants()
 
     @property
     def margin_top(self):
@@ -420,7 +688,7 @@ class Box:
     @property
     def absolute_border_box_top(self):
         return (
-            self.__origin_top + self._content_top
+            self._origin_top + self._content_top
             - self.padding_top
             - self.border_top_width
         )
@@ -428,7 +696,7 @@ class Box:
     @property
     def absolute_border_box_right(self):
         return (
-            self.__origin_left + self._content_left
+            self._origin_left + self._content_left
             + self.content_width
             + self.padding_right
             + self.border_right_width
@@ -437,7 +705,7 @@ class Box:
     @property
     def absolute_border_box_bottom(self):
         return (
-            self.__origin_top + self._content_top
+            self._origin_top + self._content_top
             + self.content_height
             + self.padding_bottom
             + self.border_bottom_width
@@ -446,7 +714,7 @@ class Box:
     @property
     def absolute_border_box_left(self):
         return (
-            self.__origin_left + self._content_left
+            self._origin_left + self._content_left
             - self.padding_left
             - self.border_left_width
         )
@@ -480,19 +748,19 @@ class Box:
 
     @property
     def absolute_padding_box_top(self):
-        return self.__origin_top + self._content_top - self.padding_top
+        return self._origin_top + self._content_top - self.padding_top
 
     @property
     def absolute_padding_box_right(self):
-        return self.__origin_left + self._content_left + self.content_width + self.padding_right
+        return self._origin_left + self._content_left + self.content_width + self.padding_right
 
     @property
     def absolute_padding_box_bottom(self):
-        return self.__origin_top + self._content_top + self.content_height + self.padding_bottom
+        return self._origin_top + self._content_top + self.content_height + self.padding_bottom
 
     @property
     def absolute_padding_box_left(self):
-        return self.__origin_left + self._content_left - self.padding_left
+        return self._origin_left + self._content_left - self.padding_left
 
     ######################################################################
     # Content box dimensions
@@ -507,19 +775,19 @@ class Box:
 
     @property
     def absolute_content_top(self):
-        return self.__origin_top + self._content_top
+        return self._origin_top + self._content_top
 
     @property
     def absolute_content_right(self):
-        return self.__origin_left + self._content_left + self.content_width
+        return self._origin_left + self._content_left + self.content_width
 
     @property
     def absolute_content_bottom(self):
-        return self.__origin_top + self._content_top + self.content_height
+        return self._origin_top + self._content_top + self.content_height
 
     @property
     def absolute_content_left(self):
-        return self.__origin_left + self._content_left
+        return self._origin_left + self._content_left
 
     ######################################################################
     # Layout dirtiness tracking.
@@ -534,8 +802,70 @@ class Box:
 
     @dirty.setter
     def dirty(self, value):
+        if value:
+            # The node, or its children, may have changed,
+            # so the box must be classified again.
+            self.layout_kind = None
+            self.invalidate_box_tree()
+
         if value != self._dirty:
-            self._dirty = value
-            for child in self.node.children:
-                if child.layout:
-                    child.layout.dirty = value
+            # The value applies to every descendant; stop descending at
+            # any box that already has the value.
+            stack = [self]
+            while stack:
+                box = stack.pop()
+                box._dirty = value
+                for child in box.node.children:
+                    if child.layout and value != child.layout._dirty:
+                        stack.append(child.layout)
+
+            if value:
+                self._dirty_ancestors()
+
+    def invalidate_box_tree(self):
+        """Record that the children of the node (or their display) may
+        have changed, so the box tree must be rebuilt.
+        """
+        self.box_tree_stale = True
+        self.formatting_context = None
+        self.lines = None
+
+    def mark_dirty(self):
+        """Mark the layout of this box as dirty, without marking the
+        layout of its descendants as dirty.
+
+        The descendants are re-evaluated only if their containing block changes.
+        """
+        if self._dirty is not True:
+            self._dirty = True
+            self._dirty_ancestors()
+
+    def mark_offset_dirty(self):
+        """Mark the relative offset of this box as dirty.
+
+        A relative offset moves the box (and its descendants) without
+        affecting the layout of any other box, so the rest of the layout
+        is still valid.
+        """
+        if not self.offset_dirty:
+            self.offset_dirty = True
+            self._update_ancestors()
+
+    def _dirty_ancestors(self):
+        # The layout of every ancestor depends on the layout of this
+        # box, so ancestors must be told to re-evaluate their layout,
+        # up to the nearest layout containment boundary. The ancestors
+        # of the boundary only need to find the boundary.
+        parent = self.node.parent
+        while parent is not None and parent.layout and not parent.layout.dirty_descendants:
+            parent.layout.dirty_descendants = True
+            if parent.layout.contains_layout:
+                parent.layout._update_ancestors()
+                break
+            parent = parent.parent
+
+    def _update_ancestors(self):
+        parent = self.node.parent
+        while parent is not None and parent.layout and not parent.layout.update_descendants:
+            parent.layout.update_descendants = True
+            parent = parent.parent
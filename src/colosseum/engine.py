@@ -1,71 +1,121 @@
+from array import array
+from time import perf_counter
+
 from .constants import (
     ABSOLUTE,
     AUTO,
     BLOCK,
+    CENTER,
+    COLUMN_REVERSE,
+    CONTENT,
     FIXED,
+    FLEX,
+    FLEX_END,
     HTML5,
-    INHERIT,
     INLINE,
     INLINE_BLOCK,
+    INLINE_FLEX,
     INLINE_TABLE,
+    INVALIDATES_LAYOUT,
+    INVALIDATES_OFFSET,
+    INVALIDATES_PAINT,
+    INVALIDATES_SUBTREE,
     LIST_ITEM,
     LTR,
     MEDIUM,
+    NORMAL,
+    NOWRAP,
+    PRE_LINE,
+    PRE_WRAP,
     RELATIVE,
+    RIGHT,
+    ROW,
+    ROW_REVERSE,
+    SPACE_AROUND,
+    SPACE_BETWEEN,
+    STRETCH,
     TABLE,
     TABLE_CAPTION,
     TABLE_CELL,
     THICK,
     THIN,
+    VISIBLE,
+    WRAP_REVERSE,
+)
+from .dimensions import Box, Size
+from .fonts import Font
+from .instrumentation import (
+    ANONYMIZE, BOX_SIZES_CACHE, HEIGHT, MEASURE, RELATIVE_OFFSET, RESOLUTION_CACHE, SIZES,
+    STYLES, TEXT_CACHE, TOTAL, WIDTH, LayoutStats, export,
 )
-from .dimensions import Box
+from .units import Percent, ResolutionCache, em
 
 
 def is_block_level_element(node):
+    style = node.style.computed
     # 9.2.1 P1
     return (
-        node.style.display is BLOCK
-        or node.style.display is LIST_ITEM
-        or node.style.display is TABLE
+        style.display is BLOCK
+        or style.display is LIST_ITEM
+        or style.display is TABLE
+        or style.display is FLEX  # css-flexbox-1 3
     )
 
 
 def is_block_container(node):
+    style = node.style.computed
     # 9.2.1 P2
     return (
-        node.style.display is BLOCK
-        or node.style.display is LIST_ITEM
-        or node.style.display is INLINE_BLOCK
-        or node.style.display is TABLE_CELL
-        or node.style.display is TABLE_CAPTION  # 9.4.1 P1
+        style.display is BLOCK
+        or style.display is LIST_ITEM
+        or style.display is INLINE_BLOCK
+        or style.display is TABLE_CELL
+        or style.display is TABLE_CAPTION  # 9.4.1 P1
     ) and not node.intrinsic.is_replaced
 
 
 def is_inline_level_element(node):
+    style = node.style.computed
     # 9.2.2 P1
     return (
-        node.style.display is INLINE
-        or node.style.display is INLINE_TABLE
-        or node.style.display is INLINE_BLOCK
+        style.display is INLINE
+        or style.display is INLINE_TABLE
+        or style.display is INLINE_BLOCK
+        or style.display is INLINE_FLEX  # css-flexbox-1 3
     )
 
 
 def is_inline_block_element(node):
-    return node.style.display is INLINE_BLOCK
+    return node.style.computed.display is INLINE_BLOCK
 
 
 def is_inline_element(node):
-    return node.style.display is INLINE
+    return node.style.computed.display is INLINE
 
 
 def is_float_positioned_element(node):
-    return node.style.float is not None
+    return node.style.computed.float is not None
 
 
 def is_absolute_positioned_element(node):
+    style = node.style.computed
+    return (
+        style.position is ABSOLUTE
+        or style.position is FIXED
+    )
+
+
+def is_flex_container(node):
+    display = node.style.computed.display
+    return display is FLEX or display is INLINE_FLEX
+
+
+def is_flex_item(node):
+    # css-flexbox-1 4: each in-flow child of a flex container is a flex item.
     return (
-        node.style.position is ABSOLUTE
-        or node.style.position is FIXED
+        node.parent is not None
+        and is_flex_container(node.parent)
+        and not is_absolute_positioned_element(node)
     )
 
 
@@ -83,42 +133,296 @@ def establishes_table_formatting_context(node):
     return False  # TODO
 
 
+def establishes_layout_containment(node):
+    """Is the layout of the descendants of the node isolated from the layout
+    of every box outside the node?
+
+    The size of a block with a definite width and height, that doesn't
+    let its content overflow, doesn't depend on its content. The only
+    effect its content can have outside it is the top margin of its first
+    child, which collapses through the block; see update_retained().
+
+    The size of a flex item is resolved by its flex container, so a flex
+    item is never a boundary.
+    """
+    style = node.style.computed
+    return (
+        (style.display is BLOCK or style.display is LIST_ITEM)
+        and style.width is not AUTO
+        and style.height is not AUTO
+        and style.overflow is not VISIBLE
+        and style.float is None
+        and not is_absolute_positioned_element(node)
+        and not is_flex_item(node)
+    )
+
+
+# Layout kinds: the way the width and height of a box are calculated
+# (10.3 and 10.6). The kind of a replaced element is the kind of the
+# element, plus REPLACED.
+FLOATING_BOX = 0
+ABSOLUTE_POSITIONED_BOX = 2
+INLINE_BOX = 4
+BLOCK_LEVEL_BOX = 6
+INLINE_BLOCK_BOX = 8
+UNKNOWN_BOX = 10
+FLEX_ITEM_BOX = 12
+REPLACED = 1
+
+LAYOUT_KIND_NAMES = (
+    'float', 'float (replaced)',
+    'absolute', 'absolute (replaced)',
+    'inline', 'inline (replaced)',
+    'block', 'block (replaced)',
+    'inline-block', 'inline-block (replaced)',
+    'unknown', 'unknown (replaced)',
+    'flex item', 'flex item (replaced)',
+)
+
+# The formatting context a box establishes for its children.
+BLOCK_FORMATTING_CONTEXT = 0
+INLINE_FORMATTING_CONTEXT = 1
+TABLE_FORMATTING_CONTEXT = 2
+FLEX_FORMATTING_CONTEXT = 3
+
+
+def classify_layout(node):
+    "Evaluate the layout kind of the box of a node."
+    if is_flex_item(node):
+        kind = FLEX_ITEM_BOX
+    elif is_float_positioned_element(node):
+        kind = FLOATING_BOX
+    elif is_absolute_positioned_element(node):
+        kind = ABSOLUTE_POSITIONED_BOX
+    elif is_inline_element(node):
+        kind = INLINE_BOX
+    elif is_block_level_element(node):
+        kind = BLOCK_LEVEL_BOX
+    elif is_inline_block_element(node):
+        kind = INLINE_BLOCK_BOX
+    else:
+        kind = UNKNOWN_BOX
+
+    if node.intrinsic.is_replaced:
+        kind += REPLACED
+    return kind
+
+
+def classify_formatting_context(node):
+    "Evaluate the formatting context established by the box of a node."
+    if is_flex_container(node):
+        return FLEX_FORMATTING_CONTEXT
+    elif establishes_inline_formatting_context(node):
+        return INLINE_FORMATTING_CONTEXT
+    elif establishes_table_formatting_context(node):
+        return TABLE_FORMATTING_CONTEXT
+    else:
+        return BLOCK_FORMATTING_CONTEXT
+
+
+def layout_kind(node):
+    """The layout kind of the box of a node.
+
+    The kind is retained by the box until the display, position or float
+    of the node (or the display of its parent) changes.
+    """
+    kind = node.layout.layout_kind
+    if kind is None:
+        kind = node.layout.layout_kind = classify_layout(node)
+    return kind
+
+
+def formatting_context(node):
+    """The formatting context established by the box of a node.
+
+    The formatting context is retained by the box until the node,
+    its children, or the display of its children change.
+    """
+    context = node.layout.formatting_context
+    if context is None:
+        context = node.layout.formatting_context = classify_formatting_context(node)
+    return context
+
+
+# The pixel sizes of unit values, resolved during layout.
+# The `hits` and `misses` counters of the cache are cumulative;
+# call `resolution_cache.clear()` to reset them.
+resolution_cache = ResolutionCache()
+
+
 class Viewport:
     def __init__(self, display, root):
         self.display = display
         self.children = [root]
         self.layout = self.display
+        # The containment boundaries whose collapsed top margin was
+        # changed by an incremental layout; see update_retained().
+        self.collapsed = []
 
 
-class DummyFont:
+class RetainedContainingBlock:
+    "A containing block, with the size recorded by an earlier layout."
     def __init__(self, size):
-        self.size = size
+        self.layout = self
+        self.content_width, self.content_height = size
+
+
+def compute_styles(node, incremental=False):
+    """Evaluate the computed style of every node in the tree rooted at `node`.
+
+    Any node whose computed style has changed since the last evaluation
+    is invalidated; see invalidate().
+
+    If `incremental` is True, subtrees in which no style has changed,
+    and whose layout isn't dirty, aren't visited.
+    """
+    stack = [(node, None)]
+    while stack:
+        node, parent = stack.pop()
+        style = node.style
+        change = style.compute(parent)
+        if change:
+            invalidate(node, change)
+
+        box = node.layout
+        if (incremental
+                and not change
+                and not style.changed_descendants
+                and box is not None
+                and box.dirty is False
+                and not box.dirty_descendants
+                and not box.update_descendants):
+            continue
+
+        style.changed_descendants = False
+        computed = style.computed
+        for child in node.children:
+            stack.append((child, computed))
 
-    @property
-    def em(self):
-        return self.size
 
-    @property
-    def ex(self):
-        return 0.65 * self.size
+def invalidate(node, change):
+    """Invalidate the layout of a node after a change to its style.
 
-    @property
-    def ch(self):
-        return 0.71 * self.size
+    `change` is the work invalidated by the change; see INVALIDATES_*.
+    A change that only affects painting marks the box as needing to be
+    repainted, but leaves the layout of the box intact.
+    """
+    if change >= INVALIDATES_SUBTREE and node.parent is not None and node.parent.layout is not None:
+        # The box may now be wrapped in an anonymous box (or not),
+        # so the box tree of the parent must be rebuilt.
+        node.parent.layout.invalidate_box_tree()
+        if node.layout is None:
+            # The node wasn't displayed; only its parent can lay it out.
+            node.parent.layout.mark_dirty()
+
+    box = node.layout
+    if box is None:
+        return
 
+    if change >= INVALIDATES_SUBTREE:
+        box.dirty = True
+        if node.style.computed is not None and (box.flex_lines is not None) != is_flex_container(node):
+            # The children are now flex items (or are no longer flex items).
+            box.flex_lines = None
+            for child in node.children:
+                if child.layout is not None:
+                    child.layout.layout_kind = None
+    elif change >= INVALIDATES_LAYOUT:
+        box.mark_dirty()
+        # A percentage height is resolved against the height of the
+        # parent (10.5), which isn't part of the containing block size
+        # that decides whether the layout of a child can be retained.
+        for child in node.children:
+            if (child.layout is not None
+                    and child.style.computed is not None
+                    and isinstance(child.style.computed.height, Percent)):
+                child.layout.mark_dirty()
+    elif change >= INVALIDATES_OFFSET:
+        box.mark_offset_dirty()
+        parent = node.parent
+        if (parent is not None
+                and parent.layout is not None
+                and last_box_child(parent) is node
+                and node.style.computed is not None
+                and node.style.computed.position is RELATIVE
+                and parent.style.computed.height is AUTO):
+            # An automatic height is evaluated from the bottom of the last
+            # child, which includes its relative offset.
+            parent.layout.mark_dirty()
+
+    if change >= INVALIDATES_PAINT:
+        box.paint_dirty = True
+
+
+def layout(display, node, standard=HTML5, incremental=False, instrument=False, fonts=None):
+    """Lay out the node tree rooted at `node` on the given display.
+
+    If `incremental` is True, the layout of any subtree that isn't dirty,
+    has no dirty descendants, and whose containing block is the same size
+    as in the previous layout is retained; only the position of the subtree
+    is updated. Changes inside a layout containment boundary (see
+    establishes_layout_containment()) only cause the layout inside the
+    boundary to be re-evaluated. Changes to the structure of the node tree aren't tracked;
+    when a child is added or removed, the parent must be marked dirty.
+
+    If `instrument` is True (or a LayoutStats), statistics describing the
+    layout are collected, passed to any registered exporter, and returned
+    as a LayoutStats; see colosseum.instrumentation. Otherwise, returns None.
+
+    `fonts` is a FontMetrics (see colosseum.fonts), providing the fonts used
+    to resolve font-relative units, and measuring the intrinsic text of
+    any node; see measure_text().
+    """
+    if instrument:
+        stats = instrument if isinstance(instrument, LayoutStats) else LayoutStats()
+        start = perf_counter()
+        hits, misses = resolution_cache.hits, resolution_cache.misses
+    else:
+        stats = None
 
-def layout(display, node, standard=HTML5):
     containing_block = Viewport(display, node)
-    font = DummyFont(-1)  # FIXME: default font
 
-    node.layout.reset()
+    if stats is None:
+        compute_styles(node, incremental=incremental)
+    else:
+        styles_start = perf_counter()
+        compute_styles(node, incremental=incremental)
+        styles_end = perf_counter()
+        stats.add_time(STYLES, styles_end - styles_start)
+        if stats.trace is not None:
+            stats.add_span('compute_styles', styles_start, styles_end)
+
+    if fonts is None:
+        font = Font(-1)  # FIXME: default font
+    else:
+        font = fonts.font(node.style.computed)
+        if stats is None:
+            measure_text(display, node, fonts, incremental=incremental)
+        else:
+            text_hits, text_misses = fonts.measurements.hits, fonts.measurements.misses
+            stats.timed(MEASURE, measure_text, display, node, fonts, incremental)
+            stats.add_cache(
+                TEXT_CACHE, fonts.measurements.hits - text_hits, fonts.measurements.misses - text_misses
+            )
+
+    # A change in the size of the display invalidates the entire layout,
+    # as the size of viewport-relative values changes.
+    if not incremental or node.layout.containing_size != (display.content_width, display.content_height):
+        node.layout.reset()
 
     # 10.1 1
-    layout_box(display, node, containing_block, containing_block, font)
+    layout_box(display, node, containing_block, containing_block, font, incremental=incremental, stats=stats)
+    while containing_block.collapsed:
+        # The margin collapsing through a containment boundary has
+        # changed, so the layout of its ancestors must be re-evaluated.
+        for box in containing_block.collapsed:
+            box.mark_dirty()
+        containing_block.collapsed = []
+        layout_box(display, node, containing_block, containing_block, font, incremental=True, stats=stats)
 
     # The full collapsed extent of the top margin on the root element
     # must be displayed, so move the default content position so that it is.
-    node.layout.content_top += node.layout.collapse_top
+    node.layout.content_top = node.layout.flow_top + node.layout.collapse_top
 
     # In HTML5, the final content height of the root element is fitted
     # to the the display.
@@ -131,10 +435,195 @@ def layout(display, node, standard=HTML5):
             - node.layout.collapse_bottom
         )
 
+    if stats is not None:
+        end = perf_counter()
+        stats.add_cache(RESOLUTION_CACHE, resolution_cache.hits - hits, resolution_cache.misses - misses)
+        stats.add_time(TOTAL, end - start)
+        if stats.trace is not None:
+            stats.add_span('layout', start, end, {'incremental': incremental})
+        export(stats)
+        return stats
+
+
+def measure_text(display, node, fonts, incremental=False):
+    """Measure every run of text in the tree rooted at `node`.
+
+    A node whose intrinsic text isn't None is a run of text; the intrinsic
+    width of the node is the advance width of the text, and the intrinsic
+    height is the size of the font (10.6.1). Runs that share a font and
+    spacing are measured as a batch, through the measurement cache of
+    `fonts`; a run whose size changes marks the node as dirty.
+
+    A run is only measured if its text, font or spacing has changed since
+    it was last measured. If `incremental` is True, subtrees whose layout
+    isn't dirty (so neither their text nor their style has changed) aren't
+    visited.
+    """
+    batches = {}
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        style = node.style.computed
+        if style.display is None:
+            continue
+
+        box = node.layout
+        if (incremental
+                and box is not None
+                and box.dirty is False
+                and not box.dirty_descendants
+                and not box.update_descendants):
+            continue
+
+        text = node.intrinsic.text
+        if text is not None:
+            font = fonts.font(style)
+            context = {'display': display, 'font': font, 'size': 0}
+            key = (
+                font,
+                0 if style.letter_spacing is NORMAL else calculate_size(style.letter_spacing, context),
+                0 if style.word_spacing is NORMAL else calculate_size(style.word_spacing, context),
+            )
+            if box is None or box.text_inputs != (key, text):
+                batches.setdefault(key, []).append(node)
+
+        stack.extend(reversed(node.children))
+
+    for key, nodes in batches.items():
+        font, letter_spacing, word_spacing = key
+        widths = fonts.measurements.measure_many(
+            font, [node.intrinsic.text for node in nodes], letter_spacing, word_spacing
+        )
+        height = resolution_cache.px(1 * em, display=display, font=font)
+        for node, width in zip(nodes, widths):
+            node.intrinsic.width = width
+            node.intrinsic.height = height
+            if node.layout is not None:
+                node.layout.text_inputs = (key, node.intrinsic.text)
+
+
+class Geometry:
+    """The geometry of every box in a laid out document.
+
+    Boxes are stored in pre-order; `nodes[i]` is the node described by row i.
+    `boxes` is a contiguous array of doubles, with one row of len(FIELDS)
+    values per node. All positions are absolute. `parents` holds the row
+    of the parent of each node, or -1 for the root.
+
+    Both arrays support the buffer protocol, so they can be consumed
+    without copying (e.g., with `memoryview()`).
+    """
+    FIELDS = (
+        'content_left', 'content_top', 'content_width', 'content_height',
+        'padding_box_left', 'padding_box_top', 'padding_box_width', 'padding_box_height',
+        'border_box_left', 'border_box_top', 'border_box_width', 'border_box_height',
+        'margin_top', 'margin_right', 'margin_bottom', 'margin_left',
+    )
+
+    def __init__(self, nodes, parents, boxes):
+        self.nodes = nodes
+        self.parents = parents
+        self.boxes = boxes
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def row(self, index):
+        "Return the geometry of a single node as a dictionary."
+        n_fields = len(self.FIELDS)
+        return dict(zip(self.FIELDS, self.boxes[index * n_fields:(index + 1) * n_fields]))
+
+    def as_numpy(self):
+        "Return a (nodes x fields) NumPy view of the geometry, without copying."
+        import numpy
+
+        return numpy.frombuffer(self.boxes, dtype=numpy.float64).reshape(len(self.nodes), len(self.FIELDS))
+
+
+def export_geometry(node):
+    """Export the geometry of a laid out document in a single pass.
+
+    Returns a `Geometry` describing `node` and every displayed descendant.
+    """
+    nodes = []
+    parents = []
+    values = []
+
+    # Each stack entry is a node, the row of its parent, and the
+    # absolute position of its parent's content box.
+    stack = [(node, -1, node.layout.origin_top, node.layout.origin_left)]
+    while stack:
+        node, parent, origin_top, origin_left = stack.pop()
+        box = node.layout
+        if box is None:
+            continue
+
+        if box.anonymous_parent is not None:
+            # The box is positioned relative to an anonymous box.
+            origin_top += box.anonymous_parent.content_top
+            origin_left += box.anonymous_parent.content_left
+
+        top = origin_top + box.content_top
+        left = origin_left + box.content_left
+        padding_top = top - box.padding_top
+        padding_left = left - box.padding_left
+        padding_width = box.padding_left + box.content_width + box.padding_right
+        padding_height = box.padding_top + box.content_height + box.padding_bottom
+
+        # Margins that don't apply to a box are left as AUTO.
+        margin_top = box.margin_top
+        margin_right = box.margin_right
+        margin_bottom = box.margin_bottom
+        margin_left = box.margin_left
+
+        values.extend((
+            left, top, box.content_width, box.content_height,
+            padding_left, padding_top, padding_width, padding_height,
+            padding_left - box.border_left_width,
+            padding_top - box.border_top_width,
+            box.border_left_width + padding_width + box.border_right_width,
+            box.border_top_width + padding_height + box.border_bottom_width,
+            0 if margin_top is AUTO else margin_top,
+            0 if margin_right is AUTO else margin_right,
+            0 if margin_bottom is AUTO else margin_bottom,
+            0 if margin_left is AUTO else margin_left,
+        ))
+
+        row = len(nodes)
+        nodes.append(node)
+        parents.append(parent)
+
+        # Push the children in reverse, so they are popped in order.
+        for child in reversed(node.children):
+            stack.append((child, row, top, left))
+
+    # Convert to typed arrays in a single step.
+    boxes = array('d', values)
+    parents = array('l', parents)
+
+    return Geometry(nodes, parents, boxes)
+
 
 class AnonymousBlockBox:
-    def __init__(self):
+    """An anonymous block box, wrapping a run of inline-level children
+    of a block container that also has block-level children (9.2.1.1).
+
+    Anonymous boxes are part of the box tree of the block container,
+    so they persist between layouts.
+    """
+    name = None
+
+    def __init__(self, parent):
+        from .declaration import CSS
+
+        self.parent = parent
         self.children = []
+        self.style = CSS(display=BLOCK)
+        self.intrinsic = Size(self)
+        self.layout = Box(self)
+
+    def __repr__(self):
+        return '<AnonymousBlockBox in %r>' % self.parent
 
     def append(self, child):
         self.children.append(child)
@@ -148,26 +637,134 @@ class AnonymousInlineBox:
         self.children.append(child)
 
 
-def anonymize(nodes):
+def anonymize(node):
+    """Build the children of the box of `node` in the box tree.
+
+    Each run of inline-level children is wrapped in an anonymous block box.
+    The anonymous boxes of the previous box tree of the node are reused.
+    Children that aren't displayed don't generate boxes.
+    """
+    previous = node.layout.box_children or []
+    spare = [child for child in reversed(previous) if isinstance(child, AnonymousBlockBox)]
+
     anon_block = None
     containers = []
-    for node in nodes:
-        if is_block_level_element(node):
-            if anon_block:
-                containers.append(anon_block)
-                anon_block = None
-            containers.append(node)
+    for child in node.children:
+        if child.style.computed.display is None:
+            child.layout = None
+        elif is_block_level_element(child):
+            anon_block = None
+            containers.append(child)
         else:
             if anon_block is None:
-                anon_block = AnonymousBlockBox()
-            anon_block.append(node)
+                anon_block = spare.pop() if spare else AnonymousBlockBox(node)
+                anon_block.children = []
+                anon_block.layout.lines = None
+                containers.append(anon_block)
+            anon_block.append(child)
 
     return containers
 
 
-def layout_box(display, node, containing_block, viewport, font):
+def box_children(node, stats=None):
+    """The children of the box of `node` in the box tree.
+
+    The box tree is built when it is first required, and retained
+    until the children of the node (or their display) change.
+    """
+    if node.layout.box_children is None or node.layout.box_tree_stale:
+        if stats is None:
+            node.layout.box_children = anonymize(node)
+        else:
+            node.layout.box_children = stats.timed(ANONYMIZE, anonymize, node)
+        node.layout.box_tree_stale = False
+    return node.layout.box_children
+
+
+def last_box_child(node):
+    """The last child of the box of `node` in the box tree, or None.
+
+    If the box tree hasn't been built (or is stale), the last child node
+    that is displayed.
+    """
+    if node.layout.box_children is not None and not node.layout.box_tree_stale:
+        return node.layout.box_children[-1] if node.layout.box_children else None
+    for child in reversed(node.children):
+        if child.layout is not None:
+            return child
+    return None
+
+
+def layout_box(display, node, containing_block, viewport, font, incremental=False, box_sizes=None, stats=None):
+    """Lay out the subtree rooted at `node`.
+
+    The subtree is walked with an explicit stack, rather than by recursion,
+    so documents of any depth can be laid out. Each entry on the stack is
+    the layout of a box in progress, which yields the children that must be
+    laid out before it can continue.
+
+    If `stats` is a LayoutStats, the work done by the layout is recorded in it.
+    """
+    if box_sizes is None:
+        box_sizes = {}
+
+    if stats is not None and stats.trace is not None:
+        _trace_layout_box(display, node, containing_block, viewport, font, incremental, box_sizes, stats)
+        return
+
+    stack = [_layout_box(display, node, containing_block, viewport, font, incremental, box_sizes, stats)]
+    while stack:
+        child = next(stack[-1], None)
+        if child is None:
+            stack.pop()
+        else:
+            child, containing_block = child
+            stack.append(_layout_box(display, child, containing_block, viewport, font, incremental, box_sizes, stats))
+
+
+def _trace_layout_box(display, node, containing_block, viewport, font, incremental, box_sizes, stats):
+    """Lay out the subtree rooted at `node`, as layout_box() does,
+    recording a span in the trace of `stats` for the layout of each box.
+    """
+    stack = [(
+        _layout_box(display, node, containing_block, viewport, font, incremental, box_sizes, stats),
+        node, containing_block.layout.content_width, perf_counter(),
+    )]
+    while stack:
+        child = next(stack[-1][0], None)
+        if child is None:
+            _, node, containing_width, start = stack.pop()
+            if node.layout is None:
+                kind = 'none'
+            elif node.layout.layout_kind is None:
+                kind = 'unknown'
+            else:
+                kind = LAYOUT_KIND_NAMES[node.layout.layout_kind]
+            stats.add_span(
+                node.name if node.name is not None else 'anonymous',
+                start, perf_counter(),
+                {'kind': kind, 'containing_width': containing_width, 'depth': len(stack)}
+            )
+        else:
+            child, containing_block = child
+            stack.append((
+                _layout_box(display, child, containing_block, viewport, font, incremental, box_sizes, stats),
+                child, containing_block.layout.content_width, perf_counter(),
+            ))
+
+
+def _layout_box(display, node, containing_block, viewport, font, incremental, box_sizes, stats):
+    """Lay out a single box, yielding a (child, containing block) pair for
+    each child that must be laid out.
+    """
+    anonymous = isinstance(node, AnonymousBlockBox)
+    if anonymous:
+        # Anonymous boxes inherit from their block container.
+        node.style.compute(node.parent.style.computed)
+    style = node.style.computed
+
     # If the node shouldn't be displayed, remove the layout box.
-    if node.style.display is None:
+    if style.display is None:
         node.layout = None
         return
     else:
@@ -175,6 +772,33 @@ def layout_box(display, node, containing_block, viewport, font):
         if node.layout is None:
             node.layout = Box(node)
 
+    if stats is not None:
+        stats.nodes += 1
+
+    containing_size = (containing_block.layout.content_width, containing_block.layout.content_height)
+    if anonymous:
+        # Changes to the children of an anonymous box are tracked by
+        # its block container, so the anonymous box is always laid out.
+        node.layout.reset_box()
+    elif incremental:
+        if (node.layout.dirty is False
+                and not node.layout.dirty_descendants
+                and node.layout.containing_size == containing_size):
+            # The previous layout of this subtree is still valid;
+            # the block container will update its position.
+            if stats is not None:
+                stats.retained += 1
+            if node.layout.offset_dirty or node.layout.update_descendants:
+                update_retained(display, node, viewport, font, stats=stats)
+            return
+
+        node.layout.reset_box()
+
+    if stats is not None:
+        stats.laid_out += 1
+
+    node.layout.contains_layout = establishes_layout_containment(node)
+
     # Copy margin, border and padding attributes to the layout
     horizontal = {
         'display': display,
@@ -187,112 +811,768 @@ def layout_box(display, node, containing_block, viewport, font):
         'font': font,
         'size': containing_block.layout.content_height
     }
-    node.layout.margin_top = calculate_size(node.style.margin_top, vertical)
-    node.layout.margin_right = calculate_size(node.style.margin_right, horizontal)
-    node.layout.margin_bottom = calculate_size(node.style.margin_bottom, vertical)
-    node.layout.margin_left = calculate_size(node.style.margin_left, horizontal)
-
-    node.layout.border_top_width = calculate_size(node.style.border_top_width, horizontal)
-    node.layout.border_right_width = calculate_size(node.style.border_right_width, vertical)
-    node.layout.border_bottom_width = calculate_size(node.style.border_bottom_width, horizontal)
-    node.layout.border_left_width = calculate_size(node.style.border_left_width, vertical)
 
-    node.layout.padding_top = calculate_size(node.style.padding_top, horizontal)
-    node.layout.padding_right = calculate_size(node.style.padding_right, vertical)
-    node.layout.padding_bottom = calculate_size(node.style.padding_bottom, horizontal)
-    node.layout.padding_left = calculate_size(node.style.padding_left, vertical)
+    sizes = _box_sizes(style, containing_size, horizontal, vertical, box_sizes, stats)
+    (
+        node.layout.margin_top,
+        node.layout.margin_right,
+        node.layout.margin_bottom,
+        node.layout.margin_left,
+        node.layout.border_top_width,
+        node.layout.border_right_width,
+        node.layout.border_bottom_width,
+        node.layout.border_left_width,
+        node.layout.padding_top,
+        node.layout.padding_right,
+        node.layout.padding_bottom,
+        node.layout.padding_left,
+    ) = sizes
 
     # print("NODE", node)
 
     # Section 10.3 - evaluate height and margins
-    calculate_width_and_margins(node, horizontal)
+    if stats is None:
+        calculate_width_and_margins(node, horizontal)
+    else:
+        stats.count(WIDTH_SECTIONS[layout_kind(node)])
+        stats.timed(WIDTH, calculate_width_and_margins, node, horizontal)
 
     # Section 9.4.2 - relative positioning
-    if node.style.position is RELATIVE:
-        calculate_height_and_margins(node, vertical)
+    if style.position is RELATIVE:
+        last_child = last_box_child(node) if incremental and style.height is AUTO else None
+        if last_child is not None:
+            # An automatic height is evaluated from the layout of the last
+            # child, which a full layout hasn't evaluated yet; the retained
+            # layout of the child must not be used.
+            last_child.layout.reset_box()
+        if stats is None:
+            calculate_height_and_margins(node, vertical)
+        else:
+            stats.count(HEIGHT_SECTIONS[layout_kind(node)])
+            stats.timed(HEIGHT, calculate_height_and_margins, node, vertical)
 
-    if node.style.position is ABSOLUTE or node.style.position is FIXED:  # Section 9.6
+    if style.position is ABSOLUTE or style.position is FIXED:  # Section 9.6
         raise NotImplementedError("Section 9.6 - Absolute positioning")  # pragma: no cover
-    elif node.style.float is not None:
+    elif style.float is not None:
         raise NotImplementedError("Section 9.5 - Floats")  # pragma: no cover
     else:  # Section 9.4 - Normal flow
-        if establishes_inline_formatting_context(node):
+        context = formatting_context(node)
+        if context == INLINE_FORMATTING_CONTEXT:
             # Section 9.4.2 - Inline formatting context
-            for child in node.children:
-                layout_box(display, child, node, viewport, font)
-        elif establishes_table_formatting_context(node):
+            yield from _layout_inline_formatting_context(node, anonymous, incremental, stats)
+        elif context == FLEX_FORMATTING_CONTEXT:
+            # css-flexbox-1 9 - Flex layout
+            yield from _layout_flex_formatting_context(
+                display, node, font, vertical, incremental, box_sizes, stats
+            )
+        elif context == TABLE_FORMATTING_CONTEXT:
             # Section 17 - Table formatting context
             raise NotImplementedError("Section 17")  # pragma: no cover
         else:
             # Section 9.4.1 - Block formatting context
-            children = anonymize(node.children)
-            offset_top = 0
-            bottom_margin = None
-
-            for child in children:
-                layout_box(display, child, node, viewport, font)
-                # If this is the first child, check if the first child's margin box
-                # extends higher than the node's margin box. If it does, the starting
-                # position for calculations of the parent node's box must be adjusted
-                # by that amount.
-                # Otherwise, collapse the bottom margin of the previous element
-                # with the top margin of this element, and offset by the result.
-                if bottom_margin is None:
-                    node.layout.collapse_top = child.layout.collapse_top
-                else:
-                    offset_top += max(bottom_margin, child.layout.margin_top)
-
-                # Offset the top of the child, relative to the parent.
-                child.layout.content_top += offset_top
-
-                # Increase the offset by the height of the box,
-                # and record the margin so it can be collapsed with the
-                # next element
-                offset_top += child.layout.border_box_height
-                bottom_margin = child.layout.collapse_bottom
+            yield from _layout_block_formatting_context(node, stats)
 
     # Section 10.6 - evaluate height and margins
-    calculate_height_and_margins(node, vertical)
+    if stats is None:
+        calculate_height_and_margins(node, vertical)
+    else:
+        stats.count(HEIGHT_SECTIONS[layout_kind(node)])
+        stats.timed(HEIGHT, calculate_height_and_margins, node, vertical)
 
-    if node.style.position is RELATIVE:
+    if style.position is RELATIVE:
         # Section 9.4.3 - relative positioning
-        # Left/Right
-        if node.style.left == AUTO and node.style.right == AUTO:  # P4
-            value_left = 0
-        elif node.style.left == AUTO:  # P5
-            if node.style.right == INHERIT:
-                value_left = -containing_block.layout.content_right
-            else:
-                value_left = -node.style.right.px(**horizontal)
-        elif node.style.right == AUTO:  # P6
-            if node.style.left == INHERIT:
-                value_left = containing_block.layout.content_left
+        if stats is None:
+            value_left, value_top = calculate_relative_offset(node, horizontal, vertical)
+        else:
+            value_left, value_top = stats.timed(
+                RELATIVE_OFFSET, calculate_relative_offset, node, horizontal, vertical
+            )
+        node.layout.content_left += value_left
+        node.layout.content_top += value_top
+        node.layout.offset_left = value_left
+        node.layout.offset_top = value_top
+
+    # Record the inputs and results of this layout, so the layout
+    # can be retained by future incremental layouts.
+    node.layout.containing_size = containing_size
+    node.layout.flow_top = node.layout.content_top
+    node.layout.dirty_descendants = False
+    node.layout.offset_dirty = False
+    node.layout.update_descendants = False
+    node.layout.dirty = False
+
+    # print("END NODE", node)
+
+
+def _layout_block_formatting_context(node, stats):
+    """Lay out the children of a box that establishes a block formatting
+    context (Section 9.4.1), yielding each child that must be laid out.
+    """
+    offset_top = 0
+    bottom_margin = None
+
+    for child in box_children(node, stats):
+        yield child, node
+        child.layout.anonymous_parent = None
+        # If this is the first child, check if the first child's margin box
+        # extends higher than the node's margin box. If it does, the starting
+        # position for calculations of the parent node's box must be adjusted
+        # by that amount.
+        # Otherwise, collapse the bottom margin of the previous element
+        # with the top margin of this element, and offset by the result.
+        if bottom_margin is None:
+            node.layout.collapse_top = child.layout.collapse_top
+        else:
+            offset_top += max(bottom_margin, child.layout.margin_top)
+
+        # Offset the top of the child, relative to the parent.
+        child.layout.content_top = child.layout.flow_top + offset_top
+
+        # Increase the offset by the height of the box,
+        # and record the margin so it can be collapsed with the
+        # next element
+        offset_top += child.layout.border_box_height
+        bottom_margin = child.layout.collapse_bottom
+
+
+def _layout_inline_formatting_context(node, anonymous, incremental, stats):
+    """Lay out the children of a box that establishes an inline formatting
+    context (Section 9.4.2), yielding each child that must be laid out.
+
+    The children are broken into line boxes. In an incremental layout,
+    children whose layout is unchanged aren't visited, and the line boxes
+    of the previous layout are retained up to the line before the first
+    child whose layout has changed; lines are broken from there
+    until the line breaks match the line breaks of the previous layout
+    after the last changed child, and the remaining lines are moved to
+    follow the new lines.
+    """
+    box = node.layout
+    style = node.style.computed
+    children = node.children
+    containing_size = (box.content_width, box.content_height)
+    line_inputs = (box.content_width, style.white_space, style.text_align)
+
+    retain = (
+        incremental
+        and box.lines is not None
+        and box.line_inputs == line_inputs
+        and (box.lines[-1][1] if box.lines else 0) == len(children)
+    )
+    first_changed = None
+    last_changed = None
+    for index, child in enumerate(children):
+        if (
+            retain
+            and child.layout is not None
+            and child.layout.dirty is False
+            and not child.layout.dirty_descendants
+            and child.layout.containing_size == containing_size
+        ):
+            if not (child.layout.offset_dirty or child.layout.update_descendants):
+                # The layout of the child, and its place in its line box,
+                # are unchanged, so the child doesn't need to be visited.
+                continue
+        else:
+            if first_changed is None:
+                first_changed = index
+            last_changed = index
+
+        yield child, node
+        if child.layout is not None:
+            child.layout.anonymous_parent = box if anonymous else None
+
+    if first_changed is None:
+        if retain:
+            # No child has changed, so every line box is still valid.
+            if stats is not None:
+                stats.lines_retained += len(box.lines)
+            return
+        first_changed = last_changed = 0
+
+    previous = box.lines if retain else []
+
+    # Break lines from the start of the line before the line containing
+    # the first change; the change may allow content to move up a line.
+    line = 0
+    while line + 1 < len(previous) and previous[line + 1][0] <= first_changed:
+        line += 1
+    line = max(line - 1, 0)
+    lines = previous[:line]
+    if line < len(previous):
+        start, top = previous[line][0], previous[line][2]
+    else:
+        start, top = 0, 0
+
+    # The lines of the previous layout, keyed on their first child.
+    resync = {entry[0]: number for number, entry in enumerate(previous) if entry[0] > last_changed}
+
+    available = box.content_width
+    wrap = style.white_space in (NORMAL, PRE_WRAP, PRE_LINE)
+    lines_broken = 0
+    while start < len(children):
+        end, height = _break_line(children, start, available, wrap, top, style.text_align)
+        lines.append((start, end, top, height))
+        lines_broken += 1
+        top += height
+        start = end
+
+        number = resync.get(start)
+        if number is not None:
+            # The line breaks match the previous layout again;
+            # move the remaining lines to follow the new lines.
+            delta = top - previous[number][2]
+            for first, last, line_top, height in previous[number:]:
+                lines.append((first, last, line_top + delta, height))
+                if delta:
+                    for child in children[first:last]:
+                        if child.layout is not None:
+                            child.layout.content_top += delta
+            if stats is not None:
+                stats.lines_retained += len(previous) - number
+            break
+
+    if stats is not None:
+        stats.lines_retained += line
+        stats.lines_broken += lines_broken
+
+    box.lines = lines
+    box.line_inputs = line_inputs
+
+
+def _break_line(children, start, available, wrap, top, text_align):
+    """Place the children of a line box that starts with `children[start]`,
+    and whose top is at `top`.
+
+    Each child is an unbreakable unit; a line can be broken between any
+    two children. Returns the (index of the first child on the next line,
+    height) of the line box.
+    """
+    end = start
+    width = 0
+    height = 0
+    while end < len(children):
+        layout = children[end].layout
+        if layout is not None:
+            advance = layout.margin_left + layout.border_box_width + layout.margin_right
+            if wrap and end > start and width + advance > available:
+                break
+            width += advance
+            height = max(height, layout.margin_top + layout.border_box_height + layout.margin_bottom)
+        end += 1
+
+    if text_align == RIGHT:
+        left = available - width
+    elif text_align == CENTER:
+        left = (available - width) // 2
+    else:
+        left = 0
+
+    for child in children[start:end]:
+        layout = child.layout
+        if layout is not None:
+            layout.content_left = left + layout.margin_left + layout.border_left_width + layout.padding_left \
+                + layout.offset_left
+            layout.content_top = top + layout.flow_top
+            left += layout.margin_left + layout.border_box_width + layout.margin_right
+
+    return end, height
+
+
+def _layout_flex_formatting_context(display, node, font, vertical, incremental, box_sizes, stats):
+    """Lay out the children of a flex container (css-flexbox-1, Section 9),
+    yielding each flex item that must be laid out.
+
+    The flex base size and hypothetical main size of each item (9.2) are
+    evaluated once, and retained by the item until the item or the main
+    size of the container changes. The items are collected into flex lines
+    in a single pass (9.3), and the flexible lengths of each line are
+    resolved (9.7) before the items of a row are laid out at their main
+    size. The items of a column are laid out first, as their content
+    determines their hypothetical main size.
+    """
+    box = node.layout
+    style = node.style.computed
+    row = style.flex_direction is ROW or style.flex_direction is ROW_REVERSE
+
+    items = []
+    for child in node.children:
+        if child.style.computed.display is None:
+            child.layout = None
+        else:
+            if child.layout is None:
+                child.layout = Box(child)
+            items.append(child)
+    if any(item.style.computed.order for item in items):
+        # Order-modified document order (5.4); the sort is stable.
+        items.sort(key=lambda item: item.style.computed.order)
+
+    containing_size = (box.content_width, box.content_height)
+    horizontal = {'display': display, 'font': font, 'size': box.content_width}
+    item_vertical = {'display': display, 'font': font, 'size': box.content_height}
+
+    # The inner main and cross sizes of the container; None if indefinite.
+    height = None if style.height is AUTO else resolution_cache.px(style.height, **vertical)
+    if row:
+        main_size, cross_size = box.content_width, height
+    else:
+        main_size, cross_size = height, box.content_width
+    main_context = {'display': display, 'font': font, 'size': main_size}
+
+    # The items whose previous layout will be retained.
+    clean = [
+        incremental
+        and item.layout.dirty is False
+        and not item.layout.dirty_descendants
+        and item.layout.containing_size == containing_size
+        for item in items
+    ]
+
+    if not row:
+        for index, item in enumerate(items):
+            if item.layout.flex_main_size is not None:
+                item.layout.flex_main_size = None
+                item.layout.mark_dirty()
+                clean[index] = False
+            yield item, node
+            if not clean[index]:
+                item.layout.flex_content_height = item.layout.content_height
+
+    sizes = [
+        _flex_item_sizes(
+            item, row, main_size, main_context, clean[index],
+            containing_size, horizontal, item_vertical, box_sizes, stats
+        )
+        for index, item in enumerate(items)
+    ]
+
+    lines = _collect_flex_lines(sizes, main_size, style.flex_wrap is not NOWRAP)
+    targets = []
+    for first, end in lines:
+        targets.extend(_resolve_flexible_lengths(items[first:end], sizes[first:end], main_size))
+
+    if row:
+        for index, item in enumerate(items):
+            if item.layout.flex_main_size != targets[index]:
+                item.layout.flex_main_size = targets[index]
+                if clean[index]:
+                    item.layout.mark_dirty()
+                    clean[index] = False
+            yield item, node
+            if not clean[index]:
+                item.layout.flex_content_height = item.layout.content_height
+    else:
+        for item, target in zip(items, targets):
+            item.layout.content_height = target
+
+    box.flex_lines = _align_flex_items(style, items, lines, sizes, targets, row, main_size, cross_size)
+
+
+def _flex_item_sizes(item, row, main_size, main_context, clean, containing_size, horizontal, vertical,
+                     box_sizes, stats):
+    """The (flex base size, hypothetical main size, main axis margin, border
+    and padding, min main size, max main size) of a flex item (9.2).
+
+    The sizes are retained by the item until it, or the main size of its
+    container, changes.
+    """
+    box = item.layout
+    if clean and box.flex_sizes is not None and box.flex_sizes[0] == main_size:
+        return box.flex_sizes[1:]
+
+    style = item.style.computed
+    (
+        margin_top, margin_right, margin_bottom, margin_left,
+        border_top, border_right, border_bottom, border_left,
+        padding_top, padding_right, padding_bottom, padding_left,
+    ) = _box_sizes(style, containing_size, horizontal, vertical, box_sizes, stats)
+    if row:
+        extra = border_left + padding_left + padding_right + border_right
+        margins = (margin_left, margin_right)
+        basis, min_value, max_value = style.width, style.min_width, style.max_width
+        content_size = item.intrinsic.width if item.intrinsic.width is not None else 0
+    else:
+        extra = border_top + padding_top + padding_bottom + border_bottom
+        margins = (margin_top, margin_bottom)
+        basis, min_value, max_value = style.height, style.min_height, style.max_height
+        content_size = box.flex_content_height
+    for margin in margins:
+        if margin is not AUTO:
+            extra += margin
+
+    if style.flex_basis is not AUTO:
+        basis = style.flex_basis
+    if basis is AUTO or basis is CONTENT or (main_size is None and isinstance(basis, Percent)):
+        base_size = content_size
+    else:
+        base_size = calculate_size(basis, main_context)
+
+    # Percentages of an indefinite main size are ignored.
+    if min_value is AUTO or (main_size is None and isinstance(min_value, Percent)):
+        min_size = 0
+    else:
+        min_size = calculate_size(min_value, main_context)
+    if max_value is None or (main_size is None and isinstance(max_value, Percent)):
+        max_size = None
+    else:
+        max_size = calculate_size(max_value, main_context)
+
+    hypothetical = base_size
+    if max_size is not None and hypothetical > max_size:
+        hypothetical = max_size
+    if hypothetical < min_size:
+        hypothetical = min_size
+
+    sizes = (base_size, hypothetical, extra, min_size, max_size)
+    box.flex_sizes = (main_size,) + sizes
+    return sizes
+
+
+def _collect_flex_lines(sizes, main_size, wrap):
+    """Collect flex items into flex lines (9.3), in a single pass.
+
+    Returns a (first item, last item + 1) for each line.
+    """
+    if not wrap or main_size is None:
+        return [(0, len(sizes))]
+
+    lines = []
+    first = 0
+    used = 0
+    for index, (base_size, hypothetical, extra, min_size, max_size) in enumerate(sizes):
+        outer = hypothetical + extra
+        if index > first and used + outer > main_size:
+            lines.append((first, index))
+            first = index
+            used = 0
+        used += outer
+    lines.append((first, len(sizes)))
+    return lines
+
+
+def _resolve_flexible_lengths(items, sizes, main_size):
+    """Resolve the main sizes of the items of a flex line (9.7).
+
+    Each iteration of the loop freezes at least one item, and only the
+    unfrozen items are visited. Only an item that is clamped by its min or
+    max main size can be frozen by a later iteration, so the number of
+    iterations is bounded by the number of items that are clamped.
+    """
+    targets = [hypothetical for base_size, hypothetical, extra, min_size, max_size in sizes]
+    if main_size is None:
+        # The line is as long as its content; nothing flexes.
+        return targets
+
+    growing = sum(hypothetical + extra for base_size, hypothetical, extra, min_size, max_size in sizes) < main_size
+
+    # Size the inflexible items.
+    frozen_space = 0
+    unfrozen = []
+    factors = {}
+    for index, item in enumerate(items):
+        base_size, hypothetical, extra, min_size, max_size = sizes[index]
+        factor = item.style.computed.flex_grow if growing else item.style.computed.flex_shrink
+        if (factor == 0
+                or (growing and base_size > hypothetical)
+                or (not growing and base_size < hypothetical)):
+            frozen_space += hypothetical + extra
+        else:
+            factors[index] = factor if growing else factor * base_size
+            unfrozen.append(index)
+
+    initial_free_space = main_size - frozen_space - sum(sizes[index][0] + sizes[index][2] for index in unfrozen)
+    while unfrozen:
+        free_space = main_size - frozen_space - sum(sizes[index][0] + sizes[index][2] for index in unfrozen)
+        total_factor = sum(factors[index] for index in unfrozen)
+        if growing:
+            flex_total = total_factor
+        else:
+            flex_total = sum(items[index].style.computed.flex_shrink for index in unfrozen)
+        if flex_total < 1 and abs(initial_free_space * flex_total) < abs(free_space):
+            free_space = initial_free_space * flex_total
+
+        # Distribute the free space in proportion to the flex factors,
+        # and clamp each item by its min and max main sizes.
+        violation = 0
+        violations = {}
+        for index in unfrozen:
+            base_size, hypothetical, extra, min_size, max_size = sizes[index]
+            if total_factor:
+                target = base_size + free_space * factors[index] / total_factor
             else:
-                value_left = node.style.left.px(**horizontal)
-        else:  # P7
-            value_left = node.style.left.px(**horizontal)
+                target = base_size
+            clamped = target
+            if max_size is not None and clamped > max_size:
+                clamped = max_size
+            if clamped < min_size:
+                clamped = min_size
+            if clamped != target:
+                violation += clamped - target
+                violations[index] = clamped > target
+            targets[index] = clamped
+
+        # Freeze the items that were clamped (or every item, if none were).
+        if violation == 0:
+            frozen = unfrozen
+        else:
+            frozen = [index for index in unfrozen if violations.get(index) is (violation > 0)]
+        frozen_space += sum(targets[index] + sizes[index][2] for index in frozen)
+        if frozen is unfrozen:
+            break
+        frozen = set(frozen)
+        unfrozen = [index for index in unfrozen if index not in frozen]
+
+    return targets
+
+
+def _distribute(free_space, count, mode):
+    """The (offset of the first box, gap between boxes) that distribute
+    `free_space` among `count` boxes (css-flexbox-1, 8.2 and 8.4).
+    """
+    if mode is FLEX_END:
+        return free_space, 0
+    elif mode is CENTER:
+        return free_space / 2, 0
+    elif mode is SPACE_BETWEEN:
+        if free_space > 0 and count > 1:
+            return 0, free_space / (count - 1)
+        return 0, 0
+    elif mode is SPACE_AROUND:
+        if free_space > 0 and count:
+            return free_space / count / 2, free_space / count
+        return free_space / 2, 0
+    else:
+        return 0, 0
 
-        node.layout.content_left += value_left
 
-        # Top/Bottom P8
-        if node.style.top == AUTO and node.style.bottom == AUTO:
-            value_top = 0
-        elif node.style.top == AUTO:
-            if node.style.bottom == INHERIT:
-                value_top = -containing_block.layout.content_bottom
+def flex_alignment(node):
+    "The alignment of a flex item in the cross axis of its line (8.3)."
+    align = node.style.computed.align_self
+    if align is AUTO:
+        align = node.parent.style.computed.align_items
+    return STRETCH if align is AUTO else align
+
+
+def _flex_outer_cross_size(layout, row):
+    "The outer cross size of a flex item, as its own layout sized it."
+    if row:
+        return (
+            layout.margin_top + layout.border_top_width + layout.padding_top
+            + layout.flex_content_height
+            + layout.padding_bottom + layout.border_bottom_width + layout.margin_bottom
+        )
+    return layout.margin_left + layout.border_box_width + layout.margin_right
+
+
+def _align_flex_items(style, items, lines, sizes, targets, row, main_size, cross_size):
+    """Position the items of a flex container in its flex lines, aligning
+    them in the main (8.2) and cross (8.3, 8.4) axes.
+
+    Returns the flex lines of the container.
+    """
+    line_cross_sizes = [
+        max([_flex_outer_cross_size(item.layout, row) for item in items[first:end]] or [0])
+        for first, end in lines
+    ]
+    if len(lines) == 1 and cross_size is not None:
+        line_cross_sizes[0] = cross_size
+
+    cross_position, gap = 0, 0
+    if len(lines) > 1 and cross_size is not None:
+        free_space = cross_size - sum(line_cross_sizes)
+        if style.align_content is STRETCH:
+            if free_space > 0:
+                line_cross_sizes = [size + free_space / len(lines) for size in line_cross_sizes]
+        else:
+            cross_position, gap = _distribute(free_space, len(lines), style.align_content)
+    total_cross_size = cross_size if cross_size is not None else sum(line_cross_sizes)
+
+    reverse = style.flex_direction is ROW_REVERSE or style.flex_direction is COLUMN_REVERSE
+    wrap_reverse = style.flex_wrap is WRAP_REVERSE
+
+    flex_lines = []
+    for (first, end), line_cross_size in zip(lines, line_cross_sizes):
+        extent = sum(targets[index] + sizes[index][2] for index in range(first, end))
+        available = main_size if main_size is not None else extent
+        position, spacing = _distribute(available - extent, end - first, style.justify_content)
+
+        for index in range(first, end):
+            layout = items[index].layout
+            outer_main_size = targets[index] + sizes[index][2]
+            main_position = available - position - outer_main_size if reverse else position
+            position += outer_main_size + spacing
+
+            # Align the item in the cross axis of the line.
+            outer_cross_size = _flex_outer_cross_size(layout, row)
+            align = flex_alignment(items[index])
+            if row:
+                if align is STRETCH and items[index].style.computed.height is AUTO:
+                    layout.content_height = max(
+                        layout.flex_content_height + line_cross_size - outer_cross_size, 0
+                    )
+                    outer_cross_size = line_cross_size
+                else:
+                    layout.content_height = layout.flex_content_height
+
+            if align is FLEX_END:
+                offset = line_cross_size - outer_cross_size
+            elif align is CENTER:
+                offset = (line_cross_size - outer_cross_size) / 2
             else:
-                value_top = -node.style.bottom.px(**vertical)
-        elif node.style.bottom == AUTO:
-            if node.style.top == INHERIT:
-                value_top = containing_block.layout.content_top
+                offset = 0
+            item_cross_position = cross_position + offset
+            if wrap_reverse:
+                item_cross_position = total_cross_size - item_cross_position - outer_cross_size
+
+            if row:
+                left, top = main_position, item_cross_position
             else:
-                value_top = node.style.top.px(**vertical)
+                left, top = item_cross_position, main_position
+            layout.content_left = (
+                left + layout.margin_left + layout.border_left_width + layout.padding_left + layout.offset_left
+            )
+            layout.content_top = (
+                top + layout.margin_top + layout.border_top_width + layout.padding_top + layout.offset_top
+            )
+
+        flex_lines.append((first, end, extent, cross_position, line_cross_size))
+        cross_position += line_cross_size + gap
+
+    return flex_lines
+
+
+def update_retained(display, node, viewport, font, stats=None):
+    """Update a subtree whose layout has been retained.
+
+    A relative offset moves a box without affecting the layout of any other
+    box (Section 9.4.3), so a box whose offset has changed is translated,
+    rather than laid out again. (The exception is the automatic height of
+    the parent of the last child, which invalidate() marks as dirty.)
+
+    The layout inside a layout containment boundary is re-evaluated from
+    the containing block of the boundary, without re-evaluating the layout
+    of any box outside the boundary. If the boundary is the first child of
+    its parent, and the margin collapsing through its top has changed, the
+    boundary is added to the `collapsed` list of the viewport, so layout()
+    can re-evaluate the layout of its ancestors.
+    """
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        box = node.layout
+        if box.dirty_descendants:
+            # A containment boundary with dirty descendants. Its size can't
+            # change, so it keeps the position given by its container.
+            offset_top = box.content_top - box.flow_top
+            content_left = box.content_left
+            collapse_top = box.collapse_top
+            layout_box(
+                display, node, RetainedContainingBlock(box.containing_size), viewport, font,
+                incremental=True, stats=stats,
+            )
+            box.content_top = box.flow_top + offset_top
+            box.content_left = content_left
+
+            siblings = node.parent.layout.box_children if node.parent is not None else None
+            if box.collapse_top != collapse_top and siblings and siblings[0] is node:
+                viewport.collapsed.append(box)
+            continue
+
+        if box.offset_dirty:
+            box.offset_dirty = False
+            if node.style.computed.position is RELATIVE:
+                horizontal = {'display': display, 'font': font, 'size': box.containing_size[0]}
+                vertical = {'display': display, 'font': font, 'size': box.containing_size[1]}
+                if stats is None:
+                    value_left, value_top = calculate_relative_offset(node, horizontal, vertical)
+                else:
+                    value_left, value_top = stats.timed(
+                        RELATIVE_OFFSET, calculate_relative_offset, node, horizontal, vertical
+                    )
+            else:
+                value_left, value_top = 0, 0
+
+            box.content_left += value_left - box.offset_left
+            box.content_top += value_top - box.offset_top
+            box.flow_top += value_top - box.offset_top
+            box.offset_left = value_left
+            box.offset_top = value_top
+
+        if box.update_descendants:
+            box.update_descendants = False
+            for child in node.children:
+                if child.layout is not None:
+                    stack.append(child)
+
+
+def calculate_relative_offset(node, horizontal, vertical):
+    "Section 9.4.3 - the (left, top) offset of a relatively positioned box."
+    style = node.style.computed
+
+    # Left/Right
+    if style.left == AUTO and style.right == AUTO:  # P4
+        value_left = 0
+    elif style.left == AUTO:  # P5
+        value_left = -resolution_cache.px(style.right, **horizontal)
+    elif style.right == AUTO:  # P6
+        value_left = resolution_cache.px(style.left, **horizontal)
+    else:  # P7
+        value_left = resolution_cache.px(style.left, **horizontal)
+
+    # Top/Bottom P8
+    if style.top == AUTO and style.bottom == AUTO:
+        value_top = 0
+    elif style.top == AUTO:
+        value_top = -resolution_cache.px(style.bottom, **vertical)
+    elif style.bottom == AUTO:
+        value_top = resolution_cache.px(style.top, **vertical)
+    else:
+        value_top = resolution_cache.px(style.top, **vertical)
+
+    return value_left, value_top
+
+
+def _box_sizes(style, containing_size, horizontal, vertical, box_sizes, stats):
+    """The (margin, border width, padding) sizes of a box with the given style.
+
+    Nodes that share a computed style and have containing blocks of the
+    same size have the same margins, borders and padding; they only need
+    to be evaluated once per layout. `box_sizes` holds the sizes that have
+    already been evaluated.
+    """
+    key = (style, containing_size)
+    try:
+        sizes = box_sizes[key]
+        if stats is not None:
+            stats.add_cache(BOX_SIZES_CACHE, 1, 0)
+    except KeyError:
+        if stats is None:
+            sizes = calculate_box_sizes(style, horizontal, vertical)
         else:
-            value_top = node.style.top.px(**vertical)
+            stats.add_cache(BOX_SIZES_CACHE, 0, 1)
+            sizes = stats.timed(SIZES, calculate_box_sizes, style, horizontal, vertical)
+        box_sizes[key] = sizes
+    return sizes
 
-        node.layout.content_top += value_top
 
-    # print("END NODE", node)
+def calculate_box_sizes(style, horizontal, vertical):
+    "The (margin, border width, padding) sizes of a box, in top, right, bottom, left order."
+    return (
+        calculate_size(style.margin_top, vertical),
+        calculate_size(style.margin_right, horizontal),
+        calculate_size(style.margin_bottom, vertical),
+        calculate_size(style.margin_left, horizontal),
+
+        calculate_size(style.border_top_width, horizontal),
+        calculate_size(style.border_right_width, vertical),
+        calculate_size(style.border_bottom_width, horizontal),
+        calculate_size(style.border_left_width, vertical),
+
+        calculate_size(style.padding_top, horizontal),
+        calculate_size(style.padding_right, vertical),
+        calculate_size(style.padding_bottom, horizontal),
+        calculate_size(style.padding_left, vertical),
+    )
 
 
 def calculate_size(value, context):
@@ -304,7 +1584,7 @@ def calculate_size(value, context):
         # This will also catch 0px, so we need to return 0 literally
         # to ensure that the calulated size is either an integer or AUTO
         return 0
-    return value.px(**context)
+    return resolution_cache.px(value, **context)
 
 
 ###########################################################################
@@ -312,36 +1592,13 @@ def calculate_size(value, context):
 ###########################################################################
 def calculate_width_and_margins(node, context):
     "Implements S10.3"
-    if is_float_positioned_element(node):
-        if node.intrinsic.is_replaced:  # 10.3.6
-            calculate_floating_replaced_width(node, context)
-        else:  # 10.3.5
-            calculate_floating_non_replaced_width(node, context)
-    elif is_absolute_positioned_element(node):
-        if node.intrinsic.is_replaced:  # 10.3.8
-            calculate_absolute_position_replaced_width(node, context)
-        else:  # 10.3.7
-            calculate_absolute_position_non_replaced_width(node, context)
-    elif is_inline_element(node):
-        if node.intrinsic.is_replaced:  # 10.3.2
-            calculate_inline_replaced_width(node, context)
-        else:  # 10.3.1
-            calculate_inline_non_replaced_width(node, context)
-    else:  # Normal flow
-        if is_block_level_element(node):
-            if node.intrinsic.is_replaced:  # 10.3.4
-                calculate_block_replaced_normal_flow_width(node, context)
-            else:  # 10.3.3
-                calculate_block_non_replaced_normal_flow_width(node, context)
-        elif is_inline_block_element(node):
-            if node.intrinsic.is_replaced:  # 10.3.10
-                calculate_inline_block_replaced_normal_flow_width(node, context)
-            else:  # 10.3.9
-                calculate_inline_block_non_replaced_normal_flow_width(node, context)
-        else:
-            # This branch should never execute.
-            # If it does, we've missed something along the way.
-            raise Exception("Unknown normal flow width calculation")  # pragma: no cover
+    WIDTH_CALCULATIONS[layout_kind(node)](node, context)
+
+
+def calculate_unknown_width(node, context):
+    # This should never execute.
+    # If it does, we've missed something along the way.
+    raise Exception("Unknown normal flow width calculation")  # pragma: no cover
 
 
 def calculate_inline_non_replaced_width(node, context):
@@ -358,15 +1615,16 @@ def calculate_inline_non_replaced_width(node, context):
 
 def calculate_inline_replaced_width(node, context):
     "Implements S10.3.2"
+    style = node.style.computed
     if node.layout.margin_left == AUTO:  # P1
         node.layout.margin_left = 0
 
     if node.layout.margin_right == AUTO:  # P1
         node.layout.margin_right = 0
 
-    if node.style.width is AUTO:
+    if style.width is AUTO:
         content_width = None
-        if node.style.height is AUTO:
+        if style.height is AUTO:
             if node.intrinsic.width is not None:  # P2
                 content_width = node.intrinsic.width
             elif node.intrinsic.height is not None and node.intrinsic.ratio is not None:  # P3
@@ -388,7 +1646,7 @@ def calculate_inline_replaced_width(node, context):
             else:  # P6
                 content_width = 300
     else:
-        content_width = node.style.width.px(**context)
+        content_width = resolution_cache.px(style.width, **context)
 
     node.layout.content_width = content_width
     node.layout.content_left = node.layout.margin_left + node.layout.border_left_width + node.layout.padding_left
@@ -396,14 +1654,15 @@ def calculate_inline_replaced_width(node, context):
 
 def calculate_block_non_replaced_normal_flow_width(node, context):
     "Implements S10.3.3"
-    if node.style.width is not AUTO:  # P2
-        content_width = node.style.width.px(**context)
-        if node.style.max_width is not None:  # 10.4 Maximum width
-            content_max_width = node.style.max_width.px(**context)
+    style = node.style.computed
+    if style.width is not AUTO:  # P2
+        content_width = resolution_cache.px(style.width, **context)
+        if style.max_width is not None:  # 10.4 Maximum width
+            content_max_width = resolution_cache.px(style.max_width, **context)
             if content_width > content_max_width:
                 content_width = content_max_width
-        if node.style.min_width is not AUTO:  # 10.4 Minimum width
-            content_min_width = node.style.min_width.px(**context)
+        if style.min_width is not AUTO:  # 10.4 Minimum width
+            content_min_width = resolution_cache.px(style.min_width, **context)
             if content_width < content_min_width:
                 content_width = content_min_width
         size = (
@@ -424,9 +1683,9 @@ def calculate_block_non_replaced_normal_flow_width(node, context):
                 node.layout.margin_right = 0
 
     if (node.layout.margin_left is not AUTO
-            and node.style.width is not AUTO
+            and style.width is not AUTO
             and node.layout.margin_right is not AUTO):  # P3
-        if node.style.direction is LTR:
+        if style.direction is LTR:
             node.layout.margin_right = (
                 context['size']
                 - node.layout.margin_left
@@ -448,7 +1707,7 @@ def calculate_block_non_replaced_normal_flow_width(node, context):
             )
 
     elif (node.layout.margin_left is AUTO
-            and node.style.width is not AUTO
+            and style.width is not AUTO
             and node.layout.margin_right is not AUTO):  # P4
         node.layout.margin_left = (
             context['size']
@@ -461,7 +1720,7 @@ def calculate_block_non_replaced_normal_flow_width(node, context):
         )
 
     elif (node.layout.margin_left is not AUTO
-            and node.style.width is AUTO
+            and style.width is AUTO
             and node.layout.margin_right is not AUTO):  # P4
         content_width = (
             context['size']
@@ -474,7 +1733,7 @@ def calculate_block_non_replaced_normal_flow_width(node, context):
         )
 
     elif (node.layout.margin_left is not AUTO
-            and node.style.width is not AUTO
+            and style.width is not AUTO
             and node.layout.margin_right is AUTO):  # P4
         node.layout.margin_right = (
             context['size']
@@ -486,7 +1745,7 @@ def calculate_block_non_replaced_normal_flow_width(node, context):
             - node.layout.border_right_width
         )
 
-    elif node.style.width is AUTO:  # P5
+    elif style.width is AUTO:  # P5
         if node.layout.margin_left is AUTO:
             node.layout.margin_left = 0
         if node.layout.margin_right is AUTO:
@@ -553,46 +1812,88 @@ def calculate_inline_block_non_replaced_normal_flow_width(node, context):
     raise NotImplementedError("Section 10.3.9")  # pragma: no cover
 
 
+def calculate_flex_item_non_replaced_width(node, context):
+    "Implements css-flexbox-1 9.4 and 9.7 for the width of a flex item"
+    style = node.style.computed
+    if node.layout.margin_left is AUTO:
+        node.layout.margin_left = 0
+
+    if node.layout.margin_right is AUTO:
+        node.layout.margin_right = 0
+
+    if node.layout.flex_main_size is not None:
+        # The main size of an item in a row is resolved by its container.
+        content_width = node.layout.flex_main_size
+    elif style.width is not AUTO:
+        content_width = resolution_cache.px(style.width, **context)
+    elif node.intrinsic.width is not None and not node.children and flex_alignment(node) is not STRETCH:
+        content_width = node.intrinsic.width
+    else:
+        # Stretch the item to the width of its container.
+        content_width = max(
+            context['size']
+            - node.layout.margin_left
+            - node.layout.border_left_width
+            - node.layout.padding_left
+            - node.layout.padding_right
+            - node.layout.border_right_width
+            - node.layout.margin_right,
+            0
+        )
+
+    node.layout.content_width = content_width
+
+
+def calculate_flex_item_replaced_width(node, context):
+    "Implements css-flexbox-1 9.4 and 9.7 for the width of a replaced flex item"
+    calculate_inline_replaced_width(node, context)
+    if node.layout.flex_main_size is not None:
+        node.layout.content_width = node.layout.flex_main_size
+
+
 def calculate_inline_block_replaced_normal_flow_width(node, context):
     "Implements S10.3.10"
     raise NotImplementedError("Section 10.3.10")  # pragma: no cover
 
 
+# The width calculation for each layout kind.
+WIDTH_CALCULATIONS = (
+    calculate_floating_non_replaced_width,  # 10.3.5
+    calculate_floating_replaced_width,  # 10.3.6
+    calculate_absolute_position_non_replaced_width,  # 10.3.7
+    calculate_absolute_position_replaced_width,  # 10.3.8
+    calculate_inline_non_replaced_width,  # 10.3.1
+    calculate_inline_replaced_width,  # 10.3.2
+    calculate_block_non_replaced_normal_flow_width,  # 10.3.3
+    calculate_block_replaced_normal_flow_width,  # 10.3.4
+    calculate_inline_block_non_replaced_normal_flow_width,  # 10.3.9
+    calculate_inline_block_replaced_normal_flow_width,  # 10.3.10
+    calculate_unknown_width,
+    calculate_unknown_width,
+    calculate_flex_item_non_replaced_width,  # css-flexbox-1 9.7
+    calculate_flex_item_replaced_width,  # css-flexbox-1 9.7
+)
+
+# The section of the spec implemented by each width calculation.
+WIDTH_SECTIONS = (
+    '10.3.5', '10.3.6', '10.3.7', '10.3.8', '10.3.1',
+    '10.3.2', '10.3.3', '10.3.4', '10.3.9', '10.3.10',
+    'unknown', 'unknown', 'flex 9.7', 'flex 9.7',
+)
+
+
 ###########################################################################
 # Section 10.6: Calculating heights and margins
 ###########################################################################
 def calculate_height_and_margins(node, context):
     "Implements S10.6"
-    if is_float_positioned_element(node):
-        if node.intrinsic.is_replaced:  # 10.6.6
-            calculate_floating_replaced_height(node, context)
-        else:  # 10.6.5
-            calculate_floating_non_replaced_height(node, context)
-    elif is_absolute_positioned_element(node):
-        if node.intrinsic.is_replaced:  # 10.6.8
-            calculate_absolute_position_replaced_height(node, context)
-        else:  # 10.6.7
-            calculate_absolute_position_non_replaced_height(node, context)
-    elif is_inline_element(node):
-        if node.intrinsic.is_replaced:  # 10.6.2
-            calculate_inline_replaced_height(node, context)
-        else:  # 10.6.1
-            calculate_inline_non_replaced_height(node, context)
-    else:  # Normal flow
-        if is_block_level_element(node):
-            if node.intrinsic.is_replaced:  # 10.6.4
-                calculate_block_replaced_normal_flow_height(node, context)
-            else:  # 10.6.3
-                calculate_block_non_replaced_normal_flow_height(node, context)
-        elif is_inline_block_element(node):
-            if node.intrinsic.is_replaced:  # 10.6.10
-                calculate_inline_block_replaced_normal_flow_height(node, context)
-            else:  # 10.6.9
-                calculate_inline_block_non_replaced_normal_flow_height(node, context)
-        else:
-            # This branch should never execute.
-            # If it does, we've missed something along the way.
-            raise Exception("Unknown normal flow height calculation")  # pragma: no cover
+    HEIGHT_CALCULATIONS[layout_kind(node)](node, context)
+
+
+def calculate_unknown_height(node, context):
+    # This should never execute.
+    # If it does, we've missed something along the way.
+    raise Exception("Unknown normal flow height calculation")  # pragma: no cover
 
 
 def calculate_inline_non_replaced_height(node, context):
@@ -603,22 +1904,23 @@ def calculate_inline_non_replaced_height(node, context):
 
 def calculate_inline_replaced_height(node, context):
     "Implements S10.6.2"
+    style = node.style.computed
     if node.layout.margin_top is AUTO:  # P1
         node.layout.margin_top = 0
 
     if node.layout.margin_bottom is AUTO:  # P1
         node.layout.margin_bottom = 0
 
-    if node.style.width is AUTO and node.style.height is AUTO and node.intrinsic.height is not None:  # P2
+    if style.width is AUTO and style.height is AUTO and node.intrinsic.height is not None:  # P2
         content_height = node.intrinsic.height
-    elif node.style.height is AUTO and node.intrinsic.ratio:  # P3
+    elif style.height is AUTO and node.intrinsic.ratio:  # P3
         content_height = node.layout.content_width * node.intrinsic.ratio
-    elif node.style.height is AUTO and node.intrinsic.height:  # P4
+    elif style.height is AUTO and node.intrinsic.height:  # P4
         content_height = node.intrinsic.height
-    elif node.style.height is AUTO:  # P5
+    elif style.height is AUTO:  # P5
         content_height = min(node.layout.content_width // 2, 150)
     else:
-        content_height = node.style.height.px(**context)
+        content_height = resolution_cache.px(style.height, **context)
 
     node.layout.content_height = content_height
     node.layout.content_top += node.layout.margin_top + node.layout.border_top_width + node.layout.padding_top
@@ -626,41 +1928,52 @@ def calculate_inline_replaced_height(node, context):
 
 def calculate_block_non_replaced_normal_flow_height(node, context):
     "Implements S10.6.3"
+    style = node.style.computed
     if node.layout.margin_top is AUTO:  # P2
         node.layout.margin_top = 0
 
     if node.layout.margin_bottom is AUTO:  # P2
         node.layout.margin_bottom = 0
 
-    if node.style.height is AUTO:  # P3
-        # if node.children and node.has_inline_formatting_content: # P4.1
-        #     content_height = bottom edge of last line box
-        # elif node.children and node.children[-1] non collapsing with bottom margin:
-        if node.children and node.children[-1]:
-            last_child = node.children[-1]
-            content_height = last_child.layout.border_box_bottom
+    if style.height is AUTO:  # P3
+        if node.layout.lines and formatting_context(node) == INLINE_FORMATTING_CONTEXT:  # P4.1
+            # The bottom edge of the last line box.
+            last_line = node.layout.lines[-1]
+            content_height = last_line[2] + last_line[3]
+        elif node.layout.flex_lines and formatting_context(node) == FLEX_FORMATTING_CONTEXT:
+            # css-flexbox-1 9.4 - the extent of the flex lines.
+            if style.flex_direction is ROW or style.flex_direction is ROW_REVERSE:
+                last_line = node.layout.flex_lines[-1]
+                content_height = last_line[3] + last_line[4]
+            else:
+                content_height = max(line[2] for line in node.layout.flex_lines)
+        else:
+            # The last child in the box tree, which may be an anonymous box.
+            last_child = last_box_child(node)
+            if last_child is not None:
+                content_height = last_child.layout.border_box_bottom
 
-            # Merge the margin of the last child with
-            # the margin of the last child.
-            node.layout.collapse_bottom = last_child.layout.collapse_bottom
+                # Merge the margin of the last child with
+                # the margin of the last child.
+                node.layout.collapse_bottom = last_child.layout.collapse_bottom
 
-        # elif node.children and node.children[-1] top margin non collapsing with bottom margin:
-        #     content_height = bottom border edge of bottom margin
-        else:
-            if node.style.min_height is not AUTO:  # 10.7 Minimum height
-                content_height = node.style.min_height.px(**context)
+            # elif node.children and node.children[-1] top margin non collapsing with bottom margin:
+            #     content_height = bottom border edge of bottom margin
             else:
-                content_height = 0
+                if style.min_height is not AUTO:  # 10.7 Minimum height
+                    content_height = resolution_cache.px(style.min_height, **context)
+                else:
+                    content_height = 0
     else:
-        if node.parent is not None and node.parent.style.height is not AUTO:
-            parent_height = node.parent.style.height.px(**context)
-            content_height = node.style.height.px(
-                display=context['display'], font=context['font'], size=parent_height
+        if node.parent is not None and node.parent.style.computed.height is not AUTO:
+            parent_height = resolution_cache.px(node.parent.style.computed.height, **context)
+            content_height = resolution_cache.px(
+                style.height, display=context['display'], font=context['font'], size=parent_height
             )
         else:
-            content_height = node.style.height.px(**context)
-        if node.style.max_height is not None:  # 10.7 Maximum height
-            content_max_height = node.style.max_height.px(**context)
+            content_height = resolution_cache.px(style.height, **context)
+        if style.max_height is not None:  # 10.7 Maximum height
+            content_max_height = resolution_cache.px(style.max_height, **context)
             if content_height > content_max_height:
                 content_height = content_max_height
 
@@ -701,3 +2014,50 @@ def calculate_inline_block_non_replaced_normal_flow_height(node, context):
 def calculate_inline_block_replaced_normal_flow_height(node, context):
     "Implements S10.6.10"
     raise NotImplementedError("Section 10.6.10")  # pragma: no cover
+
+
+def calculate_flex_item_non_replaced_height(node, context):
+    "Implements css-flexbox-1 9.4 for the height of a flex item"
+    style = node.style.computed
+    if style.height is AUTO and not node.children and node.intrinsic.height is not None:
+        if node.layout.margin_top is AUTO:
+            node.layout.margin_top = 0
+
+        if node.layout.margin_bottom is AUTO:
+            node.layout.margin_bottom = 0
+
+        node.layout.content_height = node.intrinsic.height
+    else:
+        # The height of the content of a flex item is evaluated as a block.
+        calculate_block_non_replaced_normal_flow_height(node, context)
+
+
+def calculate_flex_item_replaced_height(node, context):
+    "Implements css-flexbox-1 9.4 for the height of a replaced flex item"
+    calculate_inline_replaced_height(node, context)
+
+
+# The height calculation for each layout kind.
+HEIGHT_CALCULATIONS = (
+    calculate_floating_non_replaced_height,  # 10.6.5
+    calculate_floating_replaced_height,  # 10.6.6
+    calculate_absolute_position_non_replaced_height,  # 10.6.7
+    calculate_absolute_position_replaced_height,  # 10.6.8
+    calculate_inline_non_replaced_height,  # 10.6.1
+    calculate_inline_replaced_height,  # 10.6.2
+    calculate_block_non_replaced_normal_flow_height,  # 10.6.3
+    calculate_block_replaced_normal_flow_height,  # 10.6.4
+    calculate_inline_block_non_replaced_normal_flow_height,  # 10.6.9
+    calculate_inline_block_replaced_normal_flow_height,  # 10.6.10
+    calculate_unknown_height,
+    calculate_unknown_height,
+    calculate_flex_item_non_replaced_height,  # css-flexbox-1 9.4
+    calculate_flex_item_replaced_height,  # css-flexbox-1 9.4
+)
+
+# The section of the spec implemented by each height calculation.
+HEIGHT_SECTIONS = (
+    '10.6.5', '10.6.6', '10.6.7', '10.6.8', '10.6.1',
+    '10.6.2', '10.6.3', '10.6.4', '10.6.9', '10.6.10',
+    'unknown', 'unknown', 'flex 9.4', 'flex 9.4',
+)
@@ -0,0 +1,150 @@
+"""Font metrics, and the measurement of text.
+
+The layout engine doesn't measure text itself; the host provides a
+FontMetrics, backed by its own text API, and passes it to
+`engine.layout()`. Every measurement is made through the provider's
+MeasurementCache, so each distinct run of text is measured once per font
+and spacing; the runs that must be measured for a layout are passed to
+the provider in a single batch.
+"""
+from collections import OrderedDict
+
+
+class Font:
+    """A font of a given size, in points.
+
+    The em, ex and ch sizes of the font (in points) are used to resolve
+    font-relative units. This implementation approximates ex and ch from
+    the size of the font; a FontMetrics can provide fonts with the
+    actual metrics of the typeface.
+    """
+    def __init__(self, size):
+        self.size = size
+
+    def __repr__(self):
+        return '<Font {}pt>'.format(self.size)
+
+    def __eq__(self, other):
+        return type(self) is type(other) and self.size == other.size
+
+    def __hash__(self):
+        return hash(('Font', self.size))
+
+    @property
+    def em(self):
+        return self.size
+
+    @property
+    def ex(self):
+        return 0.65 * self.size
+
+    @property
+    def ch(self):
+        return 0.71 * self.size
+
+
+class FontMetrics:
+    """A provider of fonts, and the measurement of text in those fonts.
+
+    Hosts subclass FontMetrics, implementing `measure()` (and, if their
+    text API can measure many runs in one call, `measure_many()`).
+    Fonts must be hashable, and must have em, ex and ch attributes giving
+    their sizes in points.
+
+    `measurements` is the cache through which the engine measures text;
+    `maxsize` is the number of measurements it retains.
+    """
+    def __init__(self, default_font=None, maxsize=10000):
+        self.default_font = default_font if default_font is not None else Font(12)
+        self.measurements = MeasurementCache(self, maxsize=maxsize)
+
+    def font(self, style):
+        "Return the font used to display content with the given computed style."
+        return self.default_font
+
+    def measure(self, font, text, letter_spacing=0, word_spacing=0):
+        """Return the advance width of a run of text in a font, in pixels.
+
+        `letter_spacing` and `word_spacing` are the additional spacing
+        (in pixels) between letters and words (Section 16.4).
+        """
+        raise NotImplementedError('{} must implement measure()'.format(type(self).__name__))
+
+    def measure_many(self, font, runs, letter_spacing=0, word_spacing=0):
+        "Return the advance width of each run of text in `runs`, in pixels."
+        return [self.measure(font, text, letter_spacing, word_spacing) for text in runs]
+
+
+class MeasurementCache:
+    """A cache of the advance widths of runs of text.
+
+    Measurements are keyed on the font, the text, and the spacing. Once
+    the cache holds `maxsize` measurements, the least recently used
+    measurement is discarded to make room for a new one.
+    """
+    def __init__(self, metrics, maxsize=10000):
+        self.metrics = metrics
+        self.maxsize = maxsize
+        self._widths = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._widths)
+
+    def _store(self, key, width):
+        self._widths[key] = width
+        if len(self._widths) > self.maxsize:
+            self._widths.popitem(last=False)
+
+    def measure(self, font, text, letter_spacing=0, word_spacing=0):
+        "Return the advance width of a run of text in a font, in pixels."
+        key = (font, text, letter_spacing, word_spacing)
+        try:
+            width = self._widths[key]
+            self._widths.move_to_end(key)
+            self.hits += 1
+            return width
+        except KeyError:
+            pass
+
+        self.misses += 1
+        width = self.metrics.measure(font, text, letter_spacing, word_spacing)
+        self._store(key, width)
+        return width
+
+    def measure_many(self, font, runs, letter_spacing=0, word_spacing=0):
+        """Return the advance width of each run of text in `runs`, in pixels.
+
+        Runs that aren't in the cache are measured with a single call to
+        the `measure_many()` method of the provider.
+        """
+        widths = {}
+        missing = []
+        for text in runs:
+            if text in widths:
+                # A repeated run is only measured once.
+                self.hits += 1
+                continue
+            key = (font, text, letter_spacing, word_spacing)
+            try:
+                widths[text] = self._widths[key]
+                self._widths.move_to_end(key)
+                self.hits += 1
+            except KeyError:
+                widths[text] = None
+                missing.append(text)
+
+        if missing:
+            self.misses += len(missing)
+            for text, width in zip(missing, self.metrics.measure_many(font, missing, letter_spacing, word_spacing)):
+                widths[text] = width
+                self._store((font, text, letter_spacing, word_spacing), width)
+
+        return [widths[text] for text in runs]
+
+    def clear(self):
+        "Remove all cached measurements, and reset the hit and miss counters."
+        self._widths.clear()
+        self.hits = 0
+        self.misses = 0
@@ -0,0 +1,173 @@
+"""Statistics describing where the layout engine spends its time.
+
+Instrumentation is opt-in: `engine.layout(..., instrument=True)` returns a
+LayoutStats describing the layout. When instrumentation is disabled, the
+engine doesn't collect any statistics.
+
+Every function registered with `add_exporter()` is invoked with the stats
+of each instrumented layout; e.g., to forward them to a metrics pipeline::
+
+    def send_to_statsd(stats):
+        for name, value in stats.as_dict()['counters'].items():
+            statsd.incr('layout.' + name, value)
+
+    add_exporter(send_to_statsd)
+
+A LayoutStats created with `trace=True` also records a timeline of the
+layout, with a span for the layout of each box, that can be written as
+Chrome trace-event JSON and opened in Perfetto or chrome://tracing::
+
+    stats = layout(display, root, instrument=LayoutStats(trace=True))
+    with open('layout.json', 'w') as f:
+        stats.write_trace(f)
+"""
+import json
+from time import perf_counter
+
+# Phases of the layout that are timed.
+STYLES = 'styles'
+SIZES = 'sizes'
+WIDTH = 'width'
+HEIGHT = 'height'
+ANONYMIZE = 'anonymize'
+RELATIVE_OFFSET = 'relative_offset'
+MEASURE = 'measure'
+TOTAL = 'total'
+
+# Caches whose hit rate is recorded.
+RESOLUTION_CACHE = 'resolution'
+BOX_SIZES_CACHE = 'box_sizes'
+TEXT_CACHE = 'text'
+
+
+class LayoutStats:
+    """Statistics describing a single layout.
+
+    nodes: The number of boxes visited.
+    laid_out: The number of boxes whose layout was evaluated.
+    retained: The number of boxes whose previous layout was retained.
+    lines_broken: The number of line boxes built by breaking inline content.
+    lines_retained: The number of line boxes retained from the previous layout.
+    paths: The number of times each section of the spec was evaluated,
+        keyed on section; e.g., {'10.3.3': 12, '10.6.3': 12}.
+    times: The time spent in each phase of the layout, in seconds.
+    caches: The (hits, misses) of each cache during the layout.
+    trace: The trace events recorded during the layout, or None if the
+        layout isn't being traced.
+    """
+    def __init__(self, trace=False):
+        self.nodes = 0
+        self.laid_out = 0
+        self.retained = 0
+        self.lines_broken = 0
+        self.lines_retained = 0
+        self.paths = {}
+        self.times = {}
+        self.caches = {}
+        self.trace = [] if trace else None
+        self._origin = perf_counter()
+
+    def __repr__(self):
+        return '<LayoutStats %s nodes (%s laid out, %s retained) in %.3fms>' % (
+            self.nodes, self.laid_out, self.retained, self.times.get(TOTAL, 0) * 1000
+        )
+
+    def count(self, path):
+        "Record an evaluation of a section of the spec."
+        try:
+            self.paths[path] += 1
+        except KeyError:
+            self.paths[path] = 1
+
+    def add_time(self, phase, seconds):
+        "Add to the time spent in a phase of the layout."
+        self.times[phase] = self.times.get(phase, 0) + seconds
+
+    def timed(self, phase, function, *args):
+        "Invoke `function`, adding the time it takes to the given phase."
+        start = perf_counter()
+        try:
+            return function(*args)
+        finally:
+            self.add_time(phase, perf_counter() - start)
+
+    def add_cache(self, name, hits, misses):
+        "Add to the hits and misses of a cache."
+        old_hits, old_misses = self.caches.get(name, (0, 0))
+        self.caches[name] = (old_hits + hits, old_misses + misses)
+
+    def hit_rate(self, name):
+        "The proportion of lookups in a cache that were hits, or None if the cache wasn't used."
+        hits, misses = self.caches.get(name, (0, 0))
+        if hits + misses == 0:
+            return None
+        return hits / (hits + misses)
+
+    def add_span(self, name, start, end, args=None):
+        """Record a span of the timeline in the trace.
+
+        `start` and `end` are values of time.perf_counter().
+        """
+        self.trace.append({
+            'name': name,
+            'cat': 'layout',
+            'ph': 'X',
+            'ts': (start - self._origin) * 1e6,
+            'dur': (end - start) * 1e6,
+            'pid': 1,
+            'tid': 1,
+            'args': args or {},
+        })
+
+    def trace_events(self):
+        "Return the trace as a Chrome trace-event document."
+        return {
+            'traceEvents': self.trace,
+            'displayTimeUnit': 'ms',
+        }
+
+    def write_trace(self, f):
+        "Write the trace to a file, as Chrome trace-event JSON."
+        json.dump(self.trace_events(), f)
+
+    def as_dict(self):
+        "Return the statistics as a dictionary of plain values, for serialization."
+        return {
+            'counters': {
+                'nodes': self.nodes,
+                'laid_out': self.laid_out,
+                'retained': self.retained,
+                'lines_broken': self.lines_broken,
+                'lines_retained': self.lines_retained,
+            },
+            'paths': dict(self.paths),
+            'times': dict(self.times),
+            'caches': {
+                name: {'hits': hits, 'misses': misses, 'hit_rate': self.hit_rate(name)}
+                for name, (hits, misses) in self.caches.items()
+            },
+        }
+
+
+######################################################################
+# Exporting statistics
+######################################################################
+
+_exporters = []
+
+
+def add_exporter(exporter):
+    "Invoke `exporter` with the LayoutStats of every instrumented layout."
+    _exporters.append(exporter)
+    return exporter
+
+
+def remove_exporter(exporter):
+    "Stop invoking an exporter registered with add_exporter()."
+    _exporters.remove(exporter)
+
+
+def export(stats):
+    "Pass the stats of a layout to every registered exporter."
+    for exporter in _exporters:
+        exporter(stats)
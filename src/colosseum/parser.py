@@ -1,5 +1,6 @@
 from ast import literal_eval
 from collections import Sequence
+from functools import lru_cache
 
 from .colors import NAMED_COLOR, hsl, rgb
 from .exceptions import ValidationError
@@ -20,20 +21,40 @@ def units(value):
     """
     if isinstance(value, Unit):
         return value
-    elif isinstance(value, (int, float)):
+    elif isinstance(value, (int, float, str)):
+        return _units(value)
+
+    raise ValueError('Unknown size %s' % value)
+
+
+@lru_cache(maxsize=4096, typed=True)
+def _units(value):
+    """Parse a unit value from a number or string.
+
+    Units are immutable, so the parsed value is cached; parsing the
+    same value again returns the same instance.
+    """
+    if not isinstance(value, str):
         return value * px
-    elif isinstance(value, str):
-        for suffix, unit in Unit.UNITS:
-            if value.endswith(suffix):
-                try:
-                    return float(value[:-len(suffix)]) * unit
-                except ValueError:
-                    pass
 
-        try:
-            return float(value) * px
-        except ValueError:
-            pass
+    # Find the run of letters (or %) at the end of the value, and
+    # look up the longest registered suffix that it ends with.
+    start = len(value)
+    while start > 0 and (value[start - 1].isalpha() or value[start - 1] == '%'):
+        start -= 1
+
+    for index in range(start, len(value)):
+        unit = Unit.UNITS.get(value[index:])
+        if unit is not None:
+            try:
+                return float(value[:index]) * unit
+            except ValueError:
+                pass
+
+    try:
+        return float(value) * px
+    except ValueError:
+        pass
 
     raise ValueError('Unknown size %s' % value)
 
@@ -14,6 +14,9 @@ class Rect:
                 and other._left == self._left
                 and other._bottom == self._bottom)
 
+    def __hash__(self):
+        return hash((self._top, self._right, self._left, self._bottom))
+
     def __repr__(self):
         return 'rect({top}, {right}, {left}, {bottom})'.format(
             top=self._top, right=self._right, left=self._left, bottom=self._bottom
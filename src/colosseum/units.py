@@ -10,12 +10,37 @@ LU_PER_PIXEL = 64
 
 
 class BaseUnit:
-    UNITS = []
+    """A value with a unit.
+
+    Units are immutable and hashable, so that instances can be shared.
+    """
+    # The registry of known units, mapping each suffix
+    # to the unit with that suffix and a value of 1.
+    UNITS = {}
+
+    __slots__ = ('suffix', 'val')
 
     def __init__(self, suffix, val=None):
-        BaseUnit.UNITS.append((suffix, self))
-        self.suffix = suffix
-        self.val = val if val is not None else 1
+        object.__setattr__(self, 'suffix', suffix)
+        object.__setattr__(self, 'val', val if val is not None else 1)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Unit values can't be modified")
+
+    # Unit values are immutable, so a copy is the value itself.
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __reduce__(self):
+        # Values are pickled by suffix, and restored from the registered
+        # unit with that suffix; see register().
+        return (_restore_unit, (self.suffix, self.val))
+
+    def __hash__(self):
+        return hash((self.suffix, self.val))
 
     def __repr__(self):
         int_value = int(self.val)
@@ -36,7 +61,13 @@ class BaseUnit:
             return self.dup(self.val * -1.0)
 
 
+def _restore_unit(suffix, val):
+    "Recreate a pickled unit value."
+    return BaseUnit.UNITS[suffix].dup(val)
+
+
 class Unit(BaseUnit):
+    __slots__ = ()
 
     def lu(self, display=None, font=None, size=None):
         return round(LU_PER_PIXEL * self.val)
@@ -47,11 +78,21 @@ class Unit(BaseUnit):
         int_value = int(value)
         return int_value if value == int_value else value
 
+    def context(self, display=None, font=None, size=None):
+        """Return the part of the context that the pixel size depends on.
+
+        Two evaluations of the same unit with the same context
+        will always produce the same pixel size.
+        """
+        return None
+
 
 class AngleUnit(BaseUnit):
+    __slots__ = ('scale',)
+
     def __init__(self, suffix, scale, val=None):
         super().__init__(suffix, val)
-        self.scale = scale
+        object.__setattr__(self, 'scale', scale)
 
     def deg(self):
         value = self.val * self.scale
@@ -66,8 +107,12 @@ class AngleUnit(BaseUnit):
             return self.val == other.val and self.suffix == other.suffix
         return False
 
+    __hash__ = BaseUnit.__hash__
+
 
 class PixelUnit(Unit):
+    __slots__ = ()
+
     def __init__(self, val=None):
         super().__init__('px', val)
 
@@ -81,11 +126,20 @@ class PixelUnit(Unit):
             return self.val == other.val
         return False
 
+    def __hash__(self):
+        # Pixel units compare equal to integers, so they must hash the same.
+        return hash(self.val)
+
 
 class FontUnit(Unit):
+    __slots__ = ()
+
     def lu(self, display=None, font=None, size=None):
         return round(LU_PER_PIXEL * self.val * (getattr(font, self.suffix) / 72) * display.dpi)
 
+    def context(self, display=None, font=None, size=None):
+        return (getattr(font, self.suffix), display.dpi)
+
     def dup(self, val):
         return FontUnit(self.suffix, val)
 
@@ -94,15 +148,22 @@ class FontUnit(Unit):
             return self.val == other.val and self.suffix == other.suffix
         return False
 
+    __hash__ = BaseUnit.__hash__
+
 
 class AbsoluteUnit(Unit):
+    __slots__ = ('scale',)
+
     def __init__(self, suffix, scale, val=None):
         super().__init__(suffix, val)
-        self.scale = scale
+        object.__setattr__(self, 'scale', scale)
 
     def lu(self, display=None, font=None, size=None):
         return round(LU_PER_PIXEL * self.val * (self.scale / 72) * display.dpi)
 
+    def context(self, display=None, font=None, size=None):
+        return display.dpi
+
     def dup(self, val):
         return AbsoluteUnit(self.suffix, self.scale, val)
 
@@ -111,15 +172,22 @@ class AbsoluteUnit(Unit):
             return self.val == other.val and self.suffix == other.suffix
         return False
 
+    __hash__ = BaseUnit.__hash__
+
 
 class ViewportUnit(Unit):
+    __slots__ = ('scale',)
+
     def __init__(self, suffix, scale, val=None):
         super().__init__(suffix, val)
-        self.scale = scale
+        object.__setattr__(self, 'scale', scale)
 
     def lu(self, display=None, font=None, size=None):
         return round(LU_PER_PIXEL * self.val * self.scale(display) / 100)
 
+    def context(self, display=None, font=None, size=None):
+        return self.scale(display)
+
     def dup(self, val):
         return ViewportUnit(self.suffix, self.scale, val)
 
@@ -128,14 +196,21 @@ class ViewportUnit(Unit):
             return self.val == other.val and self.suffix == other.suffix
         return False
 
+    __hash__ = BaseUnit.__hash__
+
 
 class Percent(Unit):
+    __slots__ = ()
+
     def __init__(self, val=None):
         super().__init__('%', val)
 
     def lu(self, display=None, font=None, size=None):
         return round(LU_PER_PIXEL * self.val / 100.0 * size)
 
+    def context(self, display=None, font=None, size=None):
+        return size
+
     def dup(self, val):
         return Percent(val)
 
@@ -144,27 +219,78 @@ class Percent(Unit):
             return self.val == other.val and self.suffix == other.suffix
         return False
 
-
-px = PixelUnit()
-
-em = FontUnit('em')
-ex = FontUnit('ex')
-ch = FontUnit('ch')
-
-pt = AbsoluteUnit('pt', 1)
-pc = AbsoluteUnit('pc', 12)
-inch = AbsoluteUnit('in', 72)
-cm = AbsoluteUnit('cm', 28.3465)
-mm = AbsoluteUnit('mm', 2.83465)
-
-vh = ViewportUnit('vh', lambda d: d.content_height)
-vmax = ViewportUnit('vmax', lambda d: max(d.content_width, d.content_height))
-vmin = ViewportUnit('vmin', lambda d: min(d.content_width, d.content_height))
-vw = ViewportUnit('vw', lambda d: d.content_width)
-
-percent = Percent()
-
-deg = AngleUnit('deg', 1)
-grad = AngleUnit('grad', 0.9)
-rad = AngleUnit('rad', 180/math.pi)
-turn = AngleUnit('turn', 360)
+    __hash__ = BaseUnit.__hash__
+
+
+class ResolutionCache:
+    """A cache of the pixel sizes of unit values.
+
+    Resolved sizes are keyed on the unit suffix and value, and the part of the
+    context that the unit depends on (see `Unit.context()`); e.g.,
+    10px resolves to the same size on any display, but 10% must be
+    resolved for each containing block size.
+
+    The cache is cleared when it exceeds `maxsize` entries.
+    """
+    def __init__(self, maxsize=4096):
+        self.maxsize = maxsize
+        self._values = {}
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._values)
+
+    def px(self, value, display=None, font=None, size=None):
+        "Return the pixel size of `value` in the given context."
+        key = (value.suffix, value.val, value.context(display, font, size))
+        try:
+            result = self._values[key]
+            self.hits += 1
+            return result
+        except KeyError:
+            pass
+
+        self.misses += 1
+        result = value.px(display=display, font=font, size=size)
+        if len(self._values) >= self.maxsize:
+            self._values.clear()
+        self._values[key] = result
+        return result
+
+    def clear(self):
+        "Remove all cached values, and reset the hit and miss counters."
+        self._values.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+def register(unit):
+    "Register a unit, so it can be parsed using its suffix."
+    BaseUnit.UNITS[unit.suffix] = unit
+    return unit
+
+
+px = register(PixelUnit())
+
+em = register(FontUnit('em'))
+ex = register(FontUnit('ex'))
+ch = register(FontUnit('ch'))
+
+pt = register(AbsoluteUnit('pt', 1))
+pc = register(AbsoluteUnit('pc', 12))
+inch = register(AbsoluteUnit('in', 72))
+cm = register(AbsoluteUnit('cm', 28.3465))
+mm = register(AbsoluteUnit('mm', 2.83465))
+
+vh = register(ViewportUnit('vh', lambda d: d.content_height))
+vmax = register(ViewportUnit('vmax', lambda d: max(d.content_width, d.content_height)))
+vmin = register(ViewportUnit('vmin', lambda d: min(d.content_width, d.content_height)))
+vw = register(ViewportUnit('vw', lambda d: d.content_width))
+
+percent = register(Percent())
+
+deg = register(AngleUnit('deg', 1))
+grad = register(AngleUnit('grad', 0.9))
+rad = register(AngleUnit('rad', 180/math.pi))
+turn = register(AngleUnit('turn', 360))
@@ -5,6 +5,7 @@ Validate values of different css properties.
 import re
 
 from . import parser, units
+from .colors import Color
 from .exceptions import ValidationError
 
 
@@ -77,6 +78,7 @@ def is_length(value):
 
 
 is_length.description = '<length>'
+is_length.types = (int, float, str, units.Unit)
 
 
 def is_percentage(value):
@@ -93,6 +95,7 @@ def is_percentage(value):
 
 
 is_percentage.description = '<percentage>'
+is_percentage.types = (int, float, str, units.Unit)
 
 
 def is_color(value):
@@ -105,6 +108,7 @@ def is_color(value):
 
 
 is_color.description = '<color>'
+is_color.types = (str, Color)
 
 
 def is_border_spacing(value):
@@ -135,6 +139,7 @@ def is_rect(value):
 
 
 is_rect.description = '<rect>'
+is_rect.types = (str,)
 
 
 def is_quote(value):
@@ -170,6 +175,7 @@ def is_uri(value):
 
 
 is_uri.description = '<uri>'
+is_uri.types = (str,)
 
 
 def is_cursor(value):
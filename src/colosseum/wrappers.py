@@ -71,6 +71,9 @@ class Quotes:
     def __eq__(self, other):
         return self.__class__ == other.__class__ and self._quotes == other._quotes
 
+    def __hash__(self):
+        return hash(tuple(self._quotes))
+
     def opening(self, level):
         """Return the opening quote for the given level."""
         try:
@@ -0,0 +1,127 @@
+from unittest import mock
+
+from colosseum import engine
+from colosseum.constants import BLOCK, INLINE
+from colosseum.declaration import CSS
+from colosseum.engine import AnonymousBlockBox, export_geometry, layout
+
+from ..utils import LayoutTestCase, TestNode, summarize
+
+
+class BoxTreeTests(LayoutTestCase):
+    def inline(self, name='span'):
+        node = TestNode(name=name, style=CSS(display=INLINE))
+        node.intrinsic.width = 10
+        node.intrinsic.height = 10
+        return node
+
+    def build_document(self):
+        self.span1 = self.inline()
+        self.div = TestNode(name='div', style=CSS(display=BLOCK, height=20))
+        self.span2 = self.inline()
+        self.span3 = self.inline()
+        return TestNode(
+            name='div',
+            style=CSS(display=BLOCK, margin=5),
+            children=[self.span1, self.div, self.span2, self.span3],
+        )
+
+    def test_anonymous_boxes(self):
+        root = self.build_document()
+        layout(self.display, root)
+
+        # Each run of inline children is wrapped in an anonymous block box,
+        # including the run at the end of the block container.
+        first, div, last = root.layout.box_children
+        self.assertIsInstance(first, AnonymousBlockBox)
+        self.assertIs(div, self.div)
+        self.assertIsInstance(last, AnonymousBlockBox)
+        self.assertEqual(first.children, [self.span1])
+        self.assertEqual(last.children, [self.span2, self.span3])
+
+        # The anonymous boxes are laid out as blocks.
+        self.assertEqual(first.layout.content_width, 1014)
+        self.assertEqual(last.layout.absolute_content_top, 35)
+        self.assertEqual(last.layout.content_height, 10)
+        self.assertEqual(root.layout.box_children[-1].layout.border_box_bottom, 40)
+
+        # Boxes in an anonymous box are positioned relative to it.
+        self.assertIs(self.span2.layout.anonymous_parent, last.layout)
+        self.assertIsNone(self.div.layout.anonymous_parent)
+        self.assertEqual(self.span2.layout.absolute_content_top, 35)
+        self.assertEqual(self.span2.layout.absolute_content_left, 5)
+
+        geometry = export_geometry(root)
+        self.assertEqual(geometry.nodes.index(self.span2), 3)
+        row = geometry.row(3)
+        self.assertEqual((row['content_left'], row['content_top']), (5, 35))
+
+    def test_box_tree_retained(self):
+        root = self.build_document()
+        layout(self.display, root)
+        box_children = root.layout.box_children
+
+        with mock.patch.object(engine, 'anonymize', wraps=engine.anonymize) as anonymize:
+            layout(self.display, root)
+            self.span2.style.margin_left = 5
+            layout(self.display, root, incremental=True)
+
+        anonymize.assert_not_called()
+        self.assertIs(root.layout.box_children, box_children)
+
+    def test_layout_repeated(self):
+        # The height of a relatively positioned box is evaluated before its
+        # children are laid out, from its last child, an anonymous box.
+        root = self.build_document()
+        root.style.position = 'relative'
+        root.children[1].style.height = '50%'
+        layout(self.display, root)
+        expected = summarize(root)
+
+        # A full layout resets the anonymous boxes, so it doesn't use
+        # their layout from the previous layout.
+        layout(self.display, root)
+        self.assertEqual(summarize(root), expected)
+
+    def test_children_changed(self):
+        root = self.build_document()
+        layout(self.display, root)
+        first, div, last = root.layout.box_children
+
+        # Insert a block between the inline children
+        new_div = TestNode(name='div', style=CSS(display=BLOCK, height=30))
+        new_div.parent = root
+        root.children.insert(3, new_div)
+        root.layout.dirty = True
+        layout(self.display, root, incremental=True)
+
+        self.assertEqual(len(root.layout.box_children), 5)
+        # The existing anonymous boxes are reused
+        self.assertIs(root.layout.box_children[0], first)
+        self.assertIs(root.layout.box_children[2], last)
+        self.assertEqual(last.children, [self.span2])
+        self.assertEqual(root.layout.box_children[4].children, [self.span3])
+        self.assertEqual(self.span3.layout.absolute_content_top, 5 + 10 + 20 + 10 + 30)
+
+    def test_display_changed(self):
+        root = self.build_document()
+        layout(self.display, root)
+
+        self.span2.style.display = BLOCK
+        layout(self.display, root, incremental=True)
+
+        first, div, span2, last = root.layout.box_children
+        self.assertIs(span2, self.span2)
+        self.assertEqual(last.children, [self.span3])
+
+        # A child that isn't displayed doesn't generate a box
+        self.span3.style.display = 'none'
+        layout(self.display, root, incremental=True)
+        self.assertEqual(root.layout.box_children, [first, self.div, self.span2])
+        self.assertIsNone(self.span3.layout)
+
+        # ... until it is displayed again.
+        self.span3.style.display = INLINE
+        layout(self.display, root, incremental=True)
+        self.assertEqual(len(root.layout.box_children), 4)
+        self.assertIsNotNone(self.span3.layout)
@@ -0,0 +1,53 @@
+import sys
+
+from colosseum.constants import BLOCK
+from colosseum.declaration import CSS
+from colosseum.engine import layout
+
+from ..utils import LayoutTestCase, TestNode, summarize
+
+
+class DeepLayoutTests(LayoutTestCase):
+    # Deeper than the default recursion limit
+    DEPTH = sys.getrecursionlimit() * 3
+
+    def build_document(self):
+        self.leaf = TestNode(name='div', style=CSS(display=BLOCK, height=10))
+        node = self.leaf
+        for i in range(self.DEPTH - 1):
+            node = TestNode(name='div', style=CSS(display=BLOCK, padding_left=1), children=[node])
+        return node
+
+    def test_layout(self):
+        root = self.build_document()
+        layout(self.display, root)
+
+        self.assertEqual(self.leaf.layout.absolute_content_left, self.DEPTH - 1)
+        self.assertEqual(self.leaf.layout.content_width, 1024 - (self.DEPTH - 1))
+        self.assertEqual(root.children[0].layout.content_height, 10)
+
+        # The layout can be summarized
+        layout_summary = summarize(root)
+        for i in range(self.DEPTH - 1):
+            layout_summary = layout_summary['children'][0]
+        self.assertEqual(layout_summary['content']['position'], (self.DEPTH - 1, 0))
+
+    def test_dirty(self):
+        root = self.build_document()
+        layout(self.display, root)
+
+        root.layout.dirty = True
+        self.assertTrue(self.leaf.layout.dirty)
+
+        self.leaf.style.height = 20
+        layout(self.display, root, incremental=True)
+        self.assertEqual(root.layout.content_height, 768)
+        self.assertEqual(root.children[0].layout.content_height, 20)
+
+    def test_reset(self):
+        root = self.build_document()
+        layout(self.display, root)
+
+        root.layout.reset()
+        self.assertEqual(self.leaf.layout.content_width, 0)
+        self.assertTrue(self.leaf.layout.dirty)
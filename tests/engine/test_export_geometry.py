@@ -0,0 +1,117 @@
+from unittest import skipUnless
+
+from colosseum.constants import BLOCK
+from colosseum.declaration import CSS
+from colosseum.engine import Geometry, export_geometry, layout
+
+from ..utils import LayoutTestCase, TestNode
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+class ExportGeometryTests(LayoutTestCase):
+    def setUp(self):
+        super().setUp()
+        self.hidden = TestNode(
+            name='div',
+            style=CSS(display='none'),
+            children=[TestNode(name='div', style=CSS(display=BLOCK))],
+        )
+        self.grandchild = TestNode(
+            name='div',
+            style=CSS(display=BLOCK, height=10, margin=5, padding=3, border_width=2, border_style='solid'),
+            children=[self.hidden],
+        )
+        self.child1 = TestNode(
+            name='div',
+            style=CSS(display=BLOCK, height=10, margin=10),
+        )
+        self.child2 = TestNode(
+            name='div',
+            style=CSS(display=BLOCK, margin=(30, 20)),
+            children=[self.grandchild],
+        )
+        self.root = TestNode(
+            name='div',
+            style=CSS(display=BLOCK),
+            children=[self.child1, self.child2]
+        )
+        layout(self.display, self.root)
+
+    def test_preorder(self):
+        geometry = export_geometry(self.root)
+
+        self.assertEqual(len(geometry), 4)
+        self.assertEqual(geometry.nodes, [self.root, self.child1, self.child2, self.grandchild])
+        self.assertEqual(list(geometry.parents), [-1, 0, 0, 2])
+        self.assertEqual(len(geometry.boxes), 4 * len(Geometry.FIELDS))
+
+    def test_values(self):
+        geometry = export_geometry(self.root)
+
+        for index, node in enumerate(geometry.nodes):
+            self.assertEqual(
+                geometry.row(index),
+                {
+                    'content_left': node.layout.absolute_content_left,
+                    'content_top': node.layout.absolute_content_top,
+                    'content_width': node.layout.content_width,
+                    'content_height': node.layout.content_height,
+                    'padding_box_left': node.layout.absolute_padding_box_left,
+                    'padding_box_top': node.layout.absolute_padding_box_top,
+                    'padding_box_width': node.layout.padding_box_width,
+                    'padding_box_height': node.layout.padding_box_height,
+                    'border_box_left': node.layout.absolute_border_box_left,
+                    'border_box_top': node.layout.absolute_border_box_top,
+                    'border_box_width': node.layout.border_box_width,
+                    'border_box_height': node.layout.border_box_height,
+                    'margin_top': node.layout.margin_top,
+                    'margin_right': node.layout.margin_right,
+                    'margin_bottom': node.layout.margin_bottom,
+                    'margin_left': node.layout.margin_left,
+                }
+            )
+
+        self.assertEqual(
+            geometry.row(3),
+            {
+                'content_left': 30,
+                'content_top': 55,
+                'content_width': 964,
+                'content_height': 10,
+                'padding_box_left': 27,
+                'padding_box_top': 52,
+                'padding_box_width': 970,
+                'padding_box_height': 16,
+                'border_box_left': 25,
+                'border_box_top': 50,
+                'border_box_width': 974,
+                'border_box_height': 20,
+                'margin_top': 5,
+                'margin_right': 5,
+                'margin_bottom': 5,
+                'margin_left': 5,
+            }
+        )
+
+    def test_buffer_protocol(self):
+        geometry = export_geometry(self.root)
+
+        view = memoryview(geometry.boxes)
+        self.assertEqual(view.format, 'd')
+        self.assertEqual(view[len(Geometry.FIELDS) + 2], self.child1.layout.content_width)
+
+    @skipUnless(numpy, 'NumPy is not available')
+    def test_as_numpy(self):
+        geometry = export_geometry(self.root)
+
+        boxes = geometry.as_numpy()
+        self.assertEqual(boxes.shape, (4, len(Geometry.FIELDS)))
+        self.assertEqual(boxes[1, 2], self.child1.layout.content_width)
+
+        # The array is a view on the exported geometry.
+        geometry.boxes[len(Geometry.FIELDS) + 2] = 42
+        self.assertEqual(boxes[1, 2], 42)
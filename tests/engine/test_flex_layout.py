@@ -0,0 +1,193 @@
+from colosseum.constants import (
+    BLOCK, CENTER, COLUMN, FLEX, FLEX_END, HIDDEN, ROW_REVERSE, SPACE_BETWEEN, WRAP,
+)
+from colosseum.declaration import CSS
+from colosseum.engine import FLEX_ITEM_BOX, layout, layout_kind
+
+from ..utils import LayoutTestCase, TestNode, summarize
+
+
+class FlexLayoutTests(LayoutTestCase):
+    def item(self, **style):
+        return TestNode(name='item', style=CSS(display=BLOCK, **style))
+
+    def flex(self, items, **style):
+        self.container = TestNode(name='flex', style=CSS(display=FLEX, width=400, **style), children=items)
+        return TestNode(name='body', style=CSS(display=BLOCK), children=[self.container])
+
+    def boxes(self, items):
+        return [
+            (item.layout.content_left, item.layout.content_top, item.layout.content_width, item.layout.content_height)
+            for item in items
+        ]
+
+    def test_flex_items(self):
+        items = [self.item(width=100, height=20), self.item(height=10)]
+        layout(self.display, self.flex(items))
+
+        self.assertEqual(layout_kind(items[0]), FLEX_ITEM_BOX)
+        # The items are laid out in a row; the second item has no content,
+        # and is stretched to the height of the line.
+        self.assertEqual(self.boxes(items), [(0, 0, 100, 20), (100, 0, 0, 10)])
+        self.assertEqual(self.container.layout.content_height, 20)
+
+        # A container that stops being a flex container reclassifies its children.
+        self.container.style.display = BLOCK
+        layout(self.display, self.container.parent)
+        self.assertNotEqual(layout_kind(items[0]), FLEX_ITEM_BOX)
+        self.assertIsNone(self.container.layout.flex_lines)
+
+    def test_grow(self):
+        items = [self.item(width=100), self.item(flex_grow=1), self.item(width=50, flex_grow=3)]
+        layout(self.display, self.flex(items))
+
+        self.assertEqual([item.layout.content_width for item in items], [100, 62.5, 237.5])
+        self.assertEqual([item.layout.content_left for item in items], [0, 100, 162.5])
+
+    def test_shrink(self):
+        items = [self.item(width=300), self.item(width=100, flex_shrink=2), self.item(width=100, flex_shrink=0)]
+        layout(self.display, self.flex(items))
+
+        # 100px of overflow is removed in proportion to shrink * base size.
+        self.assertEqual([item.layout.content_width for item in items], [240, 60, 100])
+
+    def test_min_max_freeze(self):
+        items = [
+            self.item(flex_grow=1, max_width=50),
+            self.item(flex_grow=1),
+            self.item(flex_grow=1, min_width=200),
+        ]
+        layout(self.display, self.flex(items))
+
+        # The clamped items are frozen, and the free space they didn't use
+        # is distributed between the other items.
+        self.assertEqual([item.layout.content_width for item in items], [50, 150, 200])
+
+    def test_margins_padding(self):
+        items = [
+            self.item(width=100, margin=10, padding=5),
+            self.item(flex_grow=1, border_width=2, border_style='solid'),
+        ]
+        layout(self.display, self.flex(items))
+
+        self.assertEqual(self.boxes(items)[0], (15, 15, 100, 0))
+        # 400 - (10 + 5 + 100 + 5 + 10) - 4
+        self.assertEqual(items[1].layout.content_width, 266)
+        self.assertEqual(items[1].layout.content_left, 132)
+
+    def test_wrap(self):
+        items = [self.item(width=150, height=10 + i) for i in range(5)]
+        layout(self.display, self.flex(items, flex_wrap=WRAP))
+
+        self.assertEqual([line[:2] for line in self.container.layout.flex_lines], [(0, 2), (2, 4), (4, 5)])
+        self.assertEqual(
+            [(item.layout.content_left, item.layout.content_top) for item in items],
+            [(0, 0), (150, 0), (0, 11), (150, 11), (0, 24)],
+        )
+        self.assertEqual(self.container.layout.content_height, 38)
+
+    def test_justify_content(self):
+        items = [self.item(width=100), self.item(width=100)]
+        root = self.flex(items, justify_content=CENTER)
+        layout(self.display, root)
+        self.assertEqual([item.layout.content_left for item in items], [100, 200])
+
+        self.container.style.justify_content = SPACE_BETWEEN
+        layout(self.display, root)
+        self.assertEqual([item.layout.content_left for item in items], [0, 300])
+
+        self.container.style.justify_content = FLEX_END
+        self.container.style.flex_direction = ROW_REVERSE
+        layout(self.display, root)
+        self.assertEqual([item.layout.content_left for item in items], [100, 0])
+
+    def test_align_items(self):
+        items = [
+            self.item(width=10, height=40),
+            self.item(width=10, height=10),
+            self.item(width=10, align_self=CENTER),
+        ]
+        root = self.flex(items, align_items=FLEX_END)
+        layout(self.display, root)
+
+        self.assertEqual([item.layout.content_top for item in items], [0, 30, 20])
+        self.assertEqual(items[2].layout.content_height, 0)
+
+    def test_order(self):
+        items = [self.item(width=10, order=2), self.item(width=20), self.item(width=30, order=-1)]
+        layout(self.display, self.flex(items))
+
+        self.assertEqual([item.layout.content_left for item in items], [50, 30, 0])
+
+    def test_column(self):
+        items = [self.item(height=20), self.item(width=100, height=30), self.item(flex_grow=1)]
+        root = self.flex(items, flex_direction=COLUMN, height=100)
+        layout(self.display, root)
+
+        self.assertEqual(self.boxes(items), [(0, 0, 400, 20), (0, 20, 100, 30), (0, 50, 400, 50)])
+        self.assertEqual(self.container.layout.content_height, 100)
+
+        # A column of indefinite height is as tall as its items.
+        self.container.style.height = 'auto'
+        layout(self.display, root)
+        self.assertEqual(self.container.layout.content_height, 50)
+
+
+class IncrementalFlexLayoutTests(LayoutTestCase):
+    def build_document(self):
+        self.items = [
+            TestNode(name='item', style=CSS(display=BLOCK, width=50 + i, flex_shrink=1 + i % 2))
+            for i in range(20)
+        ]
+        self.container = TestNode(name='flex', style=CSS(display=FLEX, width=600), children=self.items)
+        return TestNode(name='body', style=CSS(display=BLOCK), children=[self.container])
+
+    def test_hypothetical_sizes_retained(self):
+        root = self.build_document()
+        items = self.items
+        layout(self.display, root)
+        sizes = [item.layout.flex_sizes for item in items]
+
+        items[3].style.width = 80
+        layout(self.display, root, incremental=True)
+
+        # Only the changed item's hypothetical size is evaluated again...
+        for index, item in enumerate(items):
+            if index == 3:
+                self.assertIsNot(item.layout.flex_sizes, sizes[index])
+            else:
+                self.assertIs(item.layout.flex_sizes, sizes[index])
+
+        # ... and the layout matches a full layout.
+        expected = self.build_document()
+        self.items[3].style.width = 80
+        layout(self.display, expected)
+        for item, expected_item in zip(items, self.items):
+            self.assertEqual(
+                (item.layout.content_left, item.layout.content_width),
+                (expected_item.layout.content_left, expected_item.layout.content_width),
+            )
+
+    def test_fixed_size_item(self):
+        # A fixed size item that doesn't let its content overflow would be
+        # a layout containment boundary, if it wasn't a flex item.
+        items = [
+            TestNode(
+                name='item',
+                style=CSS(display=BLOCK, width=100, height=50, overflow=HIDDEN),
+                children=[TestNode(name='div', style=CSS(display=BLOCK, height=10))],
+            )
+            for i in range(3)
+        ]
+        container = TestNode(name='flex', style=CSS(display=FLEX), children=items)
+        root = TestNode(name='body', style=CSS(display=BLOCK), children=[container])
+        layout(self.display, root)
+        self.assertFalse(items[2].layout.contains_layout)
+
+        items[2].children[0].style.height = 20
+        layout(self.display, root, incremental=True)
+        self.assertEqual([item.layout.content_left for item in items], [0, 100, 200])
+
+        incremental = summarize(root)
+        layout(self.display, root)
+        self.assertEqual(incremental, summarize(root))
@@ -0,0 +1,383 @@
+from unittest import mock
+
+from colosseum import engine
+from colosseum.constants import BLOCK
+from colosseum.declaration import CSS
+from colosseum.engine import layout
+
+from ..utils import LayoutTestCase, TestNode, summarize
+
+
+class IncrementalLayoutTests(LayoutTestCase):
+    def build_document(self):
+        self.grandchild = TestNode(
+            name='div',
+            style=CSS(display=BLOCK, height=10, margin=5),
+        )
+        self.child1 = TestNode(
+            name='div',
+            style=CSS(display=BLOCK, height=10, margin=10),
+        )
+        self.child2 = TestNode(
+            name='div',
+            style=CSS(display=BLOCK, height=10, margin=30),
+        )
+        self.child3 = TestNode(
+            name='div',
+            style=CSS(display=BLOCK, margin=20),
+            children=[self.grandchild],
+        )
+        return TestNode(
+            name='div',
+            style=CSS(display=BLOCK),
+            children=[self.child1, self.child2, self.child3]
+        )
+
+    def layout_counting(self, root, **kwargs):
+        "Lay out the document, returning the nodes that were re-evaluated."
+        with mock.patch.object(
+            engine, 'calculate_width_and_margins', wraps=engine.calculate_width_and_margins
+        ) as calculate:
+            layout(self.display, root, **kwargs)
+
+        return [call[0][0] for call in calculate.call_args_list]
+
+    def test_full_layout_marks_clean(self):
+        root = self.build_document()
+
+        layout(self.display, root)
+
+        for node in [root, self.child1, self.child2, self.child3, self.grandchild]:
+            self.assertIs(node.layout.dirty, False)
+            self.assertFalse(node.layout.dirty_descendants)
+
+    def test_dirty_marks_ancestors(self):
+        root = self.build_document()
+        layout(self.display, root)
+
+        self.grandchild.style.height = 20
+
+        self.assertTrue(self.grandchild.layout.dirty)
+        self.assertTrue(self.child3.layout.dirty_descendants)
+        self.assertTrue(root.layout.dirty_descendants)
+
+        # Siblings and ancestors aren't dirtied.
+        self.assertFalse(self.child1.layout.dirty)
+        self.assertFalse(self.child3.layout.dirty)
+        self.assertFalse(root.layout.dirty)
+        self.assertFalse(self.child1.layout.dirty_descendants)
+
+    def test_unchanged_layout_retained(self):
+        root = self.build_document()
+        layout(self.display, root)
+        expected = summarize(root)
+
+        evaluated = self.layout_counting(root, incremental=True)
+
+        self.assertEqual(evaluated, [])
+        self.assertEqual(summarize(root), expected)
+
+    def test_changed_child(self):
+        root = self.build_document()
+        layout(self.display, root)
+
+        self.child2.style.height = 50
+
+        evaluated = self.layout_counting(root, incremental=True)
+
+        # Only the changed node and its ancestors are re-evaluated.
+        self.assertEqual(evaluated, [root, self.child2])
+
+        self.assertLayout(
+            root,
+            {
+                'tag': 'div',
+                'border_box': {'position': (0, 10), 'size': (1024, 738)},
+                'padding_box': {'position': (0, 10), 'size': (1024, 738)},
+                'content': {'position': (0, 10), 'size': (1024, 738)},
+                'children': [
+                    {
+                        'tag': 'div',
+                        'border_box': {'position': (10, 10), 'size': (1004, 10)},
+                        'padding_box': {'position': (10, 10), 'size': (1004, 10)},
+                        'content': {'position': (10, 10), 'size': (1004, 10)},
+                    },
+                    {
+                        'tag': 'div',
+                        'border_box': {'position': (30, 50), 'size': (964, 50)},
+                        'padding_box': {'position': (30, 50), 'size': (964, 50)},
+                        'content': {'position': (30, 50), 'size': (964, 50)},
+                    },
+                    {
+                        'tag': 'div',
+                        'border_box': {'position': (20, 130), 'size': (984, 10)},
+                        'padding_box': {'position': (20, 130), 'size': (984, 10)},
+                        'content': {'position': (20, 130), 'size': (984, 10)},
+                        'children': [
+                            {
+                                'tag': 'div',
+                                'border_box': {'position': (25, 130), 'size': (974, 10)},
+                                'padding_box': {'position': (25, 130), 'size': (974, 10)},
+                                'content': {'position': (25, 130), 'size': (974, 10)},
+                            },
+                        ],
+                    },
+                ],
+            }
+        )
+
+    def test_changed_descendant(self):
+        root = self.build_document()
+        layout(self.display, root)
+
+        self.grandchild.style.margin_left = 15
+
+        evaluated = self.layout_counting(root, incremental=True)
+        self.assertEqual(evaluated, [root, self.child3, self.grandchild])
+
+        # The result is the same as a full layout of the modified document.
+        incremental = summarize(root)
+        layout(self.display, root)
+        self.assertEqual(incremental, summarize(root))
+
+    def test_changed_containing_block(self):
+        root = self.build_document()
+        layout(self.display, root)
+
+        # Changing the width of child3 changes the containing block
+        # of the grandchild, so the grandchild must be re-evaluated.
+        self.child3.style.margin_left = 100
+
+        evaluated = self.layout_counting(root, incremental=True)
+        self.assertEqual(evaluated, [root, self.child3, self.grandchild])
+
+        self.assertEqual(self.grandchild.layout.content_width, 894)
+
+    def test_display_resized(self):
+        root = self.build_document()
+        layout(self.display, root)
+
+        self.display.content_width = 640
+
+        evaluated = self.layout_counting(root, incremental=True)
+        self.assertEqual(
+            evaluated,
+            [root, self.child1, self.child2, self.child3, self.grandchild]
+        )
+        self.assertEqual(self.grandchild.layout.content_width, 590)
+
+    def test_paint_only_change(self):
+        root = self.build_document()
+        layout(self.display, root)
+        for node in [root, self.child1, self.child2, self.child3, self.grandchild]:
+            node.layout.paint_dirty = False
+        expected = summarize(root)
+
+        self.child3.style.update(background_color='red', outline_color='blue', z_index=2)
+
+        # The box must be repainted, but the layout is still valid.
+        self.assertTrue(self.child3.layout.paint_dirty)
+        self.assertFalse(self.child3.layout.dirty)
+        self.assertFalse(root.layout.dirty_descendants)
+
+        evaluated = self.layout_counting(root, incremental=True)
+        self.assertEqual(evaluated, [])
+        self.assertEqual(summarize(root), expected)
+
+        # A change to an inherited paint property is repainted
+        # by the descendants that inherit it.
+        self.assertFalse(self.grandchild.layout.paint_dirty)
+        self.child3.style.color = 'red'
+        engine.compute_styles(root)
+        self.assertTrue(self.grandchild.layout.paint_dirty)
+        self.assertFalse(self.child1.layout.paint_dirty)
+        self.assertFalse(self.grandchild.layout.dirty)
+        self.assertFalse(root.layout.dirty_descendants)
+
+    def test_unrendered_change(self):
+        root = self.build_document()
+        layout(self.display, root)
+        self.child2.layout.paint_dirty = False
+
+        self.child2.style.cursor = 'pointer'
+        self.child2.style.page_break_before = 'always'
+
+        self.assertFalse(self.child2.layout.paint_dirty)
+        self.assertEqual(self.layout_counting(root, incremental=True), [])
+        self.assertEqual(str(self.child2.style.computed.cursor), 'pointer')
+
+    def test_layout_change_retains_descendants(self):
+        root = self.build_document()
+        layout(self.display, root)
+
+        # Changing the height of child3 doesn't change the
+        # containing block width of the grandchild.
+        self.child3.style.padding_top = 7
+
+        self.assertTrue(self.child3.layout.dirty)
+        self.assertFalse(self.grandchild.layout.dirty)
+
+        evaluated = self.layout_counting(root, incremental=True)
+        self.assertEqual(evaluated, [root, self.child3])
+
+        # The result is the same as a full layout of the modified document.
+        incremental = summarize(root)
+        layout(self.display, root)
+        self.assertEqual(incremental, summarize(root))
+
+    def test_relative_parent_hidden_last_child(self):
+        root = self.build_document()
+        self.child3.style.position = 'relative'
+        self.grandchild.style.margin_top = 5
+        self.child3.children.insert(0, TestNode(name='div', style=CSS(display=BLOCK)))
+        self.child3.children.append(TestNode(name='div', style=CSS(display='none')))
+        for child in self.child3.children:
+            child.parent = self.child3
+        layout(self.display, root)
+
+        # The last child that is displayed is the last child of the box.
+        self.grandchild.style.height = '50%'
+        layout(self.display, root, incremental=True)
+
+        incremental = summarize(root)
+        layout(self.display, root)
+        self.assertEqual(incremental, summarize(root))
+
+    def test_percentage_height_child(self):
+        root = self.build_document()
+        self.child3.style.height = 100
+        self.grandchild.style.height = '50%'
+        layout(self.display, root)
+        self.assertEqual(self.grandchild.layout.content_height, 50)
+
+        # The height of the grandchild is a percentage of the height of
+        # child3, so it must be re-evaluated.
+        self.child3.style.height = 200
+        self.assertTrue(self.grandchild.layout.dirty)
+
+        layout(self.display, root, incremental=True)
+        self.assertEqual(self.grandchild.layout.content_height, 100)
+
+        incremental = summarize(root)
+        layout(self.display, root)
+        self.assertEqual(incremental, summarize(root))
+
+    def test_subtree_change(self):
+        root = self.build_document()
+        layout(self.display, root)
+
+        self.child3.style.position = 'relative'
+
+        self.assertTrue(self.child3.layout.dirty)
+        self.assertTrue(self.grandchild.layout.dirty)
+
+        evaluated = self.layout_counting(root, incremental=True)
+        self.assertEqual(evaluated, [root, self.child3, self.grandchild])
+
+    def test_offset_change(self):
+        root = self.build_document()
+        self.child3.style.position = 'relative'
+        layout(self.display, root)
+        self.assertEqual(self.grandchild.layout.absolute_content_left, 25)
+
+        self.child3.style.update(left=15, top='10%')
+
+        # The offset of the box is dirty, but the layout is still valid.
+        self.assertTrue(self.child3.layout.offset_dirty)
+        self.assertTrue(root.layout.update_descendants)
+        self.assertFalse(self.child3.layout.dirty)
+        self.assertFalse(root.layout.dirty_descendants)
+
+        # The box is moved without re-evaluating its size. child3 is the
+        # last child, so the automatic height of the root is re-evaluated.
+        evaluated = self.layout_counting(root, incremental=True)
+        self.assertEqual(evaluated, [root])
+        self.assertFalse(self.child3.layout.offset_dirty)
+        self.assertFalse(root.layout.update_descendants)
+
+        # The descendants of the box are moved with the box.
+        self.assertEqual(self.grandchild.layout.absolute_content_left, 40)
+
+        # The result is the same as a full layout of the modified document.
+        incremental = summarize(root)
+        layout(self.display, root)
+        self.assertEqual(incremental, summarize(root))
+
+        # Subsequent changes to the layout retain the offset.
+        self.child2.style.height = 50
+        layout(self.display, root, incremental=True)
+        incremental = summarize(root)
+        layout(self.display, root)
+        self.assertEqual(incremental, summarize(root))
+
+    def test_offset_change_last_child(self):
+        self.build_document()
+        self.grandchild.style.position = 'relative'
+        following = TestNode(name='div', style=CSS(display=BLOCK, height=10))
+        root = TestNode(name='div', style=CSS(display=BLOCK), children=[self.child3, following])
+        layout(self.display, root)
+
+        # The bottom of the last child, including its relative offset, is
+        # the bottom of its parent; the boxes that follow the parent move.
+        self.grandchild.style.top = 15
+        evaluated = self.layout_counting(root, incremental=True)
+        self.assertEqual(evaluated, [root, self.child3])
+        self.assertEqual(self.child3.layout.content_height, 25)
+        self.assertEqual(following.layout.absolute_border_box_top, 20 + 25 + 20)
+
+        incremental = summarize(root)
+        layout(self.display, root)
+        self.assertEqual(incremental, summarize(root))
+
+        # Children that aren't displayed don't have a box.
+        hidden = TestNode(name='div', style=CSS(display='none'))
+        hidden.parent = self.child3
+        self.child3.children.append(hidden)
+        self.child3.layout.invalidate_box_tree()
+        layout(self.display, root)
+        self.grandchild.style.top = 3
+        layout(self.display, root, incremental=True)
+        self.assertEqual(self.child3.layout.content_height, 13)
+
+        incremental = summarize(root)
+        layout(self.display, root)
+        self.assertEqual(incremental, summarize(root))
+
+        # A child that isn't the last child is only moved.
+        root = self.build_document()
+        self.child2.style.position = 'relative'
+        layout(self.display, root)
+        self.child2.style.top = 15
+        self.assertEqual(self.layout_counting(root, incremental=True), [])
+
+    def test_offset_change_static(self):
+        root = self.build_document()
+        layout(self.display, root)
+        expected = summarize(root)
+
+        # Offsets don't apply to boxes that aren't positioned.
+        self.child3.style.left = 15
+        evaluated = self.layout_counting(root, incremental=True)
+        self.assertEqual(evaluated, [])
+        self.assertEqual(summarize(root), expected)
+
+    def test_relative_parent(self):
+        root = self.build_document()
+        # The height of the last child of child3 is a percentage of the
+        # automatic height of child3.
+        self.child3.style.position = 'relative'
+        first = TestNode(name='div', style=CSS(display=BLOCK, height=40))
+        first.parent = self.child3
+        self.child3.children.insert(0, first)
+        self.grandchild.style.height = '50%'
+        layout(self.display, root)
+
+        # The height of a relatively positioned box is evaluated before
+        # its children are laid out, so the retained layout of its last
+        # child must not be used.
+        first.style.height = 60
+        layout(self.display, root, incremental=True)
+
+        incremental = summarize(root)
+        layout(self.display, root)
+        self.assertEqual(incremental, summarize(root))
@@ -0,0 +1,138 @@
+import io
+import json
+from unittest import mock
+
+from colosseum import instrumentation
+from colosseum.constants import BLOCK, INLINE, RELATIVE
+from colosseum.declaration import CSS
+from colosseum.engine import layout
+from colosseum.instrumentation import LayoutStats
+
+from ..utils import LayoutTestCase, TestNode
+
+
+class InstrumentationTests(LayoutTestCase):
+    def build_document(self):
+        span = TestNode(name='span', style=CSS(display=INLINE))
+        span.intrinsic.width = 10
+        span.intrinsic.height = 10
+        self.children = [
+            TestNode(name='div', style=CSS(display=BLOCK, height=10, margin=5)),
+            TestNode(name='div', style=CSS(display=BLOCK, height=10, margin=5, position=RELATIVE, top=5)),
+            span,
+        ]
+        return TestNode(name='div', style=CSS(display=BLOCK), children=self.children)
+
+    def test_disabled(self):
+        root = self.build_document()
+        self.assertIsNone(layout(self.display, root))
+
+    def test_stats(self):
+        root = self.build_document()
+        stats = layout(self.display, root, instrument=True)
+
+        self.assertIsInstance(stats, LayoutStats)
+        # The root, 2 divs, an anonymous box and a span.
+        self.assertEqual(stats.nodes, 5)
+        self.assertEqual(stats.laid_out, 5)
+        self.assertEqual(stats.retained, 0)
+        # The anonymous box holds a single line.
+        self.assertEqual(stats.lines_broken, 1)
+
+        self.assertEqual(stats.paths, {
+            '10.3.1': 1,
+            '10.3.3': 4,
+            '10.6.1': 1,
+            # The relatively positioned div evaluates its height twice.
+            '10.6.3': 5,
+        })
+
+        self.assertEqual(
+            set(stats.times),
+            {'styles', 'sizes', 'width', 'height', 'anonymize', 'relative_offset', 'total'}
+        )
+        self.assertGreaterEqual(stats.times['total'], stats.times['width'])
+
+        # The two divs have different styles; the anonymous box and
+        # the span have different containing blocks.
+        self.assertEqual(stats.caches['box_sizes'], (0, 5))
+        self.assertIn('resolution', stats.caches)
+
+        summary = stats.as_dict()
+        self.assertEqual(summary['counters'], {
+            'nodes': 5, 'laid_out': 5, 'retained': 0, 'lines_broken': 1, 'lines_retained': 0,
+        })
+        self.assertEqual(summary['caches']['box_sizes']['hit_rate'], 0)
+
+    def test_incremental(self):
+        root = self.build_document()
+        layout(self.display, root)
+
+        self.children[0].style.height = 20
+        stats = layout(self.display, root, incremental=True, instrument=True)
+
+        # The root, the changed div and the anonymous box are laid out.
+        # The span keeps its place in the line box of the anonymous box,
+        # so it isn't visited.
+        self.assertEqual(stats.nodes, 4)
+        self.assertEqual(stats.laid_out, 3)
+        self.assertEqual(stats.retained, 1)
+        self.assertEqual(stats.lines_retained, 1)
+        self.assertNotIn('anonymize', stats.times)
+
+    def test_exporter(self):
+        exporter = mock.Mock()
+        instrumentation.add_exporter(exporter)
+        try:
+            root = self.build_document()
+            layout(self.display, root)
+            stats = layout(self.display, root, instrument=True)
+        finally:
+            instrumentation.remove_exporter(exporter)
+
+        exporter.assert_called_once_with(stats)
+
+        layout(self.display, root, instrument=True)
+        exporter.assert_called_once_with(stats)
+
+    def test_hit_rate(self):
+        stats = LayoutStats()
+        self.assertIsNone(stats.hit_rate('resolution'))
+
+        stats.add_cache('resolution', 3, 1)
+        stats.add_cache('resolution', 0, 4)
+        self.assertEqual(stats.caches['resolution'], (3, 5))
+        self.assertEqual(stats.hit_rate('resolution'), 0.375)
+
+    def test_trace(self):
+        root = self.build_document()
+        stats = layout(self.display, root, instrument=LayoutStats(trace=True))
+
+        spans = {}
+        for event in stats.trace:
+            self.assertEqual(event['ph'], 'X')
+            spans.setdefault(event['name'], []).append(event)
+
+        self.assertEqual(len(spans['layout']), 1)
+        self.assertEqual(len(spans['compute_styles']), 1)
+        self.assertEqual(len(spans['div']), 3)
+        self.assertEqual(len(spans['anonymous']), 1)
+        self.assertEqual(len(spans['span']), 1)
+
+        # Spans are annotated with the box, and nested by depth.
+        span = spans['span'][0]
+        anonymous = spans['anonymous'][0]
+        self.assertEqual(span['args'], {'kind': 'inline', 'containing_width': 1024, 'depth': 2})
+        self.assertEqual(anonymous['args'], {'kind': 'block', 'containing_width': 1024, 'depth': 1})
+        self.assertLessEqual(anonymous['ts'], span['ts'])
+        self.assertGreaterEqual(anonymous['ts'] + anonymous['dur'], span['ts'] + span['dur'])
+
+        # The trace can be written as Chrome trace-event JSON.
+        f = io.StringIO()
+        stats.write_trace(f)
+        self.assertEqual(json.loads(f.getvalue())['traceEvents'], stats.trace)
+
+    def test_no_trace(self):
+        root = self.build_document()
+        stats = layout(self.display, root, instrument=True)
+        self.assertIsNone(stats.trace)
@@ -0,0 +1,154 @@
+from unittest import mock
+
+from colosseum import engine
+from colosseum.constants import BLOCK, HIDDEN
+from colosseum.declaration import CSS
+from colosseum.engine import establishes_layout_containment, layout
+
+from ..utils import LayoutTestCase, TestNode, summarize
+
+
+class LayoutContainmentTests(LayoutTestCase):
+    def build_document(self):
+        "A column of fixed size panels, each containing a few blocks."
+        self.panels = []
+        for i in range(3):
+            self.panels.append(TestNode(
+                name='div',
+                style=CSS(display=BLOCK, width=300, height=200, margin=10, overflow=HIDDEN),
+                children=[
+                    TestNode(name='div', style=CSS(display=BLOCK, height=20, margin=5))
+                    for j in range(3)
+                ]
+            ))
+        self.section = TestNode(name='div', style=CSS(display=BLOCK, padding=5), children=self.panels)
+        return TestNode(name='div', style=CSS(display=BLOCK), children=[self.section])
+
+    def layout_counting(self, root, **kwargs):
+        "Lay out the document, returning the nodes that were re-evaluated."
+        with mock.patch.object(
+            engine, 'calculate_width_and_margins', wraps=engine.calculate_width_and_margins
+        ) as calculate:
+            layout(self.display, root, **kwargs)
+
+        return [call[0][0] for call in calculate.call_args_list]
+
+    def test_boundaries(self):
+        root = self.build_document()
+        layout(self.display, root)
+
+        self.assertFalse(root.layout.contains_layout)
+        self.assertFalse(self.section.layout.contains_layout)
+        for panel in self.panels:
+            self.assertTrue(panel.layout.contains_layout)
+
+        # A block must have a definite size, and must not let its content overflow.
+        node = TestNode(style=CSS(display=BLOCK, width=10, height=10, overflow=HIDDEN))
+        engine.compute_styles(node)
+        self.assertTrue(establishes_layout_containment(node))
+        for style in [
+                CSS(display=BLOCK, width=10, height=10),
+                CSS(display=BLOCK, width=10, overflow=HIDDEN),
+                CSS(display=BLOCK, height=10, overflow=HIDDEN),
+                CSS(width=10, height=10, overflow=HIDDEN),
+        ]:
+            node = TestNode(style=style)
+            engine.compute_styles(node)
+            self.assertFalse(establishes_layout_containment(node))
+
+    def test_dirty_stops_at_boundary(self):
+        root = self.build_document()
+        layout(self.display, root)
+
+        child = self.panels[1].children[0]
+        child.style.height = 50
+
+        self.assertTrue(child.layout.dirty)
+        self.assertTrue(self.panels[1].layout.dirty_descendants)
+
+        # The ancestors of the boundary don't need to be laid out again.
+        self.assertFalse(self.section.layout.dirty_descendants)
+        self.assertFalse(root.layout.dirty_descendants)
+        self.assertTrue(self.section.layout.update_descendants)
+        self.assertTrue(root.layout.update_descendants)
+
+    def test_change_inside_boundary(self):
+        root = self.build_document()
+        layout(self.display, root)
+        panel = self.panels[1]
+        position = (panel.layout.absolute_content_left, panel.layout.absolute_content_top)
+
+        panel.children[0].style.update(height=50, margin_top=30)
+
+        # Only the panel and its contents are laid out again.
+        evaluated = self.layout_counting(root, incremental=True)
+        self.assertEqual(evaluated, [panel, panel.children[0]])
+        self.assertFalse(root.layout.update_descendants)
+        self.assertFalse(panel.layout.dirty_descendants)
+
+        self.assertEqual((panel.layout.absolute_content_left, panel.layout.absolute_content_top), position)
+        # The top margin of the first child collapses through the panel.
+        self.assertEqual(panel.children[1].layout.absolute_content_top, position[1] + 50 + 5)
+
+        # The result is the same as a full layout of the modified document.
+        incremental = summarize(root)
+        layout(self.display, root)
+        self.assertEqual(incremental, summarize(root))
+
+    def test_change_to_boundary(self):
+        root = self.build_document()
+        layout(self.display, root)
+
+        # A change to the size of the boundary affects the layout outside it.
+        self.panels[0].style.height = 100
+
+        evaluated = self.layout_counting(root, incremental=True)
+        self.assertEqual(evaluated, [root, self.section, self.panels[0]])
+        self.assertEqual(self.panels[1].layout.absolute_border_box_top, 5 + 10 + 100 + 10)
+
+        incremental = summarize(root)
+        layout(self.display, root)
+        self.assertEqual(incremental, summarize(root))
+
+    def test_margins_collapse_through_boundary(self):
+        child = TestNode(name='div', style=CSS(display=BLOCK, height=10, margin_top=40))
+        root = TestNode(
+            name='div',
+            style=CSS(display=BLOCK),
+            children=[
+                TestNode(
+                    name='div',
+                    style=CSS(display=BLOCK, width=100, height=100, overflow=HIDDEN),
+                    children=[child]
+                ),
+            ]
+        )
+        layout(self.display, root)
+
+        self.assertEqual(root.layout.content_top, 40)
+        self.assertEqual(child.layout.absolute_content_top, 40)
+
+        # A change to the collapsed margin affects the layout outside
+        # the boundary, so the ancestors of the boundary are laid out again.
+        child.style.margin_top = 60
+        layout(self.display, root, incremental=True)
+        self.assertEqual(root.layout.content_top, 60)
+
+        incremental = summarize(root)
+        layout(self.display, root)
+        self.assertEqual(incremental, summarize(root))
+
+    def test_unchanged_styles_not_recomputed(self):
+        root = self.build_document()
+        layout(self.display, root)
+
+        self.panels[1].children[0].style.height = 50
+
+        with mock.patch.object(CSS, 'compute', autospec=True, side_effect=CSS.compute) as compute:
+            layout(self.display, root, incremental=True)
+
+        # The contents of the other panels aren't visited.
+        self.assertCountEqual(
+            [call[0][0]._node for call in compute.call_args_list],
+            [root, self.section] + self.panels + self.panels[1].children
+        )
@@ -0,0 +1,72 @@
+from unittest import mock
+
+from colosseum import engine
+from colosseum.constants import BLOCK, INLINE, LEFT, RELATIVE
+from colosseum.declaration import CSS
+from colosseum.engine import (
+    BLOCK_FORMATTING_CONTEXT, BLOCK_LEVEL_BOX, FLOATING_BOX, INLINE_BOX,
+    INLINE_FORMATTING_CONTEXT, REPLACED, layout,
+)
+
+from ..utils import LayoutTestCase, TestNode
+
+
+class LayoutKindTests(LayoutTestCase):
+    def build_document(self):
+        self.span = TestNode(name='span', style=CSS(display=INLINE))
+        self.span.intrinsic.width = 10
+        self.span.intrinsic.height = 10
+        self.child = TestNode(name='div', style=CSS(display=BLOCK, height=10), children=[self.span])
+        return TestNode(name='div', style=CSS(display=BLOCK), children=[self.child])
+
+    def test_classification(self):
+        root = self.build_document()
+        layout(self.display, root)
+
+        self.assertEqual(root.layout.layout_kind, BLOCK_LEVEL_BOX)
+        self.assertEqual(root.layout.formatting_context, BLOCK_FORMATTING_CONTEXT)
+        self.assertEqual(self.child.layout.layout_kind, BLOCK_LEVEL_BOX)
+        self.assertEqual(self.child.layout.formatting_context, INLINE_FORMATTING_CONTEXT)
+        self.assertEqual(self.span.layout.layout_kind, INLINE_BOX)
+
+        self.span.intrinsic.is_replaced = True
+        self.assertIsNone(self.span.layout.layout_kind)
+        layout(self.display, root, incremental=True)
+        self.assertEqual(self.span.layout.layout_kind, INLINE_BOX + REPLACED)
+
+    def test_classification_retained(self):
+        root = self.build_document()
+        layout(self.display, root)
+
+        # Changes that don't affect the kind of box don't reclassify it.
+        with mock.patch.object(engine, 'classify_layout', wraps=engine.classify_layout) as classify:
+            layout(self.display, root)
+            self.child.style.update(height=20, margin_top=5)
+            self.assertEqual(self.child.layout.layout_kind, BLOCK_LEVEL_BOX)
+            layout(self.display, root, incremental=True)
+
+            # ... but a change to the position of the node does.
+            self.child.style.position = RELATIVE
+            self.assertIsNone(self.child.layout.layout_kind)
+            layout(self.display, root, incremental=True)
+
+        self.assertEqual(classify.call_args_list, [mock.call(self.child)])
+        self.assertEqual(self.span.layout.absolute_content_top, 5)
+
+    def test_reclassify(self):
+        root = self.build_document()
+        layout(self.display, root)
+
+        # A change to the float of the node changes the kind of box.
+        self.child.style.float = LEFT
+        self.assertIsNone(self.child.layout.layout_kind)
+        engine.compute_styles(root)
+        self.assertEqual(engine.layout_kind(self.child), FLOATING_BOX)
+
+        # A change to the display of a child changes the formatting context.
+        self.child.style.float = None
+        self.span.style.display = BLOCK
+        self.assertIsNone(self.child.layout.formatting_context)
+        layout(self.display, root, incremental=True)
+        self.assertEqual(self.child.layout.formatting_context, BLOCK_FORMATTING_CONTEXT)
+        self.assertEqual(self.span.layout.layout_kind, BLOCK_LEVEL_BOX)
@@ -0,0 +1,165 @@
+from colosseum.constants import BLOCK, CENTER, INLINE, RIGHT
+from colosseum.declaration import CSS
+from colosseum.engine import layout
+
+from ..utils import LayoutTestCase, TestNode
+
+
+class LineBoxTests(LayoutTestCase):
+    def word(self, width=30, height=10):
+        node = TestNode(name='span', style=CSS(display=INLINE))
+        node.intrinsic.width = width
+        node.intrinsic.height = height
+        return node
+
+    def paragraph(self, words, **style):
+        return TestNode(name='p', style=CSS(display=BLOCK, width=100, **style), children=words)
+
+    def positions(self, words):
+        return [(word.layout.content_left, word.layout.content_top) for word in words]
+
+    def test_wrapping(self):
+        words = [self.word() for i in range(7)]
+        words[4].intrinsic.height = 15
+        root = self.paragraph(words)
+        layout(self.display, TestNode(name='body', style=CSS(display=BLOCK), children=[root]))
+
+        self.assertEqual(root.layout.lines, [(0, 3, 0, 10), (3, 6, 10, 15), (6, 7, 25, 10)])
+        self.assertEqual(self.positions(words), [
+            (0, 0), (30, 0), (60, 0),
+            (0, 10), (30, 10), (60, 10),
+            (0, 25),
+        ])
+        # The height of the block is the bottom of the last line box.
+        self.assertEqual(root.layout.content_height, 35)
+
+    def test_wide_child(self):
+        # A child that is wider than the line is placed on a line of its own.
+        words = [self.word(), self.word(width=150), self.word()]
+        root = self.paragraph(words)
+        layout(self.display, root)
+
+        self.assertEqual(root.layout.lines, [(0, 1, 0, 10), (1, 2, 10, 10), (2, 3, 20, 10)])
+
+    def test_margins(self):
+        words = [self.word(), self.word(), self.word()]
+        words[1].style.margin_left = 5
+        words[1].style.padding_right = 5
+        layout(self.display, self.paragraph(words))
+
+        self.assertEqual(self.positions(words), [(0, 0), (35, 0), (70, 0)])
+
+        words[2].style.margin_left = 1
+        root = self.paragraph(words)
+        layout(self.display, root)
+        self.assertEqual(self.positions(words), [(0, 0), (35, 0), (1, 10)])
+
+    def test_text_align(self):
+        words = [self.word() for i in range(4)]
+        root = self.paragraph(words, text_align=RIGHT)
+        layout(self.display, root)
+        self.assertEqual(self.positions(words), [(10, 0), (40, 0), (70, 0), (70, 10)])
+
+        root.style.text_align = CENTER
+        layout(self.display, root)
+        self.assertEqual(self.positions(words), [(5, 0), (35, 0), (65, 0), (35, 10)])
+
+    def test_nowrap(self):
+        words = [self.word() for i in range(4)]
+        root = self.paragraph(words, white_space='nowrap')
+        layout(self.display, root)
+
+        self.assertEqual(root.layout.lines, [(0, 4, 0, 10)])
+        self.assertEqual(words[3].layout.content_left, 90)
+
+
+class IncrementalLineBreakingTests(LayoutTestCase):
+    def word(self, width):
+        node = TestNode(name='span', style=CSS(display=INLINE))
+        node.intrinsic.width = width
+        node.intrinsic.height = 10
+        return node
+
+    def build_document(self, count=100):
+        words = [self.word(20 + i % 3 * 10) for i in range(count)]
+        return TestNode(name='p', style=CSS(display=BLOCK, width=200), children=words)
+
+    def assertSameLayout(self, root, expected):
+        self.assertEqual(root.layout.lines, expected.layout.lines)
+        self.assertEqual(root.layout.content_height, expected.layout.content_height)
+        for child, expected_child in zip(root.children, expected.children):
+            self.assertEqual(
+                (child.layout.content_left, child.layout.content_top),
+                (expected_child.layout.content_left, expected_child.layout.content_top),
+            )
+
+    def edit(self, width):
+        root = self.build_document()
+        layout(self.display, root)
+
+        root.children[50].intrinsic.width = width
+        stats = layout(self.display, root, incremental=True, instrument=True)
+
+        expected = self.build_document()
+        expected.children[50].intrinsic.width = width
+        layout(self.display, expected)
+
+        self.assertSameLayout(root, expected)
+        return root, stats
+
+    def test_unchanged(self):
+        root = self.build_document()
+        layout(self.display, root)
+        lines = len(root.layout.lines)
+
+        stats = layout(self.display, root, incremental=True, instrument=True)
+        self.assertEqual(stats.lines_broken, 0)
+        self.assertEqual(stats.lines_retained, 0)
+
+        # Laying out the paragraph retains all its line boxes.
+        root.layout.mark_dirty()
+        stats = layout(self.display, root, incremental=True, instrument=True)
+        self.assertEqual(stats.lines_broken, 0)
+        self.assertEqual(stats.lines_retained, lines)
+
+    def test_edit_resyncs(self):
+        # A small change only re-breaks the lines around the edit.
+        root, stats = self.edit(35)
+        self.assertLessEqual(stats.lines_broken, 3)
+        self.assertEqual(stats.lines_broken + stats.lines_retained, len(root.layout.lines))
+
+    def test_edit_moves_later_lines(self):
+        # A word too wide to share a line adds a line; once the line
+        # breaks match again, the later lines are retained, and moved down.
+        root, stats = self.edit(190)
+        self.assertGreater(stats.lines_retained, 0)
+        self.assertEqual(stats.lines_broken + stats.lines_retained, len(root.layout.lines))
+
+    def test_width_change(self):
+        # Changing the width of the paragraph re-breaks every line.
+        root = self.build_document()
+        layout(self.display, root)
+
+        root.style.width = 150
+        stats = layout(self.display, root, incremental=True, instrument=True)
+        self.assertEqual(stats.lines_retained, 0)
+
+        expected = self.build_document()
+        expected.style.width = 150
+        layout(self.display, expected)
+        self.assertSameLayout(root, expected)
+
+    def test_child_added(self):
+        root = self.build_document()
+        layout(self.display, root)
+
+        word = self.word(20)
+        word.parent = root
+        root.children.insert(10, word)
+        root.layout.dirty = True
+        layout(self.display, root, incremental=True)
+
+        expected = self.build_document()
+        expected.children.insert(10, self.word(20))
+        layout(self.display, expected)
+        self.assertEqual(root.layout.lines, expected.layout.lines)
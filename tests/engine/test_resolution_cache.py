@@ -0,0 +1,61 @@
+from unittest import mock
+
+from colosseum import engine
+from colosseum.constants import BLOCK
+from colosseum.declaration import CSS
+from colosseum.engine import layout
+
+from ..utils import LayoutTestCase, TestNode
+
+
+class ResolutionCacheTests(LayoutTestCase):
+    def setUp(self):
+        super().setUp()
+        engine.resolution_cache.clear()
+
+    def test_shared_values_resolved_once(self):
+        # Each child has a different computed style, as text_indent
+        # differs; but the values used by layout are the same.
+        root = TestNode(
+            name='div', style=CSS(display=BLOCK),
+            children=[
+                TestNode(name='div', style=CSS(display=BLOCK, width='50%', height=10, margin='10%', text_indent=i))
+                for i in range(10)
+            ]
+        )
+
+        layout(self.display, root)
+
+        # Each distinct value is resolved once, on first use.
+        misses = engine.resolution_cache.misses
+        self.assertLess(misses, 10)
+        self.assertGreater(engine.resolution_cache.hits, 5 * misses)
+
+        for child in root.children:
+            self.assertEqual(child.layout.content_width, 512)
+            self.assertEqual(child.layout.margin_left, 102.40625)
+
+        # A second layout of the same document is entirely served from the cache.
+        layout(self.display, root)
+        self.assertEqual(engine.resolution_cache.misses, misses)
+
+    def test_shared_box_sizes(self):
+        root = TestNode(
+            name='div', style=CSS(display=BLOCK),
+            children=[
+                TestNode(name='div', style=CSS(display=BLOCK, height=10, margin='10%', padding=5, border_width=1))
+                for i in range(10)
+            ]
+        )
+
+        with mock.patch.object(engine, 'calculate_size', wraps=engine.calculate_size) as calculate_size:
+            layout(self.display, root)
+
+        # The margins, borders and padding are evaluated for the root,
+        # and once for all the children, as they share a computed style.
+        self.assertEqual(calculate_size.call_count, 24)
+        for child in root.children:
+            self.assertIs(child.style.computed, root.children[0].style.computed)
+            self.assertEqual(child.layout.margin_left, 102.40625)
+            self.assertEqual(child.layout.padding_top, 5)
+            self.assertEqual(child.layout.border_bottom_width, 1)
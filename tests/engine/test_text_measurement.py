@@ -0,0 +1,93 @@
+from unittest import mock
+
+from colosseum.constants import BLOCK, INLINE
+from colosseum.declaration import CSS
+from colosseum.engine import layout
+from colosseum.fonts import Font
+
+from ..test_fonts import Monospace
+from ..utils import LayoutTestCase, TestNode
+
+
+class TextMeasurementTests(LayoutTestCase):
+    def text(self, text, **style):
+        node = TestNode(name='span', style=CSS(display=INLINE, **style))
+        node.intrinsic.text = text
+        return node
+
+    def build_document(self):
+        self.words = [self.text('the'), self.text('quick'), self.text('fox'), self.text('the')]
+        self.spaced = self.text('jumps', letter_spacing=2)
+        self.paragraph = TestNode(name='p', style=CSS(display=BLOCK), children=self.words + [self.spaced])
+        return TestNode(name='div', style=CSS(display=BLOCK), children=[self.paragraph])
+
+    def test_measure(self):
+        fonts = Monospace()
+        root = self.build_document()
+        layout(self.display, root, fonts=fonts)
+
+        # Each distinct run is measured once, in a batch for each font and spacing.
+        self.assertCountEqual(fonts.calls, [['the', 'quick', 'fox'], ['jumps']])
+        self.assertEqual(
+            [word.layout.content_width for word in self.words],
+            [18, 30, 18, 18],
+        )
+        self.assertEqual(self.spaced.layout.content_width, 40)
+
+        # The height of the text is the size of the font; 12pt at 96dpi.
+        self.assertEqual(self.words[0].layout.content_height, 16)
+
+        # Runs that haven't changed aren't measured again.
+        layout(self.display, root, fonts=fonts)
+        self.assertEqual(len(fonts.calls), 2)
+        # The repeated 'the' of the first layout.
+        self.assertEqual(fonts.measurements.hits, 1)
+
+        # Runs are measured once per font, across layouts.
+        self.words[3].intrinsic.text = 'quick'
+        layout(self.display, root, fonts=fonts)
+        self.assertEqual(len(fonts.calls), 2)
+        self.assertEqual(fonts.measurements.hits, 2)
+
+    def test_text_changed(self):
+        fonts = Monospace()
+        root = self.build_document()
+        layout(self.display, root, fonts=fonts)
+
+        self.words[1].intrinsic.text = 'slow'
+        self.assertTrue(self.words[1].layout.dirty)
+        with mock.patch.object(fonts, 'font', wraps=fonts.font) as font:
+            layout(self.display, root, incremental=True, fonts=fonts)
+
+        # Only the changed run is measured; the subtrees that haven't
+        # changed aren't visited.
+        self.assertEqual(fonts.calls[-1], ['slow'])
+        self.assertEqual(fonts.measurements.hits, 1)
+        self.assertEqual(self.words[1].layout.content_width, 24)
+        self.assertEqual(font.call_count, 1 + 1)
+
+    def test_style_changed(self):
+        fonts = Monospace()
+        root = self.build_document()
+        layout(self.display, root, fonts=fonts)
+
+        self.words[2].style.letter_spacing = 1
+        layout(self.display, root, incremental=True, fonts=fonts)
+
+        self.assertEqual(fonts.calls[-1], ['fox'])
+        self.assertEqual(self.words[2].layout.content_width, 21)
+
+    def test_font(self):
+        fonts = Monospace(default_font=Font(24))
+        root = TestNode(name='div', style=CSS(display=BLOCK, margin_left='1em'))
+        layout(self.display, root, fonts=fonts)
+
+        # Font-relative units are resolved in the font of the provider.
+        self.assertEqual(root.layout.margin_left, 32)
+
+    def test_instrumentation(self):
+        fonts = Monospace()
+        root = self.build_document()
+        stats = layout(self.display, root, fonts=fonts, instrument=True)
+        self.assertEqual(stats.caches['text'], (1, 4))
+        self.assertIn('measure', stats.times)
@@ -16,6 +16,18 @@ class ColorTests(TestCase):
     def test_hsl_repr(self):
         self.assertEqual(repr(hsl(10, 0.2, 0.3, 0.5)), "hsla(10, 0.2, 0.3, 0.5)")
 
+    def test_rgb_eq(self):
+        self.assertEqual(rgb(10, 20, 30, 0.5), rgb(10, 20, 30, 0.5))
+        self.assertEqual(hash(rgb(10, 20, 30, 0.5)), hash(rgb(10, 20, 30, 0.5)))
+        self.assertNotEqual(rgb(10, 20, 30, 0.5), rgb(10, 20, 30))
+        self.assertNotEqual(rgb(10, 20, 30), 'rgb(10, 20, 30)')
+
+    def test_hsl_eq(self):
+        self.assertEqual(hsl(10, 0.2, 0.3, 0.5), hsl(10, 0.2, 0.3, 0.5))
+        self.assertEqual(hash(hsl(10, 0.2, 0.3, 0.5)), hash(hsl(10, 0.2, 0.3, 0.5)))
+        self.assertNotEqual(hsl(10, 0.2, 0.3, 0.5), hsl(10, 0.2, 0.4, 0.5))
+        self.assertNotEqual(hsl(0, 0.0, 0.0), rgb(0, 0, 0))
+
     def test_hsl_blacks(self):
         self.assertEqualColor(hsl(0, 0.0, 0.0), rgb(0x00, 0x00, 0x00))
         self.assertEqualColor(hsl(60, 0.0, 0.0), rgb(0x00, 0x00, 0x00))
@@ -0,0 +1,77 @@
+import json
+import os
+import shutil
+import tempfile
+from unittest import TestCase, mock
+
+from .utils import CorpusIndex, index_path
+
+
+class CorpusIndexTests(TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        self.test_dir = os.path.join(self.root, 'box')
+        os.makedirs(os.path.join(self.test_dir, 'data'))
+        self.index_path = os.path.join(self.root, 'cache', 'index.json')
+
+    def add_document(self, name, assertion='', help=()):
+        with open(os.path.join(self.test_dir, 'data', name), 'w') as f:
+            json.dump({'assert': assertion, 'help': list(help), 'matches': None, 'test_case': {}}, f)
+
+    def test_find(self):
+        self.add_document('margin-001.json', 'Margins are applied', ['http://example.com/margin'])
+        self.add_document('margin-002.json')
+        self.add_document('margin-collapse-001.json')
+        self.add_document('padding-ref.json')
+
+        corpus = CorpusIndex(self.index_path)
+        self.assertEqual(corpus.find(self.test_dir, 'margin-'), [
+            ('margin-001.json', 'Margins are applied', ['http://example.com/margin']),
+            ('margin-002.json', '', []),
+        ])
+        self.assertEqual(corpus.find(self.test_dir, 'margin-collapse-'), [('margin-collapse-001.json', '', [])])
+        self.assertEqual(corpus.find(self.test_dir, 'padding-ref'), [('padding-ref.json', '', [])])
+        self.assertEqual(corpus.find(self.test_dir, 'border-'), [])
+
+    def test_documents_not_reloaded(self):
+        self.add_document('margin-001.json', 'Margins are applied')
+        CorpusIndex(self.index_path).find(self.test_dir, 'margin-')
+        self.assertTrue(os.path.exists(self.index_path))
+
+        # A new index uses the stored index, without reading the documents.
+        corpus = CorpusIndex(self.index_path)
+        with mock.patch.object(json, 'load', wraps=json.load) as load:
+            self.assertEqual(corpus.find(self.test_dir, 'margin-'), [('margin-001.json', 'Margins are applied', [])])
+        self.assertEqual(load.call_count, 1)
+
+    def test_modified_documents(self):
+        self.add_document('margin-001.json', 'Margins are applied')
+        CorpusIndex(self.index_path).find(self.test_dir, 'margin-')
+
+        self.add_document('margin-001.json', 'Margins are applied to the box')
+        self.add_document('margin-002.json')
+        corpus = CorpusIndex(self.index_path)
+        self.assertEqual(corpus.find(self.test_dir, 'margin-'), [
+            ('margin-001.json', 'Margins are applied to the box', []),
+            ('margin-002.json', '', []),
+        ])
+
+    def test_index_path(self):
+        # Indexes aren't stored in the corpus, and each corpus has its own.
+        path = index_path(self.root)
+        self.assertTrue(path.startswith(tempfile.gettempdir()))
+        self.assertFalse(path.startswith(self.root))
+        self.assertEqual(path, index_path(os.path.join(self.test_dir, '..')))
+        self.assertNotEqual(path, index_path(self.test_dir))
+
+    def test_test_list(self):
+        with open(os.path.join(self.test_dir, 'not_implemented'), 'w') as f:
+            f.write('margin-001\n\nmargin-collapse-002\n')
+
+        corpus = CorpusIndex(self.index_path)
+        self.assertEqual(
+            corpus.test_list(os.path.join(self.test_dir, 'not_implemented')),
+            {'test_margin_001', 'test_margin_collapse_002'}
+        )
+        self.assertEqual(corpus.test_list(os.path.join(self.test_dir, 'not_valid')), set())
@@ -1,23 +1,31 @@
-from unittest import TestCase
+import copy
+import pickle
+from unittest import TestCase, mock
 
 from colosseum import engine as css_engine
 from colosseum.colors import GOLDENROD, NAMED_COLOR, REBECCAPURPLE
 from colosseum.constants import (
     AUTO,
     BLOCK,
+    COLUMN,
+    FLEX_START,
     INHERIT,
     INITIAL,
     INLINE,
     LEFT,
+    NOWRAP,
     REVERT,
     RIGHT,
+    ROW,
     RTL,
+    STRETCH,
     TABLE,
     UNSET,
     Choices,
     OtherProperty,
 )
 from colosseum.declaration import CSS, validated_property
+from colosseum.dimensions import Box
 from colosseum.units import percent, px
 from colosseum.validators import (
     is_color,
@@ -25,6 +33,7 @@ from colosseum.validators import (
     is_length,
     is_number,
     is_percentage,
+    is_quote,
     is_uri,
 )
 from colosseum.wrappers import BorderSpacing, Quotes
@@ -322,6 +331,70 @@ class PropertyChoiceTests(TestCase):
         self.assertIs(obj.prop, AUTO)
 
 
+class ChoicesTests(TestCase):
+    def test_keywords(self):
+        choices = Choices(AUTO, None, validators=[is_length], explicit_defaulting_constants=[INHERIT])
+
+        self.assertIs(choices.validate('auto'), AUTO)
+        self.assertIsNone(choices.validate('none'))
+        self.assertIsNone(choices.validate(None))
+        self.assertIs(choices.validate('inherit'), INHERIT)
+        self.assertEqual(choices.validate('10px'), 10 * px)
+
+        with self.assertRaises(ValueError):
+            choices.validate('invalid')
+
+    def test_validators_take_precedence(self):
+        # '2' is both a constant, and a value accepted by the validator.
+        choices = Choices('2', 'a', validators=[is_integer])
+
+        self.assertEqual(choices.validate('2'), 2)
+        self.assertEqual(choices.validate('a'), 'a')
+
+    def test_routing(self):
+        choices = Choices(validators=[is_color, is_length])
+
+        # Numbers aren't offered to the color validator
+        self.assertEqual(choices.validate(10), 10 * px)
+        self.assertEqual(choices._route(int), [is_length])
+        self.assertEqual(choices._route(str), [is_color, is_length])
+        self.assertEqual(choices.validate('red'), NAMED_COLOR['red'])
+
+    def test_memo(self):
+        calls = []
+
+        def counting_length(value):
+            calls.append(value)
+            return is_length(value)
+
+        choices = Choices(AUTO, validators=[is_integer, counting_length])
+        del calls[:]
+
+        # Repeated values are validated once
+        self.assertEqual(choices.validate('10px'), 10 * px)
+        self.assertEqual(len(choices._memo), 1)
+        self.assertEqual(choices.validate('10px'), 10 * px)
+        self.assertEqual(len(choices._memo), 1)
+        self.assertEqual(calls, ['10px'])
+
+        # Values of different types are validated separately
+        choices = Choices(validators=[is_length])
+        self.assertIsInstance(choices.validate(1.0).val, float)
+        self.assertIsInstance(choices.validate(1).val, int)
+
+        # Unhashable values are validated, but not remembered
+        choices = Choices(validators=[is_quote])
+        self.assertEqual(choices.validate([('<', '>')]), Quotes([('<', '>')]))
+        self.assertEqual(choices.validate([('<', '>')]), Quotes([('<', '>')]))
+        self.assertEqual(len(choices._memo), 0)
+
+        # The memo is bounded
+        choices = Choices(validators=[is_integer])
+        for i in range(Choices.MEMO_SIZE * 2):
+            choices.validate(i)
+        self.assertLessEqual(len(choices._memo), Choices.MEMO_SIZE)
+
+
 class CssDeclarationTests(TestCase):
     def test_engine(self):
         node = TestNode(style=CSS())
@@ -837,6 +910,43 @@ class CssDeclarationTests(TestCase):
         with self.assertRaises(ValueError):
             node.style.cursor = [AUTO, 'url(google.com)']
 
+    def test_flex_properties(self):
+        node = TestNode(style=CSS())
+        node.layout.dirty = None
+
+        self.assertIs(node.style.flex_direction, ROW)
+        self.assertIs(node.style.flex_wrap, NOWRAP)
+        self.assertEqual(node.style.order, 0)
+        self.assertEqual(node.style.flex_grow, 0)
+        self.assertEqual(node.style.flex_shrink, 1)
+        self.assertIs(node.style.flex_basis, AUTO)
+        self.assertIs(node.style.justify_content, FLEX_START)
+        self.assertIs(node.style.align_items, STRETCH)
+        self.assertIs(node.style.align_self, AUTO)
+        self.assertIs(node.style.align_content, STRETCH)
+        self.assertIsNone(node.style.dirty)
+
+        node.style.update(flex_direction='column', flex_grow=2, flex_basis='10px', order=-1)
+        self.assertIs(node.style.flex_direction, COLUMN)
+        self.assertEqual(node.style.flex_grow, 2)
+        self.assertEqual(node.style.flex_basis, 10 * px)
+        self.assertEqual(node.style.order, -1)
+        self.assertTrue(node.style.dirty)
+
+        # flex-wrap and white-space share the nowrap keyword.
+        node.style.update(flex_wrap='nowrap', white_space='nowrap')
+        self.assertIs(node.style.flex_wrap, NOWRAP)
+        self.assertIs(node.style.white_space, NOWRAP)
+
+        with self.assertRaises(ValueError):
+            node.style.flex_wrap = 'no-wrap'
+
+        with self.assertRaises(ValueError):
+            node.style.flex_grow = 'auto'
+
+        with self.assertRaises(ValueError):
+            node.style.order = 'first'
+
     def test_set_multiple_properties(self):
         node = TestNode(style=CSS())
         node.layout.dirty = None
@@ -1261,6 +1371,12 @@ class CssDeclarationTests(TestCase):
             "width: 10px"
         )
 
+    def test_copy_module(self):
+        style = CSS(width=10, margin_left='5%')
+        for duplicate in [copy.copy(style), copy.deepcopy(style), pickle.loads(pickle.dumps(style))]:
+            self.assertEqual(duplicate.width, 10 * px)
+            self.assertEqual(duplicate.margin_left, 5 * percent)
+
     def test_dict(self):
         "Style declarations expose a dict-like interface"
         node = TestNode(style=CSS())
@@ -1315,3 +1431,213 @@ class CssDeclarationTests(TestCase):
 
         with self.assertRaises(KeyError):
             del node.style['no-such-property']
+
+    def test_update_atomic(self):
+        node = TestNode(style=CSS(width=10, margin=5))
+        node.layout.dirty = False
+
+        # If any value is invalid, no values are applied
+        with self.assertRaises(ValueError):
+            node.style.update(height=20, margin_left=30, width='invalid')
+
+        self.assertEqual(node.style.width, 10)
+        self.assertEqual(node.style.height, AUTO)
+        self.assertEqual(node.style.margin_left, 5)
+        self.assertFalse(node.style.dirty)
+
+        with self.assertRaises(NameError):
+            node.style.update(height=20, no_such_property=30)
+
+        self.assertEqual(node.style.height, AUTO)
+        self.assertFalse(node.style.dirty)
+
+    def test_update_dirty_once(self):
+        child = TestNode(style=CSS(display=BLOCK))
+        node = TestNode(style=CSS(display=BLOCK, width=10), children=[child])
+        child.parent = node
+        node.layout.dirty = False
+
+        with mock.patch.object(Box, 'mark_dirty', autospec=True) as mark_dirty:
+            node.style.update(width=20, height=30, margin=(1, 2, 3, 4), padding=5, border_width=1)
+
+        mark_dirty.assert_called_once_with(node.layout)
+
+        self.assertEqual(node.style.width, 20)
+        self.assertEqual(node.style.margin_left, 4)
+        self.assertEqual(node.style.padding_top, 5)
+
+        # If nothing changes, the node isn't marked dirty
+        node.layout.dirty = False
+        node.style.update(width=20, height=30)
+        self.assertFalse(node.layout.dirty)
+        node.style.update(width=50, margin_left=None, margin=4)
+        self.assertTrue(node.layout.dirty)
+        self.assertEqual(node.style.width, 50)
+        self.assertEqual(node.style.margin_left, 4)
+
+
+class ComputedStyleTests(TestCase):
+    def build_document(self):
+        self.child1 = TestNode(style=CSS(display=BLOCK, height=10))
+        self.child2 = TestNode(style=CSS(display=BLOCK, height=10))
+        self.child3 = TestNode(style=CSS(display=BLOCK, height=20, color='red', text_align=INHERIT))
+        return TestNode(
+            style=CSS(display=BLOCK, width=100, color='blue', direction=RTL),
+            children=[self.child1, self.child2, self.child3],
+        )
+
+    def test_initial_values(self):
+        node = TestNode(style=CSS(width=10))
+        css_engine.compute_styles(node)
+
+        computed = node.style.computed
+        self.assertEqual(computed.width, 10 * px)
+        self.assertEqual(computed.height, AUTO)
+        self.assertEqual(computed.display, INLINE)
+        self.assertEqual(computed.margin_top, 0)
+
+        # Initial values that refer to other properties are resolved
+        self.assertEqual(computed.text_align, LEFT)
+        self.assertIs(computed.border_top_color, computed.color)
+
+    def test_inheritance(self):
+        root = self.build_document()
+        css_engine.compute_styles(root)
+
+        # Inherited properties are taken from the parent
+        self.assertEqual(self.child1.style.computed.color, NAMED_COLOR['blue'])
+        self.assertEqual(self.child1.style.computed.direction, RTL)
+        self.assertEqual(self.child1.style.computed.text_align, RIGHT)
+
+        # Properties that aren't inherited take their initial value
+        self.assertEqual(self.child1.style.computed.width, AUTO)
+
+        # Specified values take precedence over inherited values;
+        # initial values that refer to other properties use the computed value.
+        self.assertEqual(self.child3.style.computed.color, NAMED_COLOR['red'])
+        self.assertEqual(self.child3.style.computed.border_left_color, NAMED_COLOR['red'])
+
+        # 'inherit' uses the computed value of the parent
+        self.assertEqual(self.child3.style.computed.text_align, RIGHT)
+
+    def test_explicit_inherit(self):
+        child = TestNode(style=CSS(display=BLOCK, top=INHERIT, left=INHERIT))
+        root = TestNode(style=CSS(display=BLOCK, left=10), children=[child])
+        css_engine.compute_styles(root)
+
+        self.assertEqual(child.style.computed.top, AUTO)
+        self.assertEqual(child.style.computed.left, 10 * px)
+
+        # At the root, 'inherit' is the initial value
+        root = TestNode(style=CSS(left=INHERIT))
+        css_engine.compute_styles(root)
+        self.assertEqual(root.style.computed.left, AUTO)
+
+    def test_recompute_explicit_inherit(self):
+        child = TestNode(style=CSS(display=BLOCK, left=INHERIT))
+        root = TestNode(style=CSS(display=BLOCK, left=10), children=[child])
+        css_engine.compute_styles(root)
+
+        # A value that is explicitly inherited is re-evaluated, even
+        # if the property isn't usually inherited.
+        root.style.left = 20
+        css_engine.compute_styles(root)
+        self.assertEqual(child.style.computed.left, 20 * px)
+
+    def test_shared(self):
+        root = self.build_document()
+        css_engine.compute_styles(root)
+
+        # Nodes with the same style share a computed style
+        self.assertIs(self.child1.style.computed, self.child2.style.computed)
+        self.assertIsNot(self.child1.style.computed, self.child3.style.computed)
+
+    def test_fingerprint(self):
+        style = CSS(display=BLOCK, width=10, margin=5)
+        self.assertEqual(style.fingerprint, CSS(margin=5, width='10px', display='block').fingerprint)
+        self.assertEqual(style.fingerprint, style.copy().fingerprint)
+        self.assertNotEqual(style.fingerprint, CSS(display=BLOCK, width=20, margin=5).fingerprint)
+        self.assertEqual(hash(style.fingerprint), hash(style.copy().fingerprint))
+
+        # Changing a value changes the fingerprint
+        fingerprint = style.fingerprint
+        style.width = 20
+        self.assertNotEqual(style.fingerprint, fingerprint)
+        del style.width
+        self.assertEqual(style.fingerprint, CSS(display=BLOCK, margin=5).fingerprint)
+
+        # Values that are wrapped can be fingerprinted
+        self.assertEqual(
+            hash(CSS(quotes="'<' '>'").fingerprint),
+            hash(CSS(quotes="'<' '>'").fingerprint),
+        )
+        self.assertEqual(
+            hash(CSS(clip='rect(1px, 3px, 2px, 4px)').fingerprint),
+            hash(CSS(clip='rect(1px, 3px, 2px, 4px)').fingerprint),
+        )
+
+    def test_shared_between_documents(self):
+        # Identical declarations in different documents share a computed style.
+        root1 = self.build_document()
+        css_engine.compute_styles(root1)
+        child = self.child1
+
+        root2 = self.build_document()
+        css_engine.compute_styles(root2)
+
+        self.assertIs(root1.style.computed, root2.style.computed)
+        self.assertIs(child.style.computed, self.child1.style.computed)
+
+    def test_copy_shares_computed_style(self):
+        root = self.build_document()
+        css_engine.compute_styles(root)
+
+        node = TestNode(style=self.child1.style)
+        self.assertIsNot(node.style, self.child1.style)
+        self.assertIs(node.style.computed, self.child1.style.computed)
+
+        # Modifying the copy doesn't modify the original
+        node.style.height = 50
+        self.assertIsNone(node.style.computed)
+        self.assertEqual(self.child1.style.height, 10)
+        self.assertEqual(self.child1.style.computed.height, 10 * px)
+
+    def test_immutable(self):
+        root = self.build_document()
+        css_engine.compute_styles(root)
+
+        with self.assertRaises(AttributeError):
+            root.style.computed.width = 10
+        with self.assertRaises(AttributeError):
+            del root.style.computed.width
+
+    def test_recompute(self):
+        root = self.build_document()
+        css_engine.compute_styles(root)
+        original = self.child1.style.computed
+
+        # If nothing has changed, the computed style is retained
+        css_engine.compute_styles(root)
+        self.assertIs(self.child1.style.computed, original)
+        self.assertFalse(self.child1.style.compute(root.style.computed))
+
+        # A change to a property that isn't inherited doesn't
+        # change the computed values of the children.
+        root.style.width = 200
+        css_engine.compute_styles(root)
+        self.assertEqual(root.style.computed.width, 200 * px)
+        self.assertIs(self.child1.style.computed, original)
+
+        # A change to an inherited property is inherited by the
+        # children that don't specify a value.
+        root.style.color = 'green'
+        css_engine.compute_styles(root)
+        self.assertEqual(self.child1.style.computed.color, NAMED_COLOR['green'])
+        self.assertEqual(self.child2.style.computed.color, NAMED_COLOR['green'])
+        self.assertEqual(self.child3.style.computed.color, NAMED_COLOR['red'])
+
+        # Changing a property re-evaluates the computed style.
+        self.child3.style.color = 'blue'
+        self.assertIsNone(self.child3.style.computed)
+        css_engine.compute_styles(root)
+        self.assertEqual(self.child3.style.computed.color, NAMED_COLOR['blue'])
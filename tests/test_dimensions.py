@@ -508,6 +508,58 @@ class BoxTests(TestCase):
             }
         )
 
+    def test_set_origin(self):
+        self.node.layout.content_top = 7
+        self.node.layout.content_left = 8
+
+        self.node.layout.origin_top = 100
+        self.node.layout.origin_left = 200
+        self.assertEqual(self.node.layout.origin_top, 100)
+        self.assertEqual(self.node.layout.origin_left, 200)
+        self.assertEqual(self.child1.layout.origin_top, 107)
+        self.assertEqual(self.child1.layout.origin_left, 208)
+
+        # Boxes don't have storage for arbitrary attributes.
+        with self.assertRaises(AttributeError):
+            self.node.layout.unknown = 42
+
+    def test_descendent_offsets_without_parent(self):
+        # The nodes of the fixture have children, but no parent.
+        self.child1.layout.content_top = 3
+        self.child1.layout.content_left = 4
+        self.grandchild1_2.layout.content_top = 5
+        self.assertEqual(self.grandchild1_2.layout.absolute_content_top, 8)
+        self.assertEqual(self.grandchild1_2.layout.absolute_content_left, 4)
+
+        # Moving an ancestor moves all the descendants.
+        self.node.layout.content_top = 10
+        self.node.layout.content_left = 20
+        self.assertEqual(self.grandchild1_2.layout.absolute_content_top, 18)
+        self.assertEqual(self.grandchild1_2.layout.absolute_content_left, 24)
+        self.assertEqual(self.child2.layout.absolute_content_top, 10)
+        self.assertEqual(self.child2.layout.absolute_content_left, 20)
+
+    def test_deep_descendent_offsets(self):
+        # Build a chain of nodes that is deeper than the recursion limit.
+        nodes = [self.node]
+        for i in range(2000):
+            node = TestNode()
+            node.parent = nodes[-1]
+            nodes[-1].children = [node]
+            node.layout.content_top = 1
+            node.layout.content_left = 2
+            nodes.append(node)
+
+        self.assertEqual(nodes[-1].layout.absolute_content_top, 2000)
+        self.assertEqual(nodes[-1].layout.absolute_content_left, 4000)
+        self.assertEqual(nodes[1000].layout.absolute_content_top, 1000)
+
+        # Moving an ancestor moves all the descendants.
+        nodes[500].layout.content_top = 11
+        self.assertEqual(nodes[-1].layout.absolute_content_top, 2010)
+        self.assertEqual(nodes[1000].layout.absolute_content_top, 1010)
+        self.assertEqual(nodes[499].layout.absolute_content_top, 499)
+
     def test_dirty_handling(self):
         self.node.layout.dirty = None
         self.assertIsNone(self.node.layout.dirty)
@@ -0,0 +1,87 @@
+from unittest import TestCase
+
+from colosseum.fonts import Font, FontMetrics, MeasurementCache
+
+
+class Monospace(FontMetrics):
+    "A font in which every character is 0.5em wide."
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.calls = []
+
+    def measure_many(self, font, runs, letter_spacing=0, word_spacing=0):
+        self.calls.append(list(runs))
+        return super().measure_many(font, runs, letter_spacing, word_spacing)
+
+    def measure(self, font, text, letter_spacing=0, word_spacing=0):
+        return (
+            len(text) * (font.size / 2 + letter_spacing)
+            + text.count(' ') * word_spacing
+        )
+
+
+class FontTests(TestCase):
+    def test_font(self):
+        font = Font(12)
+        self.assertEqual(font.em, 12)
+        self.assertEqual(font.ex, 0.65 * 12)
+        self.assertEqual(font.ch, 0.71 * 12)
+        self.assertEqual(font, Font(12))
+        self.assertEqual(hash(font), hash(Font(12)))
+        self.assertNotEqual(font, Font(16))
+
+    def test_provider(self):
+        metrics = FontMetrics()
+        self.assertEqual(metrics.font(None), Font(12))
+        with self.assertRaises(NotImplementedError):
+            metrics.measure(Font(12), 'hello')
+
+
+class MeasurementCacheTests(TestCase):
+    def setUp(self):
+        self.metrics = Monospace()
+        self.cache = MeasurementCache(self.metrics, maxsize=3)
+        self.font = Font(12)
+
+    def test_measure(self):
+        self.assertEqual(self.cache.measure(self.font, 'hello'), 30)
+        self.assertEqual(self.cache.measure(self.font, 'hello'), 30)
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+
+        # Measurements are keyed on the font and the spacing.
+        self.assertEqual(self.cache.measure(Font(16), 'hello'), 40)
+        self.assertEqual(self.cache.measure(self.font, 'hello', letter_spacing=1), 35)
+        self.assertEqual(self.cache.measure(self.font, 'hello world', word_spacing=4), 70)
+        self.assertEqual(self.cache.misses, 4)
+
+    def test_eviction(self):
+        for text in ['a', 'b', 'c']:
+            self.cache.measure(self.font, text)
+        # Use 'a', so 'b' is the least recently used.
+        self.cache.measure(self.font, 'a')
+        self.cache.measure(self.font, 'd')
+
+        self.assertEqual(len(self.cache), 3)
+        self.cache.measure(self.font, 'a')
+        self.cache.measure(self.font, 'b')
+        self.assertEqual((self.cache.hits, self.cache.misses), (2, 5))
+
+    def test_measure_many(self):
+        self.cache.maxsize = 100
+        self.cache.measure(self.font, 'the')
+
+        widths = self.cache.measure_many(self.font, ['the', 'quick', 'fox', 'quick', 'the'])
+        self.assertEqual(widths, [18, 30, 18, 30, 18])
+
+        # Only the runs that weren't cached are measured, in a single batch.
+        self.assertEqual(self.metrics.calls, [['quick', 'fox']])
+        self.assertEqual((self.cache.hits, self.cache.misses), (3, 3))
+
+        self.cache.measure_many(self.font, ['fox', 'quick'])
+        self.assertEqual(len(self.metrics.calls), 1)
+
+    def test_clear(self):
+        self.cache.measure(self.font, 'hello')
+        self.cache.clear()
+        self.assertEqual(len(self.cache), 0)
+        self.assertEqual((self.cache.hits, self.cache.misses), (0, 0))
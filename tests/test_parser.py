@@ -15,16 +15,21 @@ from colosseum.parser import (
 )
 from colosseum.shapes import Rect
 from colosseum.units import (
+    Unit,
     ch,
     cm,
+    deg,
     em,
     ex,
+    grad,
     inch,
     mm,
     pc,
     percent,
     pt,
     px,
+    rad,
+    turn,
     vh,
     vmax,
     vmin,
@@ -85,6 +90,33 @@ class ParseUnitTests(TestCase):
         with self.assertRaises(ValueError):
             parser.units('church')
 
+        with self.assertRaises(ValueError):
+            parser.units(None)
+
+    def test_angle_units(self):
+        self.assertEqualUnits('10deg', 10 * deg)
+        self.assertEqualUnits('10grad', 10 * grad)
+        self.assertEqualUnits('10rad', 10 * rad)
+        self.assertEqualUnits('10turn', 10 * turn)
+
+    def test_interned(self):
+        # Parsing the same value twice returns the same instance
+        self.assertIs(parser.units('10px'), parser.units('10px'))
+        self.assertIs(parser.units('1.5em'), parser.units('1.5em'))
+        self.assertIs(parser.units(10), parser.units(10))
+
+        # ints and floats are parsed separately
+        self.assertIsInstance(parser.units(10).val, int)
+        self.assertIsInstance(parser.units(10.0).val, float)
+
+    def test_registry_is_stable(self):
+        registered = dict(Unit.UNITS)
+        for i in range(100):
+            parser.units('%spx' % i)
+            i * em
+
+        self.assertEqual(Unit.UNITS, registered)
+
 
 class ParseColorTests(TestCase):
     def assertEqualHSL(self, value, expected):
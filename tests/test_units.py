@@ -1,7 +1,10 @@
+import copy
 import math
+import pickle
 from unittest import TestCase
 
 from colosseum.units import (
+    ResolutionCache,
     ch,
     cm,
     deg,
@@ -122,6 +125,48 @@ class BaseUnitTests(TestCase):
         with self.assertRaises(TypeError):
             px * 5
 
+    def test_immutable(self):
+        p = 5 * px
+        with self.assertRaises(AttributeError):
+            p.val = 10
+        with self.assertRaises(AttributeError):
+            p.suffix = 'em'
+        with self.assertRaises(AttributeError):
+            cm.scale = 10
+
+        self.assertEqual(p, 5 * px)
+
+    def test_copy(self):
+        for value in [5 * px, 1.5 * em, 2 * cm, 90 * deg, 50 * percent, 10 * vw]:
+            # Copies are the (immutable) value itself.
+            self.assertIs(copy.copy(value), value)
+            self.assertIs(copy.deepcopy(value), value)
+
+            restored = pickle.loads(pickle.dumps(value))
+            self.assertIs(type(restored), type(value))
+            self.assertEqual(restored, value)
+            self.assertEqual(hash(restored), hash(value))
+            self.assertEqual(repr(restored), repr(value))
+
+        restored = pickle.loads(pickle.dumps(2 * cm))
+        self.assertEqual(restored.px(display=self.display), (2 * cm).px(display=self.display))
+        self.assertEqual(pickle.loads(pickle.dumps(90 * deg)).deg(), 90)
+
+    def test_hash(self):
+        # Equal units have equal hashes, so they can be used as keys
+        self.assertEqual(hash(5 * px), hash(5 * px))
+        self.assertEqual(hash(5 * px), hash(5))
+        self.assertEqual(hash(5 * em), hash(5 * em))
+        self.assertEqual(hash(5 * cm), hash(5 * cm))
+        self.assertEqual(hash(5 * vw), hash(5 * vw))
+        self.assertEqual(hash(5 * percent), hash(5 * percent))
+        self.assertEqual(hash(5 * deg), hash(5 * deg))
+
+        values = {5 * px: 'px', 5 * em: 'em', 5 * percent: '%'}
+        self.assertEqual(values[5 * px], 'px')
+        self.assertEqual(values[5 * em], 'em')
+        self.assertEqual(values[5 * percent], '%')
+
 
 class PixelUnitTests(TestCase):
     def setUp(self):
@@ -456,6 +501,55 @@ class PercentUnitTests(TestCase):
         self.assertNotEqual(p, 5)
 
 
+class ResolutionCacheTests(TestCase):
+    def setUp(self):
+        self.simple = Display(dpi=96, width=640, height=480)
+        self.hidpi = Display(dpi=326, width=640, height=1136)
+        self.helvetica12 = Helvetica(12)
+        self.helvetica16 = Helvetica(16)
+        self.cache = ResolutionCache()
+
+    def test_pixels(self):
+        self.assertEqual(self.cache.px(5 * px, display=self.simple), 5)
+        self.assertEqual(self.cache.px(5 * px, display=self.hidpi, size=100), 5)
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+
+    def test_percent(self):
+        self.assertEqual(self.cache.px(5 * percent, size=100), 5)
+        self.assertEqual(self.cache.px(5 * percent, size=100), 5)
+        self.assertEqual(self.cache.px(5 * percent, size=500), 25)
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 2))
+
+    def test_absolute(self):
+        self.assertEqual(self.cache.px(5 * pt, display=self.simple), 6.671875)
+        self.assertEqual(self.cache.px(5 * pt, display=self.simple, size=100), 6.671875)
+        self.assertEqual(self.cache.px(5 * pt, display=self.hidpi), 22.640625)
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 2))
+
+    def test_font(self):
+        self.assertEqual(self.cache.px(5 * em, display=self.simple, font=self.helvetica12), 80)
+        self.assertEqual(self.cache.px(5 * em, display=self.simple, font=Helvetica(12)), 80)
+        self.assertEqual(self.cache.px(5 * em, display=self.simple, font=self.helvetica16), 106.671875)
+        self.assertEqual(self.cache.px(5 * ex, display=self.simple, font=self.helvetica12), 52)
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 3))
+
+    def test_viewport(self):
+        self.assertEqual(self.cache.px(5 * vw, display=self.simple), 32)
+        self.assertEqual(self.cache.px(5 * vw, display=self.hidpi), 32)
+        self.assertEqual(self.cache.px(5 * vh, display=self.hidpi), 56.796875)
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 2))
+
+    def test_maxsize(self):
+        cache = ResolutionCache(maxsize=10)
+        for i in range(25):
+            self.assertEqual(cache.px(i * px), i)
+        self.assertLessEqual(len(cache), 10)
+
+        cache.clear()
+        self.assertEqual(len(cache), 0)
+        self.assertEqual((cache.hits, cache.misses), (0, 0))
+
+
 class AngleUnitTests(TestCase):
     def test_deg(self):
         p = 1 * deg
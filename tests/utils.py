@@ -1,5 +1,7 @@
+import hashlib
 import json
 import os
+import tempfile
 from unittest import TestCase, expectedFailure
 
 from colosseum.constants import BLOCK, HTML4, MEDIUM, THICK, THIN
@@ -64,7 +66,9 @@ def build_document(data, parent=None):
 
 
 def summarize(node):
-    if node.layout:
+    # The tree is walked with an explicit stack, so the layout
+    # of documents of any depth can be summarized.
+    def describe(node):
         layout = {
             'content': {
                 'position': (node.layout.absolute_content_left, node.layout.absolute_content_top),
@@ -81,19 +85,26 @@ def summarize(node):
         }
         if node.name:
             layout['tag'] = node.name
+        return layout
+
+    if not node.layout:
+        # TODO - add proper handling for anonymous boxes.
+        return None
+
+    root = describe(node)
+    stack = [(node, root)]
+    while stack:
+        node, layout = stack.pop()
         children = []
         for child in node.children:
-            sublayout = summarize(child)
-            if sublayout:
+            if child.layout:
+                sublayout = describe(child)
                 children.append(sublayout)
+                stack.append((child, sublayout))
         if children:
             layout['children'] = children
-    else:
-        layout = None
-    #     # TODO - add proper handling for anonymous boxes.
-    #     layout = 'NOT DISPLAYED'
 
-    return layout
+    return root
 
 
 def clean_layout(layout):
@@ -306,43 +317,117 @@ class LayoutTestCase(TestCase):
             self.fail('\n'.join(output))
 
 
-class W3CTestCase(LayoutTestCase):
-    @classmethod
-    def find_tests(cls, test_filename, group):
-        dirname = os.path.dirname(test_filename)
-        data_dir = os.path.join(dirname, 'data')
-        ref_dir = os.path.join(dirname, 'ref')
+class CorpusIndex:
+    """An index of the web platform test corpus.
+
+    For each test directory, the index records the name and helper text
+    of every test document, so tests can be collected without reading
+    the documents themselves; a document (and its reference rendering)
+    is only loaded when its test runs.
 
-        # Read the not_implemented file.
-        expected_failures = set()
-        not_implemented_file = os.path.join(dirname, 'not_implemented')
+    The index is stored in a single file, and is brought up to date the
+    first time a directory is used; only documents that have been added
+    or modified since the index was written are read. Directories are
+    identified by their absolute path, so the index can be stored outside
+    the corpus; see index_path().
+    """
+    VERSION = 2
+
+    def __init__(self, path):
+        self.path = path
+        self._index = None
+        self._directories = {}
+        self._lists = {}
+
+    def _load(self):
         try:
-            with open(not_implemented_file) as f:
-                expected_failures.update({
-                    'test_' + line.strip().replace('-', '_')
-                    for line in f
-                    if line.strip()
-                })
-        except IOError:
+            with open(self.path) as f:
+                index = json.load(f)
+            if index.get('version') == self.VERSION:
+                return index
+        except (IOError, ValueError):
             pass
+        return {'version': self.VERSION, 'directories': {}}
 
-        not_compliant = os.path.join(dirname, 'not_compliant')
+    def _save(self):
+        # Write the index atomically; if the index can't be written,
+        # it is rebuilt by every run.
         try:
-            with open(not_compliant) as f:
-                expected_failures.update({
-                    'test_' + line.strip().replace('-', '_')
-                    for line in f
-                    if line.strip()
-                })
-        except IOError:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp_path = '{}.{}.tmp'.format(self.path, os.getpid())
+            with open(tmp_path, 'w') as f:
+                json.dump(self._index, f)
+            os.replace(tmp_path, self.path)
+        except OSError:
             pass
 
-        # Read the not_valid test file.
-        ignore = set()
-        not_valid_file = os.path.join(dirname, 'not_valid')
+    def directory(self, dirname):
+        """Return the index of a test directory.
+
+        The index is a pair of dictionaries, mapping group names to
+        lists of (filename, assert, help) describing the tests in the group.
+        The first dictionary is keyed on the name of the test, less the
+        test number; the second is keyed on the full name of the test.
+        """
         try:
-            with open(not_valid_file) as f:
-                ignore.update({
+            return self._directories[dirname]
+        except KeyError:
+            pass
+
+        if self._index is None:
+            self._index = self._load()
+
+        key = os.path.abspath(dirname)
+        data_dir = os.path.join(dirname, 'data')
+        old_entries = self._index['directories'].get(key, {})
+        entries = {}
+        for entry in os.scandir(data_dir):
+            stat = entry.stat()
+            entries[entry.name] = old_entries.get(entry.name)
+            if entries[entry.name] is None or entries[entry.name][:2] != [stat.st_mtime_ns, stat.st_size]:
+                with open(entry.path) as f:
+                    input_data = json.load(f)
+                entries[entry.name] = [stat.st_mtime_ns, stat.st_size, input_data['assert'], input_data['help']]
+
+        if entries != old_entries:
+            self._index['directories'][key] = entries
+            self._save()
+
+        by_prefix = {}
+        by_name = {}
+        for filename, (mtime, size, assertion, help) in sorted(entries.items()):
+            test = (filename, assertion, help)
+            by_prefix.setdefault('-'.join(filename.split('-')[:-1]), []).append(test)
+            by_name.setdefault('-'.join(filename.split('.')[:-1]), []).append(test)
+
+        self._directories[dirname] = (by_prefix, by_name)
+        return by_prefix, by_name
+
+    def find(self, dirname, group):
+        """Return (filename, assert, help) for each test in a group.
+
+        A group ending in '-' is a test name, less the test number;
+        any other group is the full name of a single test.
+        """
+        by_prefix, by_name = self.directory(dirname)
+        if group.endswith('-'):
+            return by_prefix.get(group[:-1], [])
+        else:
+            return by_name.get(group, [])
+
+    def test_list(self, filename):
+        """Return the names of the test methods listed in a file (e.g.,
+        the not_implemented file of a test directory).
+        """
+        try:
+            return self._lists[filename]
+        except KeyError:
+            pass
+
+        tests = set()
+        try:
+            with open(filename) as f:
+                tests.update({
                     'test_' + line.strip().replace('-', '_')
                     for line in f
                     if line.strip()
@@ -350,23 +435,50 @@ class W3CTestCase(LayoutTestCase):
         except IOError:
             pass
 
+        self._lists[filename] = tests
+        return tests
+
+
+def index_path(corpus_dir):
+    """The path of the index of the corpus in `corpus_dir`.
+
+    Indexes are stored in the temporary directory (e.g., $TMPDIR), rather
+    than in the checkout; each corpus has an index of its own.
+    """
+    digest = hashlib.sha1(os.path.abspath(corpus_dir).encode('utf-8')).hexdigest()
+    return os.path.join(tempfile.gettempdir(), 'colosseum', 'corpus-{}.json'.format(digest[:16]))
+
+
+corpus = CorpusIndex(index_path(os.path.join(os.path.dirname(__file__), 'web_platform')))
+
+
+class W3CTestCase(LayoutTestCase):
+    @classmethod
+    def find_tests(cls, test_filename, group):
+        dirname = os.path.dirname(test_filename)
+        data_dir = os.path.join(dirname, 'data')
+        ref_dir = os.path.join(dirname, 'ref')
+
+        # Read the not_implemented and not_compliant files.
+        expected_failures = (
+            corpus.test_list(os.path.join(dirname, 'not_implemented'))
+            | corpus.test_list(os.path.join(dirname, 'not_compliant'))
+        )
+
+        # Read the not_valid test file.
+        ignore = corpus.test_list(os.path.join(dirname, 'not_valid'))
+
         # Closure for building test cases for a given input file.
-        def make_test(test_dir, filename):
+        def make_test(test_dir, filename, assertion, help):
             css_test_name = os.path.splitext(filename)[0]
             css_test_module = os.path.basename(os.path.dirname(test_dir))
             if css_test_module == 'CSS2':
                 css_test_module = 'css21'
             test_name = 'test_' + css_test_name.replace('-', '_')
 
-            with open(os.path.join(data_dir, filename)) as f:
-                input_data = json.load(f)
-
-            with open(os.path.join(ref_dir, filename)) as f:
-                reference = json.load(f)
-
             extra = []
-            if input_data['help']:
-                extra.append('\n'.join('See {}'.format(h) for h in input_data['help']))
+            if help:
+                extra.append('\n'.join('See {}'.format(h) for h in help))
                 extra.append('')
 
             extra.append(
@@ -376,9 +488,15 @@ class W3CTestCase(LayoutTestCase):
                 )
             )
 
-            # The actual test method. Builds a document, lays it out,
-            # and checks against the reference rendering.
+            # The actual test method. Loads the test document, builds it,
+            # lays it out, and checks against the reference rendering.
             def test_method(self):
+                with open(os.path.join(data_dir, filename)) as f:
+                    input_data = json.load(f)
+
+                with open(os.path.join(ref_dir, filename)) as f:
+                    reference = json.load(f)
+
                 root = build_document(input_data['test_case'])
 
                 layout(self.display, root, standard=HTML4)
@@ -391,8 +509,8 @@ class W3CTestCase(LayoutTestCase):
 
             # Annotate the method with any helper text.
             doc = []
-            if input_data['assert']:
-                doc.append(input_data['assert'])
+            if assertion:
+                doc.append(assertion)
             else:
                 doc.append('Test ' + os.path.splitext(filename)[0].replace('-', '_'))
 
@@ -408,19 +526,12 @@ class W3CTestCase(LayoutTestCase):
 
             return test_name, test_method
 
-        # Find all the data files, and build a test case for each test group
-        # that is represented there. Exclude any test that is explicitly
-        # on the ignore list.
+        # Build a test case for each test in the group.
+        # Exclude any test that is explicitly on the ignore list.
         tests = {}
-        for filename in os.listdir(data_dir):
-            if group.endswith('-'):
-                found = '-'.join(filename.split('-')[:-1]) == group[:-1]
-            else:
-                found = '-'.join(filename.split('.')[:-1]) == group
-            if found:
-
-                test_name, test_method = make_test(dirname, filename)
-                if test_name not in ignore:
-                    tests[test_name] = test_method
+        for filename, assertion, help in corpus.find(dirname, group):
+            test_name, test_method = make_test(dirname, filename, assertion, help)
+            if test_name not in ignore:
+                tests[test_name] = test_method
 
         return tests